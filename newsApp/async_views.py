@@ -0,0 +1,199 @@
+"""
+Async variants of the public read endpoints, for the ASGI (uvicorn) serving
+mode described in ``news_channel/asgi.py``.
+
+Each view reuses the configuration of its sync DRF counterpart (filters,
+sparse fieldsets, pagination, serializers) and only swaps the queries that
+fetch rows and counts for the async ORM, so responses are identical while a
+slow client never pins a worker thread.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import CachedResponseMixin
+from .counts import aexact_counts, get_counts, wants_estimated_counts
+from .events import STREAM_RESET, event_stream, get_event_broker, parse_last_event_id
+from .models import Article, Category
+from .pagination import KeysetPagination
+from .renderers import FastJSONRenderer
+from .search import add_search_metadata
+from .trending import ViewCountMixin
+from .views import ArticleDetailView, ArticleListCreateView, ArticlesByCategoryView, CategoryListCreateView
+
+
+class AsyncReadView(APIView):
+    """
+    ``APIView`` with coroutine handlers. DRF's own ``dispatch`` is sync, so
+    this one repeats its steps around an awaited handler: ``initial()``
+    (authentication, permissions, throttles, content negotiation) runs in a
+    thread as it may hit the database, and errors go through
+    ``handle_exception`` like on any other endpoint.
+    """
+    http_method_names = ['get', 'head', 'options']
+    # JSON only: the browsable API renderer queries the database while rendering
+    renderer_classes = [FastJSONRenderer]
+    sync_view_class = None
+
+    def get_permissions(self):
+        # The checks of the sync counterpart, so both serving modes guard alike
+        if self.sync_view_class is not None:
+            return [permission() for permission in self.sync_view_class.permission_classes]
+        return super().get_permissions()
+
+    def get_throttles(self):
+        if self.sync_view_class is not None:
+            return [throttle() for throttle in self.sync_view_class.throttle_classes]
+        return super().get_throttles()
+
+    def get_sync_view(self, request):
+        return self.sync_view_class(
+            request=request, args=self.args, kwargs=self.kwargs, format_kwarg=self.format_kwarg
+        )
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            # OPTIONS is answered by APIView's sync handler
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    @staticmethod
+    async def fetch(queryset):
+        return [obj async for obj in queryset]
+
+
+class AsyncListView(AsyncReadView):
+    with_counts = False
+
+    async def get(self, request, *args, **kwargs):
+        view = self.get_sync_view(request)
+        # Filter backends only build the query (the category filter may validate
+        # its id with one lookup), so they run once in a thread
+        queryset = await sync_to_async(lambda: view.filter_queryset(view.get_queryset()))()
+        rows_queryset = view.values_queryset(queryset)
+        paginator = view.paginator
+
+        extra, count = {}, None
+        if isinstance(paginator, KeysetPagination):
+            page_queryset = paginator.page_queryset(rows_queryset, request)
+        else:
+            if self.with_counts:
+                if wants_estimated_counts(request):
+                    counts, approximate = await sync_to_async(get_counts)(queryset, estimated=True)
+                else:
+                    counts, approximate = await aexact_counts(queryset), False
+                extra = {'counts': {'published': counts['published'], 'draft': counts['draft']}, 'approximate': approximate}
+                count = counts['total']
+            else:
+                count = await queryset.acount()
+            page_queryset = paginator.page_queryset(rows_queryset, request, count=count)
+
+        rows = paginator.finish_page(await self.fetch(page_queryset))
+        data = add_search_metadata(view, rows, view.serialize_rows(rows))
+        return paginator.get_paginated_response(data, **extra)
+
+
+# ARTICLE VIEWS
+class AsyncArticleListView(CachedResponseMixin, AsyncListView):
+    cache_models = (Article, Category)
+    sync_view_class = ArticleListCreateView
+    with_counts = True
+
+
+class AsyncArticlesByCategoryView(CachedResponseMixin, AsyncListView):
+    cache_models = (Article, Category)
+    sync_view_class = ArticlesByCategoryView
+
+
+class AsyncArticleDetailView(ViewCountMixin, CachedResponseMixin, AsyncReadView):
+    cache_models = (Article, Category)
+    sync_view_class = ArticleDetailView
+
+    async def get(self, request, pk):
+        view = self.get_sync_view(request)
+        try:
+            article = await view.get_queryset().aget(pk=pk)
+        except Article.DoesNotExist:
+            raise NotFound("No Article matches the given query.")
+        return Response(view.get_serializer(article).data)
+
+
+# CATEGORY VIEWS
+class AsyncCategoryListView(CachedResponseMixin, AsyncReadView):
+    cache_models = (Category,)
+    sync_view_class = CategoryListCreateView
+
+    async def get(self, request):
+        view = self.get_sync_view(request)
+        queryset = view.filter_queryset(view.get_queryset())
+        categories = await self.fetch(view.values_queryset(queryset))
+        return Response(view.serialize_rows(categories))
+
+
+# EVENT STREAM
+class ArticleEventStreamView(AsyncReadView):
+    """
+    Server-Sent Events of article publishes, updates and removals, filtered
+    with ``?tag=`` and ``?category=`` (comma-separated, combined with AND).
+    Reconnecting clients resume after ``Last-Event-ID`` (or
+    ``?last_event_id=``); a ``stream.reset`` event means events were missed
+    and the client should refetch.
+    """
+
+    def parse_filters(self, request):
+        tags = {tag for tag in request.query_params.get('tag', '').split(',') if tag}
+        unknown = tags - set(Article.TagChoices.values)
+        if unknown:
+            raise ValidationError({'tag': f"Unknown tag(s): {', '.join(sorted(unknown))}"})
+        categories = {value for value in request.query_params.get('category', '').split(',') if value}
+        if not all(value.isdigit() for value in categories):
+            raise ValidationError({'category': "Expected comma-separated category ids"})
+        return tags, {int(value) for value in categories}
+
+    async def get(self, request):
+        if not isinstance(request._request, ASGIRequest):
+            return Response({'detail': "The event stream is only served by the ASGI application."}, status=501)
+        tags, categories = self.parse_filters(request)
+
+        def matches(event):
+            if event.type == STREAM_RESET:
+                return True
+            return (not tags or event.tag in tags) and (not categories or event.category in categories)
+
+        broker = get_event_broker()
+        last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        sequence = parse_last_event_id(last_event_id, broker.epoch)
+        replay_lost = last_event_id is not None and sequence is None
+        if sequence is None:
+            sequence = broker.last_sequence()
+
+        response = StreamingHttpResponse(
+            event_stream(broker, sequence, matches, replay_lost=replay_lost),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Tell nginx-style proxies not to buffer the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
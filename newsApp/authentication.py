@@ -0,0 +1,156 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .routers import pin_user_reads
+
+USER_CACHE_TTL = getattr(settings, 'NEWS_AUTH_USER_CACHE_TTL', 60)
+STATELESS_STAFF = getattr(settings, 'NEWS_JWT_STATELESS_STAFF', False)
+
+USER_KEY = 'news:auth:user:{}'
+STAFF_CLAIM = 'is_staff'
+
+# What authentication and permission checks read; other attributes load the row
+CACHED_USER_FIELDS = ('is_active', 'is_staff', 'is_superuser')
+
+
+class StaffClaimRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry the ``is_staff`` claim that
+    stateless staff checks read. The refresh token itself does not: the
+    flag is read from the user whenever an access token is issued, so a
+    refresh picks up a revoked staff flag.
+    """
+    is_staff = None
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.is_staff = user.is_staff
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        is_staff = self.is_staff
+        if is_staff is None:
+            is_staff = get_user_model().objects.filter(
+                **{api_settings.USER_ID_FIELD: self.payload.get(api_settings.USER_ID_CLAIM)}
+            ).values_list('is_staff', flat=True).first()
+        if is_staff is None:
+            # Tokens refreshed from before the claim moved off refresh tokens
+            access.payload.pop(STAFF_CLAIM, None)
+        else:
+            access[STAFF_CLAIM] = is_staff
+        return access
+
+
+class NewsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = StaffClaimRefreshToken
+
+
+class NewsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = StaffClaimRefreshToken
+
+
+def invalidate_cached_user(user_id):
+    # After commit, or a concurrent request could cache the old row again
+    transaction.on_commit(lambda: cache.delete(USER_KEY.format(user_id)))
+
+
+class PartialUser(SimpleLazyObject):
+    """
+    An authenticated user known by its id and a few ``fields``. Permission
+    checks read only those; any other attribute loads the real user.
+    """
+
+    def __init__(self, pk, fields, load):
+        super().__init__(load)
+        self.__dict__['_fields'] = dict(fields, pk=pk, id=pk)
+
+    def __getattr__(self, name):
+        fields = self.__dict__['_fields']
+        if name in fields:
+            return fields[name]
+        return super().__getattr__(name)
+
+    def __bool__(self):
+        return True
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that keeps resolved users in the cache for
+    ``NEWS_AUTH_USER_CACHE_TTL`` seconds instead of reading the row on every
+    request.
+
+    Only the fields in ``CACHED_USER_FIELDS`` are cached (never the
+    password hash), served as a ``PartialUser``. A cached user serves
+    tokens issued (``iat``) before it was loaded; a newer token reloads it,
+    so logging in again always sees the current row. User saves drop the
+    entry (see ``signals.py``).
+
+    With ``NEWS_JWT_STATELESS_STAFF`` tokens carrying an ``is_staff`` claim
+    authenticate without any lookup until a view reads another attribute of
+    the user. The claim is trusted until the token expires.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM in validated_token:
+            pin_user_reads(validated_token[api_settings.USER_ID_CLAIM])
+        if STATELESS_STAFF and STAFF_CLAIM in validated_token and api_settings.USER_ID_CLAIM in validated_token:
+            return PartialUser(
+                validated_token[api_settings.USER_ID_CLAIM],
+                {'is_staff': bool(validated_token[STAFF_CLAIM])},
+                lambda: self.get_cached_user(validated_token),
+            )
+        return self.get_cached_user(validated_token)
+
+    def get_cached_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not USER_CACHE_TTL:
+            return super().get_user(validated_token)
+
+        key = USER_KEY.format(user_id)
+        entry = cache.get(key)
+        if entry is not None and validated_token.get('iat', 0) <= entry['loaded_at']:
+            self.check_user(entry, validated_token)
+            return PartialUser(entry['pk'], entry['fields'], partial(super().get_user, validated_token))
+
+        loaded_at = int(time.time())
+        user = super().get_user(validated_token)
+        cache.set(key, {
+            'pk': user.pk,
+            'fields': {field: getattr(user, field) for field in CACHED_USER_FIELDS},
+            # What the token's revoke claim must match; not the hash itself
+            'revoke_claim': get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None,
+            'loaded_at': loaded_at,
+        }, USER_CACHE_TTL)
+        return user
+
+    def check_user(self, entry, validated_token):
+        # The checks JWTAuthentication.get_user runs on a freshly loaded row
+        if api_settings.CHECK_USER_IS_ACTIVE and not entry['fields']['is_active']:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry['revoke_claim']:
+                raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
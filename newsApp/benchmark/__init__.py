@@ -0,0 +1,10 @@
+"""
+Reproducible load/latency benchmarks for the news API.
+
+``corpus`` seeds a deterministic synthetic data set and ``runner`` drives the
+public endpoints in-process, recording latency percentiles, throughput, SQL
+query counts and response sizes as JSON. See the ``seed_benchmark`` and
+``benchmark`` management commands.
+"""
+from .corpus import seed_corpus
+from .runner import compare_runs, default_endpoints, run_benchmark
@@ -0,0 +1,102 @@
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils.text import slugify
+from django.utils.timezone import now
+
+from ..models import Article, Category
+from ..signals import articles_bulk_saved
+from ..storage import object_url
+
+SYLLABLES = [
+    'ba', 'ri', 'ko', 'lan', 'mu', 'se', 'dra', 'vi', 'to', 'nel', 'par', 'shi',
+    'go', 'ma', 'tren', 'di', 'vor', 'ka', 'lu', 'pe', 'sta', 'ne', 'hol', 'ru',
+]
+
+TAGS = [choice for choice, _ in Article.TagChoices.choices]
+
+
+class Corpus:
+    """Deterministic word, keyword and author pools for one seed."""
+
+    def __init__(self, seed, words=5000, keywords=500, authors=200):
+        self.random = random.Random(seed)
+        self.words = sorted({self.word() for _ in range(words)})
+        self.keywords = self.random.sample(self.words, min(keywords, len(self.words)))
+        # Zipf-like weights: a few keywords are on many articles, most on few
+        self.keyword_weights = [1 / rank for rank in range(1, len(self.keywords) + 1)]
+        self.authors = [f"{self.word().title()} {self.word().title()}" for _ in range(authors)]
+
+    def word(self):
+        return ''.join(self.random.choice(SYLLABLES) for _ in range(self.random.randint(1, 4)))
+
+    def text(self, words):
+        return ' '.join(self.random.choices(self.words, k=words))
+
+    def paragraphs(self, median_words):
+        # Article bodies are long-tailed: most near the median, some much longer
+        total = max(50, int(self.random.lognormvariate(0, 0.5) * median_words))
+        chunks = []
+        while total > 0:
+            size = min(total, self.random.randint(40, 120))
+            chunks.append(self.text(size).capitalize() + '.')
+            total -= size
+        return '\n\n'.join(chunks)
+
+
+def seed_corpus(articles=10000, categories=50, seed=42, chunk_size=1000, content_words=700, stdout=None):
+    """
+    Adds ``categories`` categories and ``articles`` articles of synthetic
+    content. The same seed always yields the same corpus, so runs against
+    freshly seeded databases are comparable.
+
+    Articles are written with ``bulk_create`` one chunk per transaction;
+    ``articles_bulk_saved`` keeps the search index and keyword table in step.
+    """
+    corpus = Corpus(seed)
+    offset = Article.objects.count()
+
+    existing = Category.objects.count()
+    names = [f"{corpus.word().title()} {existing + number}" for number in range(categories)]
+    # Same slug derivation as Category.save, which bulk_create skips
+    Category.objects.bulk_create([Category(name=name, slug=slugify(name)) for name in names])
+    category_ids = list(Category.objects.order_by('id').values_list('id', flat=True))
+
+    timestamp = now()
+    written = 0
+    while written < articles:
+        batch = []
+        for number in range(offset + written, offset + min(written + chunk_size, articles)):
+            title = f"{corpus.text(corpus.random.randint(5, 12)).capitalize()} {number}"
+            is_published = corpus.random.random() < 0.85
+            batch.append(Article(
+                title=title,
+                slug=slugify(title),
+                author=corpus.random.choice(corpus.authors),
+                category_id=corpus.random.choice(category_ids) if corpus.random.random() < 0.97 else None,
+                summary=corpus.text(corpus.random.randint(30, 60)),
+                content=corpus.paragraphs(content_words),
+                secondary_content=corpus.paragraphs(content_words // 4) if corpus.random.random() < 0.3 else None,
+                banner_image=object_url(f"bench-{seed}-{number}.jpg"),
+                is_published=is_published,
+                published_at=timestamp - timedelta(minutes=corpus.random.randint(0, 2 * 365 * 24 * 60)) if is_published else None,
+                tag=corpus.random.choice(TAGS) if corpus.random.random() < 0.4 else None,
+                related_keywords=sorted(set(corpus.random.choices(
+                    corpus.keywords, weights=corpus.keyword_weights, k=corpus.random.randint(2, 6)
+                ))),
+            ))
+
+        with transaction.atomic():
+            Article.objects.bulk_create(batch)
+            # MySQL does not return primary keys from bulk inserts
+            if any(article.pk is None for article in batch):
+                ids = dict(Article.objects.filter(slug__in=[a.slug for a in batch]).values_list('slug', 'id'))
+                for article in batch:
+                    article.pk = ids[article.slug]
+            articles_bulk_saved.send(sender=Article, articles=batch)
+
+        written += len(batch)
+        if stdout is not None:
+            stdout.write(f"{written}/{articles} articles")
+    return {'articles': written, 'categories': categories}
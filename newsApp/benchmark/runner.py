@@ -0,0 +1,206 @@
+import math
+import platform
+from contextlib import nullcontext
+import statistics
+import time
+
+import django
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from ..models import Article, ArticleKeyword, Category
+from ..trending import views_not_counted
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+PAGE_SIZE = 10
+
+# Metrics compared between runs; lower is better for all of them
+COMPARED_METRICS = ['p50_ms', 'p95_ms', 'p99_ms', 'queries', 'bytes']
+
+
+def default_endpoints():
+    """
+    ``(name, url)`` pairs covering the read endpoints in ``newsApp/urls.py``,
+    with ids, slugs and keywords taken from the current corpus.
+    """
+    article = Article.objects.exclude(category=None).order_by('-id').first()
+    category_id = article.category_id if article else Category.objects.values_list('id', flat=True).first()
+    category_slug = Category.objects.filter(pk=category_id).values_list('slug', flat=True).first()
+    keyword = ArticleKeyword.objects.values_list('keyword', flat=True).order_by('keyword').first()
+    word = (article.title.split() or [''])[0] if article else ''
+    pages = max(Article.objects.count() // PAGE_SIZE, 1)
+
+    endpoints = [
+        ('article list', '/news/articles/'),
+        ('article list, page 2', '/news/articles/?page=2'),
+        ('article list, middle page', f'/news/articles/?page={max(pages // 2, 1)}'),
+        ('article list, last page', f'/news/articles/?page={pages}'),
+        ('article list, cursor', '/news/articles/?pagination=cursor'),
+        ('article list, compact', '/news/articles/?view=compact'),
+        ('article list, estimated counts', '/news/articles/?counts=estimated'),
+        ('published articles', '/news/articles/?is_published=true'),
+        ('tag feed', '/news/articles/?tag=breaking_news'),
+        ('ordering by title', '/news/articles/?ordering=title'),
+        ('categories', '/news/categories/'),
+        ('keywords', '/news/keywords/'),
+        ('home', '/news/home/'),
+        ('trending articles', '/news/articles/trending/'),
+        ('async article list', '/news/async/articles/'),
+    ]
+    if word:
+        endpoints += [
+            ('full-text search', f'/news/articles/?q={word}'),
+            ('substring search', f'/news/articles/?search={word}'),
+        ]
+    if keyword:
+        endpoints += [
+            ('keyword filter', f'/news/articles/?related_keywords={keyword}'),
+            ('any-keyword filter', f'/news/articles/?keywords_any={keyword}'),
+        ]
+    if category_id:
+        endpoints += [
+            ('category filter', f'/news/articles/?is_published=true&category={category_id}'),
+            ('articles by category', f'/news/categories/{category_id}/articles/'),
+            ('category detail', f'/news/categories/{category_id}/'),
+        ]
+    if category_slug:
+        endpoints.append(('category by slug', f'/news/categories/by-slug/{category_slug}/'))
+    if article:
+        endpoints += [
+            ('article detail', f'/news/articles/{article.pk}/'),
+            ('article by slug filter', f'/news/articles/?slug={article.slug}'),
+            ('article by slug', f'/news/articles/by-slug/{article.slug}/'),
+            ('related articles', f'/news/articles/{article.pk}/related/'),
+            ('async article detail', f'/news/async/articles/{article.pk}/'),
+        ]
+    return endpoints
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (which must be sorted)."""
+    if not values:
+        return None
+    # The smallest value with at least pct% of the values at or below it
+    rank = max(math.ceil(pct * len(values) / 100), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(client, url, iterations, warmup):
+    for _ in range(warmup):
+        response_size(client.get(url, HTTP_ACCEPT='application/json'))
+
+    timings, queries, sizes, statuses = [], [], [], {}
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(url, HTTP_ACCEPT='application/json')
+            size = response_size(response)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured.captured_queries))
+        sizes.append(size)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'min_ms': round(timings[0], 3),
+        'max_ms': round(timings[-1], 3),
+        'throughput_rps': round(iterations / elapsed, 2) if elapsed else None,
+        'queries': max(queries),
+        'queries_min': min(queries),
+        'bytes': max(sizes),
+        'bytes_min': min(sizes),
+    }
+
+
+def environment():
+    return {
+        'started_at': now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'database': connection.vendor,
+        'corpus': {
+            'articles': Article.objects.count(),
+            'categories': Category.objects.count(),
+            'keywords': ArticleKeyword.objects.count(),
+        },
+    }
+
+
+def run_benchmark(endpoints=None, iterations=50, warmup=5, use_cache=False, only=None, stdout=None):
+    """
+    Requests every endpoint ``warmup + iterations`` times through the Django
+    test client (no network, full middleware stack) and returns a
+    JSON-serialisable report.
+
+    The response cache is swapped for a dummy backend unless ``use_cache``,
+    so the numbers reflect the database path. Query counting wraps every
+    request, which adds the same small overhead to each run. Article views
+    are not counted, so no view-count flush writes during timed requests.
+    """
+    endpoints = endpoints or default_endpoints()
+    if only:
+        endpoints = [(name, url) for name, url in endpoints if any(part in name for part in only)]
+
+    report = {
+        'environment': environment(),
+        'options': {'iterations': iterations, 'warmup': warmup, 'use_cache': use_cache},
+        'results': [],
+    }
+    client = Client()
+    with override_settings(CACHES=NO_CACHE) if not use_cache else nullcontext(), views_not_counted():
+        for name, url in endpoints:
+            result = {'name': name, 'url': url, **measure(client, url, iterations, warmup)}
+            report['results'].append(result)
+            if stdout is not None:
+                stdout.write(format_result(result))
+    return report
+
+
+def format_result(result):
+    return (
+        f"{result['name']:<32} p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms "
+        f"p99={result['p99_ms']:>8.2f}ms {result['throughput_rps']:>8.1f} req/s "
+        f"queries={result['queries']:<3} bytes={result['bytes']}"
+    )
+
+
+def compare_runs(baseline, current):
+    """
+    Per-endpoint changes of ``current`` against ``baseline`` (both reports
+    from ``run_benchmark``), matched by endpoint name. Ratios above 1 mean
+    the current run is slower or heavier.
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        before = previous.get(result['name'])
+        if before is None:
+            continue
+        row = {'name': result['name']}
+        for metric in COMPARED_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            row[metric] = {
+                'baseline': old,
+                'current': new,
+                'ratio': round(new / old, 3) if old else None,
+            }
+        rows.append(row)
+    return rows
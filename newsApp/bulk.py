@@ -0,0 +1,239 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q, prefetch_related_objects
+from django.utils.text import slugify
+from django.utils.timezone import now
+from django_filters.filterset import filterset_factory
+from rest_framework.exceptions import ValidationError
+
+from .ingest import IngestResult
+from .models import Article, Category
+from .serializers import ArticleIngestSerializer
+from .signals import articles_bulk_saved
+
+BULK_UPDATE_MAX = getattr(settings, 'NEWS_BULK_UPDATE_MAX', 1000)
+
+# The filters of the article list endpoint
+ArticleFilterSet = filterset_factory(Article, fields=['category', 'is_published', 'tag', 'slug'])
+
+
+def validate_changes(changes):
+    """Validated partial article fields, with ``category`` as ``category_id``."""
+    if not isinstance(changes, dict):
+        return None, {'non_field_errors': ["Expected a JSON object"]}
+    if not changes:
+        # Would only bump updated_at and invalidate caches
+        return None, {'non_field_errors': ["No fields to change."]}
+    serializer = ArticleIngestSerializer(data=changes, partial=True)
+    unknown = set(changes) - set(serializer.fields)
+    if unknown:
+        return None, {name: ["Unknown or read-only field."] for name in sorted(unknown)}
+    if not serializer.is_valid():
+        return None, serializer.errors
+    data = dict(serializer.validated_data)
+    if 'category' in data:
+        data['category_id'] = data.pop('category')
+    return data, None
+
+
+def unknown_categories(changes):
+    category_ids = {data['category_id'] for data in changes if data.get('category_id') is not None}
+    if not category_ids:
+        return set()
+    return category_ids - set(Category.objects.filter(id__in=category_ids).values_list('id', flat=True))
+
+
+def category_error(category_id):
+    return {'category': [f"Invalid pk \"{category_id}\" - object does not exist."]}
+
+
+def filtered_articles(filters):
+    """
+    Articles matching the list filters in ``filters``. Unlike the list
+    endpoint, unknown keys and values that do not parse are errors: a
+    filter that silently falls away would update every article.
+    """
+    errors = {name: ["Unknown filter."] for name in sorted(set(filters) - set(ArticleFilterSet.base_filters))}
+    if errors:
+        raise ValidationError({'filter': errors})
+    filterset = ArticleFilterSet(data=filters, queryset=Article.objects.all())
+    if not filterset.is_valid():
+        raise ValidationError({'filter': filterset.errors})
+    # Blank and unparsable values (``"maybe"`` for a boolean) clean to None or ""
+    errors = {
+        name: ["Enter a valid value."] for name in filters if filterset.form.cleaned_data.get(name) in (None, '')
+    }
+    if errors:
+        raise ValidationError({'filter': errors})
+    return filterset.qs
+
+
+def update_articles(queryset, changes, ids=None, result=None):
+    """
+    Applies the same ``changes`` to every article of ``queryset`` with one
+    ``UPDATE`` (plus one setting ``published_at`` of newly published rows).
+    With ``ids`` (the ids ``queryset`` selects, in request order) results
+    follow that order (repeated ids reported once) and missing ids are
+    reported; otherwise they follow the matched rows. Titles are unique, so
+    they can only change per item.
+    """
+    result = result or IngestResult()
+    data, errors = validate_changes(changes)
+    if errors is None and 'title' in data:
+        errors = {'title': ["Titles are unique; change them per article with 'items'."]}
+    if errors is None and unknown_categories([data]):
+        errors = category_error(data['category_id'])
+    if errors is not None:
+        raise ValidationError({'changes': errors})
+
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update().order_by('pk').values('id', 'is_published', 'category_id')[:BULK_UPDATE_MAX + 1]
+        )
+        if len(rows) > BULK_UPDATE_MAX:
+            raise ValidationError({'non_field_errors': [f"Matches more than {BULK_UPDATE_MAX} articles."]})
+        previously_published = {row['id']: row['is_published'] for row in rows}
+        found = list(previously_published)
+
+        timestamp = now()
+        Article.objects.filter(pk__in=found).update(**data, updated_at=timestamp)
+        # Same derivation as Article.save, which UPDATE skips
+        if data.get('is_published') is not False:
+            Article.objects.filter(pk__in=found, is_published=True, published_at__isnull=True).update(
+                published_at=timestamp
+            )
+        articles = list(Article.objects.select_related('category').filter(pk__in=found))
+        # Loaded after the UPDATE; receivers need the categories they left
+        previous_categories = {row['id']: row['category_id'] for row in rows}
+        for article in articles:
+            article._loaded_category_id = previous_categories[article.pk]
+        articles_bulk_saved.send(
+            sender=Article, articles=articles,
+            fields=set(data) | {'updated_at', 'published_at'}, previously_published=previously_published,
+        )
+
+    by_id = {article.pk: article for article in articles}
+    reported = set()
+    for index, pk in enumerate(ids if ids is not None else found):
+        if pk in reported:
+            continue
+        reported.add(pk)
+        if pk in by_id:
+            result.ok(index, 'updated', by_id[pk])
+        else:
+            result.error(index, {'id': [f"Invalid pk \"{pk}\" - object does not exist."]})
+    return result
+
+
+def update_article_items(items, result=None):
+    """
+    Applies per-article changes (``[{"id": 1, "title": ...}, ...]``) with
+    one ``bulk_update``. Changed titles regenerate slugs as ``Article.save``
+    does; title uniqueness and categories are checked set-based. Invalid
+    items are reported and skipped, and so are repeats of an item; two
+    different items for one id are an error.
+    """
+    result = result or IngestResult()
+    valid, seen = {}, {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            result.error(index, {'non_field_errors': ["Expected a JSON object"]})
+            continue
+        pk = item.get('id')
+        if not isinstance(pk, int) or isinstance(pk, bool):
+            result.error(index, {'id': ["A valid integer is required."]})
+            continue
+        if pk in seen:
+            if item != seen[pk]:
+                result.error(index, {'id': ["Duplicate id in this batch"]})
+            continue
+        seen[pk] = item
+        data, errors = validate_changes({name: value for name, value in item.items() if name != 'id'})
+        if errors is not None:
+            result.error(index, errors)
+            continue
+        valid[pk] = (index, data)
+
+    missing_categories = unknown_categories(data for _, data in valid.values())
+    for pk, (index, data) in list(valid.items()):
+        if data.get('category_id') in missing_categories:
+            result.error(index, category_error(data['category_id']))
+            del valid[pk]
+
+    # New slugs, which must be unique within the batch as well
+    renamed = {}
+    for pk, (index, data) in list(valid.items()):
+        if data.get('title'):
+            slug = slugify(data['title'])
+            if slug in renamed.values():
+                result.error(index, {'title': ["Duplicate title in this batch"]})
+                del valid[pk]
+                continue
+            renamed[pk] = slug
+    if not valid:
+        return result
+
+    try:
+        with transaction.atomic():
+            saved, rejected = _write_items(valid, renamed)
+    except IntegrityError as exc:
+        # A concurrent writer took one of the titles/slugs after our check
+        for index, _ in valid.values():
+            result.error(index, {'non_field_errors': [f"Batch rejected by the database: {exc}"]})
+        return result
+
+    for index, errors in rejected:
+        result.error(index, errors)
+    for index, article in saved:
+        result.ok(index, 'updated', article)
+    return result
+
+
+def _write_items(valid, renamed):
+    articles = Article.objects.select_for_update().in_bulk(list(valid))
+    taken_titles, taken_slugs = set(), set()
+    if renamed:
+        titles = [valid[pk][1]['title'] for pk in renamed]
+        # Articles renamed in this batch give up their titles
+        conflicts = (
+            Article.objects.filter(Q(title__in=titles) | Q(slug__in=renamed.values()))
+            .exclude(pk__in=list(renamed))
+            .values_list('title', 'slug')
+        )
+        for title, slug in conflicts:
+            taken_titles.add(title)
+            taken_slugs.add(slug)
+
+    saved, rejected, fields, previously_published = [], [], {'updated_at'}, {}
+    timestamp = now()
+    for pk, (index, data) in valid.items():
+        article = articles.get(pk)
+        if article is None:
+            rejected.append((index, {'id': [f"Invalid pk \"{pk}\" - object does not exist."]}))
+            continue
+        if pk in renamed and (data['title'] in taken_titles or renamed[pk] in taken_slugs):
+            rejected.append((index, {'title': ["article with this title already exists."]}))
+            continue
+
+        previously_published[pk] = article.is_published
+        for field, value in data.items():
+            setattr(article, field, value)
+        fields.update(data)
+        # Same derivations as Article.save, which bulk writes skip
+        if article.title and article.slug != slugify(article.title):
+            article.slug = slugify(article.title)
+            fields.add('slug')
+        if article.is_published and not article.published_at:
+            article.published_at = timestamp
+            fields.add('published_at')
+        article.updated_at = timestamp
+        saved.append((index, article))
+
+    if saved:
+        articles = [article for _, article in saved]
+        Article.objects.bulk_update(articles, sorted(fields))
+        prefetch_related_objects(articles, 'category')
+        articles_bulk_saved.send(
+            sender=Article, articles=articles, fields=fields, previously_published=previously_published,
+        )
+    return saved, rejected
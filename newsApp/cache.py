@@ -0,0 +1,233 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .routers import replica_may_lag
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'NEWS_RESPONSE_CACHE_TIMEOUT', 300)
+
+GENERATION_KEY = 'news:gen:{}'
+LAST_MODIFIED_KEY = 'news:lm:{}'
+RESPONSE_KEY = 'news:resp:{}'
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def generation_seed():
+    """
+    First value of a generation counter: the time in milliseconds. A
+    counter evicted from the cache restarts above any value it reached
+    (unless it averaged more than one bump per millisecond), so responses
+    cached under old generations are never served again.
+    """
+    return int(time.time() * 1000)
+
+
+def get_generation(model):
+    """
+    Current generation counter of a model. Starts at ``generation_seed()``
+    and is bumped on every write, so any key built from it goes stale
+    automatically.
+    """
+    key = GENERATION_KEY.format(_label(model))
+    generation = cache.get(key)
+    if generation is None:
+        seed = generation_seed()
+        cache.add(key, seed, timeout=None)
+        cache.add(LAST_MODIFIED_KEY.format(_label(model)), int(time.time()), timeout=None)
+        generation = cache.get(key, seed)
+    return generation
+
+
+async def aget_generation(model):
+    key = GENERATION_KEY.format(_label(model))
+    generation = await cache.aget(key)
+    if generation is None:
+        seed = generation_seed()
+        await cache.aadd(key, seed, timeout=None)
+        await cache.aadd(LAST_MODIFIED_KEY.format(_label(model)), int(time.time()), timeout=None)
+        generation = await cache.aget(key, seed)
+    return generation
+
+
+def _state_keys(models):
+    return [
+        key.format(_label(model)) for model in models for key in (GENERATION_KEY, LAST_MODIFIED_KEY)
+    ]
+
+
+def _unpack_state(models, stored):
+    generations = [stored.get(GENERATION_KEY.format(_label(model))) or generation_seed() for model in models]
+    last_modified = max(
+        (stored.get(LAST_MODIFIED_KEY.format(_label(model))) or int(time.time()) for model in models),
+        default=None,
+    )
+    return generations, last_modified
+
+
+def get_cache_state(models):
+    """
+    ``(generations, last modified)`` of ``models`` in one cache round trip;
+    counters missing from the cache are started first.
+    """
+    keys = _state_keys(models)
+    stored = cache.get_many(keys)
+    if len(stored) < len(keys):
+        for model in models:
+            get_generation(model)
+        stored = cache.get_many(keys)
+    return _unpack_state(models, stored)
+
+
+async def aget_cache_state(models):
+    keys = _state_keys(models)
+    stored = await cache.aget_many(keys)
+    if len(stored) < len(keys):
+        for model in models:
+            await aget_generation(model)
+        stored = await cache.aget_many(keys)
+    return _unpack_state(models, stored)
+
+
+def bump_generation(model):
+    key = GENERATION_KEY.format(_label(model))
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, generation_seed(), timeout=None)
+    cache.set(LAST_MODIFIED_KEY.format(_label(model)), int(time.time()), timeout=None)
+
+
+def bump_generation_on_commit(model):
+    # Bumping before commit would let a concurrent reader cache the old rows
+    # under the new generation.
+    transaction.on_commit(lambda: bump_generation(model))
+
+
+def normalized_query(request):
+    items = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        for value in values
+        if value != ''
+    )
+    return urlencode(items)
+
+
+class CachedResponseMixin:
+    """
+    Caches rendered GET responses of anonymous requests and answers
+    conditional GETs with 304 before the view (and the ORM) runs.
+
+    Entries are keyed on path, normalized query params, accepted media type
+    and the generation of every model in ``cache_models``.
+    """
+    cache_models = ()
+    cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    def is_response_cacheable(self, request):
+        return request.method == 'GET' and 'HTTP_AUTHORIZATION' not in request.META
+
+    def get_response_cache_key(self, request, generations):
+        generations = ':'.join(
+            f'{_label(model)}={generation}' for model, generation in zip(self.cache_models, generations)
+        )
+        raw = '|'.join([
+            request.path,
+            normalized_query(request),
+            request.META.get('HTTP_ACCEPT', ''),
+            generations,
+        ])
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_response_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self._adispatch(request, *args, **kwargs)
+
+        validators = self._validators(request, *get_cache_state(self.cache_models))
+        response = self._not_modified_response(request, *validators)
+        if response is None:
+            response = self._cached_response(cache.get(RESPONSE_KEY.format(validators[0])), *validators)
+        if response is not None:
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        entry = self._prepare_response(response, *validators)
+        if entry is not None:
+            cache.set(RESPONSE_KEY.format(validators[0]), entry, self.cache_timeout)
+        return response
+
+    async def _adispatch(self, request, *args, **kwargs):
+        # The same steps with the cache's async API, so no call blocks the event loop
+        validators = self._validators(request, *await aget_cache_state(self.cache_models))
+        response = self._not_modified_response(request, *validators)
+        if response is None:
+            response = self._cached_response(await cache.aget(RESPONSE_KEY.format(validators[0])), *validators)
+        if response is not None:
+            return response
+
+        response = await super().dispatch(request, *args, **kwargs)
+        entry = self._prepare_response(response, *validators)
+        if entry is not None:
+            await cache.aset(RESPONSE_KEY.format(validators[0]), entry, self.cache_timeout)
+        return response
+
+    def _validators(self, request, generations, last_modified):
+        key = self.get_response_cache_key(request, generations)
+        return key, quote_etag(key), last_modified
+
+    def _not_modified_response(self, request, key, etag, last_modified):
+        if not self._not_modified(request, etag, last_modified):
+            return None
+        response = HttpResponseNotModified()
+        self._set_validators(response, etag, last_modified)
+        return response
+
+    def _cached_response(self, cached, key, etag, last_modified):
+        if cached is None:
+            return None
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response['X-Cache'] = 'HIT'
+        self._set_validators(response, etag, last_modified)
+        return response
+
+    def _prepare_response(self, response, key, etag, last_modified):
+        """Finishes a rendered response; returns the entry to cache, if any."""
+        if response.status_code != 200 or response.streaming:
+            return None
+        if hasattr(response, 'render'):
+            response.render()
+        response['X-Cache'] = 'MISS'
+        self._set_validators(response, etag, last_modified)
+        # A replica that has not replayed the write would pin old rows
+        # under the new generation
+        if last_modified and replica_may_lag(last_modified):
+            return None
+        return response.content, response['Content-Type']
+
+    def _not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return if_none_match.strip() == '*' or etag in [
+                tag.strip() for tag in if_none_match.split(',')
+            ]
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return bool(if_modified_since and last_modified and last_modified <= if_modified_since)
+
+    def _set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connections
+from django.db.models import Count, Q
+
+logger = logging.getLogger("app")
+
+COUNT_CACHE_TIMEOUT = getattr(settings, 'NEWS_COUNT_CACHE_TIMEOUT', 60)
+ESTIMATE_THRESHOLD = getattr(settings, 'NEWS_ESTIMATED_COUNT_THRESHOLD', 10000)
+
+COUNTS_KEY = 'news:counts:{}'
+# Counts older than COUNT_CACHE_TIMEOUT are still served, while a refresh
+# runs, for this many times as long
+COUNT_STALE_FACTOR = 10
+
+_refresh_executor = None
+_refresh_lock = threading.Lock()
+_refreshing = set()
+
+
+COUNT_AGGREGATES = {
+    'total': Count('pk'),
+    'published': Count('pk', filter=Q(is_published=True)),
+    'draft': Count('pk', filter=Q(is_published=False)),
+}
+
+
+def exact_counts(queryset):
+    """
+    Total, published and draft counts of ``queryset`` in a single
+    conditional-aggregation query.
+    """
+    return queryset.aggregate(**COUNT_AGGREGATES)
+
+
+async def aexact_counts(queryset):
+    return await queryset.aaggregate(**COUNT_AGGREGATES)
+
+
+def estimated_table_rows(model, using='default'):
+    """
+    Row estimate from the table statistics, or None where the backend does
+    not keep any we can read cheaply.
+    """
+    connection = connections[using]
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def _is_unfiltered(queryset):
+    return not queryset.query.where
+
+
+def _counts_key(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    return COUNTS_KEY.format(hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest())
+
+
+def store_counts(key, counts):
+    cache.set(key, {'counts': counts, 'at': time.time()}, COUNT_CACHE_TIMEOUT * COUNT_STALE_FACTOR)
+
+
+def refresh_counts(queryset, key):
+    """Runs the exact aggregate of ``queryset`` into the cache entry ``key``."""
+    counts = exact_counts(queryset)
+    store_counts(key, counts)
+    return counts
+
+
+def _refresh_in_background(queryset, key):
+    close_old_connections()
+    try:
+        refresh_counts(queryset, key)
+    except Exception:
+        logger.exception(
+            "Count refresh failed",
+            extra={"view": None, "method": None, "path": None, "status_code": None},
+        )
+    finally:
+        close_old_connections()
+        with _refresh_lock:
+            _refreshing.discard(key)
+
+
+def refresh_counts_async(queryset, key):
+    """Refreshes ``key`` off the request path, once at a time per key in this process."""
+    global _refresh_executor
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='count-refresh')
+    # The database this request reads from, not the router's pick in another thread
+    _refresh_executor.submit(_refresh_in_background, queryset.using(queryset.db), key)
+
+
+def get_counts(queryset, estimated=False):
+    """
+    Returns ``(counts, approximate)``.
+
+    In estimated mode the exact aggregate of unfiltered or large result
+    sets is cached, and recomputed in the background once older than
+    ``NEWS_COUNT_CACHE_TIMEOUT`` seconds rather than on a request. The
+    total of an unfiltered table comes from the table statistics, with the
+    published/draft split scaled to it; on a cold cache the split is None
+    until the background aggregate lands. Without statistics to read, a
+    cold cache still runs the aggregate in the request.
+    """
+    if not estimated:
+        return exact_counts(queryset), False
+
+    key = _counts_key(queryset)
+    unfiltered = _is_unfiltered(queryset)
+    entry = cache.get(key)
+    if entry is None:
+        total = estimated_table_rows(queryset.model, queryset.db) if unfiltered else None
+        if total is not None:
+            refresh_counts_async(queryset, key)
+            return {'total': total, 'published': None, 'draft': None}, True
+        counts = exact_counts(queryset)
+        if unfiltered or counts['total'] >= ESTIMATE_THRESHOLD:
+            store_counts(key, counts)
+        return counts, False
+
+    if time.time() - entry['at'] >= COUNT_CACHE_TIMEOUT:
+        refresh_counts_async(queryset, key)
+    counts = entry['counts']
+    if unfiltered:
+        total = estimated_table_rows(queryset.model, queryset.db)
+        if total is not None and counts['total']:
+            published = round(total * counts['published'] / counts['total'])
+            counts = {'total': total, 'published': published, 'draft': total - published}
+    return counts, True
+
+
+def wants_estimated_counts(request):
+    value = request.query_params.get('counts')
+    if value:
+        return value == 'estimated'
+    return getattr(settings, 'NEWS_ESTIMATED_COUNTS', False)
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import threading
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Article
+from .serializers import ARTICLE_COMPACT_FIELDS, ArticleSerializer
+
+EVENT_BACKLOG = getattr(settings, 'NEWS_EVENT_BACKLOG', 1000)
+EVENT_HEARTBEAT = getattr(settings, 'NEWS_EVENT_HEARTBEAT', 15)
+
+ARTICLE_PUBLISHED = 'article.published'
+ARTICLE_UPDATED = 'article.updated'
+ARTICLE_REMOVED = 'article.removed'
+# Sent when Last-Event-ID is older than the backlog: clients should refetch
+STREAM_RESET = 'stream.reset'
+
+
+class Event:
+    __slots__ = ('id', 'type', 'tag', 'category', 'data')
+
+    def __init__(self, id, type, tag, category, data):
+        self.id = id
+        self.type = type
+        self.tag = tag
+        self.category = category
+        self.data = data
+
+    def encode(self, epoch):
+        payload = json.dumps({'type': self.type, **self.data}, ensure_ascii=False, separators=(',', ':'))
+        return f"id: {epoch}-{self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class BaseEventBroker:
+    """
+    Fan-out of article events to the SSE stream. Events get increasing
+    sequence numbers within an ``epoch``; clients resume from
+    ``<epoch>-<sequence>``.
+    """
+    epoch = '0'
+
+    def publish(self, type, tag, category, data):
+        raise NotImplementedError
+
+    def since(self, sequence):
+        """``(events, complete)``: events after ``sequence``, and whether none were dropped."""
+        raise NotImplementedError
+
+    def last_sequence(self):
+        raise NotImplementedError
+
+    def waiter(self):
+        """Future of the running loop that resolves on the next publish."""
+        raise NotImplementedError
+
+
+class InMemoryEventBroker(BaseEventBroker):
+    """
+    Single-process broker: a bounded backlog plus one future per event loop.
+    A publish wakes every connection on a loop by resolving that loop's
+    future, so idle connections cost nothing between events and a publish
+    does the same work for ten or ten thousand subscribers. Enough for tests
+    and one ASGI process; several processes need a shared broker.
+    """
+
+    def __init__(self, backlog=None):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=backlog or EVENT_BACKLOG)
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._waiters = {}
+
+    def publish(self, type, tag, category, data):
+        with self._lock:
+            self._sequence += 1
+            event = Event(self._sequence, type, tag, category, data)
+            self._events.append(event)
+            loops = list(self._waiters)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._wake, loop)
+            except RuntimeError:
+                # Loop closed
+                with self._lock:
+                    self._waiters.pop(loop, None)
+        return event
+
+    def _wake(self, loop):
+        with self._lock:
+            future = self._waiters.pop(loop, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def since(self, sequence):
+        with self._lock:
+            events = [event for event in self._events if event.id > sequence]
+            oldest = self._events[0].id if self._events else self._sequence + 1
+        return events, sequence >= oldest - 1
+
+    def last_sequence(self):
+        return self._sequence
+
+    def waiter(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._waiters.get(loop)
+            if future is None or future.done():
+                future = self._waiters[loop] = loop.create_future()
+        return future
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_event_broker():
+    """Broker named by ``NEWS_EVENT_BROKER``, or the in-process one."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'NEWS_EVENT_BROKER', None)
+                _broker = import_string(path)() if path else InMemoryEventBroker()
+    return _broker
+
+
+def was_published(article):
+    """
+    Whether the stored row is published: as the article was loaded or last
+    saved, with a query only for instances built with a primary key.
+    """
+    if article.pk is None:
+        return False
+    loaded = getattr(article, '_loaded_is_published', None)
+    if loaded is not None:
+        return loaded
+    return Article.objects.filter(pk=article.pk, is_published=True).exists()
+
+
+def article_event_type(article, previously_published, deleted=False):
+    """Event for a write, or None for drafts that never reached readers."""
+    if deleted or not article.is_published:
+        return ARTICLE_REMOVED if previously_published else None
+    return ARTICLE_UPDATED if previously_published else ARTICLE_PUBLISHED
+
+
+def publish_article_event(article, type):
+    if type == ARTICLE_REMOVED:
+        data = {'id': article.pk}
+    else:
+        data = {'article': ArticleSerializer(fields=ARTICLE_COMPACT_FIELDS).to_representation(article)}
+    get_event_broker().publish(type, article.tag, article.category_id, data)
+
+
+def publish_article_event_on_commit(article, type):
+    if type is not None:
+        transaction.on_commit(lambda: publish_article_event(article, type))
+
+
+def parse_last_event_id(value, epoch):
+    """Sequence to resume after, or None to start from now (unknown epoch)."""
+    if not value:
+        return None
+    event_epoch, _, sequence = value.partition('-')
+    if event_epoch != epoch or not sequence.isdigit():
+        return None
+    return int(sequence)
+
+
+async def event_stream(broker, sequence, matches, replay_lost=False, heartbeat=None):
+    """
+    Server-Sent Events for ``matches(event)`` after ``sequence``; a comment
+    every ``heartbeat`` seconds keeps idle proxies from closing the stream.
+    """
+    heartbeat = heartbeat or EVENT_HEARTBEAT
+    epoch = broker.epoch
+    yield f"retry: {heartbeat * 1000}\n\n"
+    if replay_lost:
+        yield Event(sequence, STREAM_RESET, None, None, {}).encode(epoch)
+
+    while True:
+        waiter = broker.waiter()
+        events, complete = broker.since(sequence)
+        if not complete:
+            # Resuming from the reset itself must not report the gap again
+            resumed = events[0].id - 1 if events else broker.last_sequence()
+            yield Event(resumed, STREAM_RESET, None, None, {}).encode(epoch)
+            sequence = resumed
+        if events:
+            for event in events:
+                if matches(event):
+                    yield event.encode(epoch)
+            sequence = events[-1].id
+            continue
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), heartbeat)
+        except asyncio.TimeoutError:
+            yield ": keepalive\n\n"
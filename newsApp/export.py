@@ -0,0 +1,101 @@
+import csv
+import json
+from datetime import datetime, time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.throttling import UserRateThrottle
+from rest_framework.utils.encoders import JSONEncoder
+
+from .serializers import ArticleSerializer
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_THROTTLE_RATE = getattr(settings, 'NEWS_EXPORT_THROTTLE_RATE', '10/hour')
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def parse_updated_since(value):
+    """
+    Accepts an ISO 8601 datetime or date; naive values are read in the
+    current time zone. Returns None for values that cannot be parsed.
+    """
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            parsed = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def iter_articles(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Walks ``queryset`` in primary-key order, one keyset batch at a time.
+
+    Unlike a plain ``iterator()``, each batch is a separate bounded query, so
+    memory stays flat even with drivers that buffer whole result sets.
+    """
+    queryset = queryset.select_related('category').order_by('pk')
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(batch[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        last_pk = rows[-1].pk
+
+
+def iter_records(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    serializer = ArticleSerializer()
+    for article in iter_articles(queryset, chunk_size):
+        yield serializer.to_representation(article)
+
+
+def iter_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for record in iter_records(queryset, chunk_size):
+        yield encoder.encode(record) + '\n'
+
+
+class ExportRateThrottle(UserRateThrottle):
+    """Exports per user, or per IP when anonymous; staff are not limited."""
+    scope = 'export'
+    rate = EXPORT_THROTTLE_RATE
+
+    def allow_request(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        return super().allow_request(request, view)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    fields = ArticleSerializer.Meta.fields
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for record in iter_records(queryset, chunk_size):
+        yield writer.writerow([
+            json.dumps(record[field]) if isinstance(record[field], (list, dict)) else record[field]
+            for field in fields
+        ])
+
+
+EXPORTERS = {
+    'ndjson': iter_ndjson,
+    'csv': iter_csv,
+}
@@ -0,0 +1,352 @@
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.db import transaction
+
+from .counts import get_counts, wants_estimated_counts
+from .models import Article, Category
+from .pagination import CountedPaginator
+from .routers import primary_reads
+from .serializers import ARTICLE_COMPACT_DEFERRED_FIELDS, ARTICLE_COMPACT_FIELDS, ArticleSerializer
+
+HOT_FEED_SIZE = getattr(settings, 'NEWS_HOT_FEED_SIZE', 200)
+HOT_FEED_TIMEOUT = getattr(settings, 'NEWS_HOT_FEED_TIMEOUT', 300)
+
+FEED_KEY = 'news:feed:{}:{}'
+FEED_LOCK_KEY = 'news:feed:lock'
+# Seconds a crashed holder can keep the feed lock
+FEED_LOCK_TIMEOUT = 5
+# Token of a lock holder that may be storing feeds older than a write
+FEED_STALE_KEY = 'news:feed:stale'
+
+TAGS = [tag for tag, _ in Article.TagChoices.choices]
+
+# Query parameters a feed response can honour besides the feed's own filters
+FEED_PARAMS = {'page', 'page_size', 'view', 'fields', 'pagination', 'cursor', 'counts', 'ordering'}
+
+
+class FeedItem:
+    """Compact representation of one article plus what ordering needs."""
+    __slots__ = ('pk', 'updated_at', 'is_published', 'data')
+
+    def __init__(self, pk, updated_at, is_published, data):
+        self.pk = pk
+        self.updated_at = updated_at
+        self.is_published = is_published
+        self.data = data
+
+    @property
+    def sort_key(self):
+        return (self.updated_at, self.pk)
+
+    @classmethod
+    def from_article(cls, article, serializer):
+        return cls(article.pk, article.updated_at, article.is_published, serializer.to_representation(article))
+
+
+class HotFeed:
+    """
+    Ring buffer of the newest articles (published or not) of one tag or
+    category, newest first by ``(updated_at, id)``.
+
+    Invariant: ``items`` are exactly the newest ``len(items)`` articles of
+    the group, and ``complete`` means there are no others. Removing an item
+    keeps it; inserting only accepts articles newer than the oldest item
+    unless the feed is complete.
+    """
+
+    def __init__(self, items, complete, exists, capacity):
+        self.items = items
+        self.complete = complete
+        self.exists = exists
+        self.capacity = capacity
+
+    def rows(self, published=None):
+        if published is None:
+            return self.items
+        return [item for item in self.items if item.is_published == published]
+
+    def remove(self, ids):
+        kept = [item for item in self.items if item.pk not in ids]
+        changed = len(kept) != len(self.items)
+        self.items = kept
+        return changed
+
+    def insert(self, item):
+        position = next(
+            (index for index, existing in enumerate(self.items) if existing.sort_key < item.sort_key),
+            len(self.items),
+        )
+        if position == len(self.items) and not self.complete:
+            return False
+        self.items.insert(position, item)
+        self.exists = True
+        if len(self.items) > self.capacity:
+            self.items.pop()
+            self.complete = False
+        return True
+
+
+def feed_key(group, value):
+    return FEED_KEY.format(group, value)
+
+
+def compact_queryset():
+    return Article.objects.select_related('category').defer(*ARTICLE_COMPACT_DEFERRED_FIELDS)
+
+
+def build_feed(group, value, capacity=None):
+    capacity = capacity or HOT_FEED_SIZE
+    rows = list(compact_queryset().filter(**{group: value}).order_by('-updated_at', '-id')[:capacity + 1])
+    serializer = ArticleSerializer(fields=ARTICLE_COMPACT_FIELDS)
+    exists = True
+    if group == 'category' and not rows:
+        exists = Category.objects.filter(pk=value).exists()
+    return HotFeed(
+        [FeedItem.from_article(article, serializer) for article in rows[:capacity]],
+        complete=len(rows) <= capacity,
+        exists=exists,
+        capacity=capacity,
+    )
+
+
+@contextmanager
+def feed_lock():
+    """
+    Holds the lock that serializes writes to the feed store across
+    processes, yielding its token, or None when it is taken. Nobody waits
+    for it: a reader that finds it taken serves its build without storing
+    it, and a writer drops the feeds it would have updated (see
+    ``delete_feeds``).
+
+    Feeds are stored only under this lock and updated after commit, so a
+    feed built from rows read before a write is in the store before that
+    write's update runs, and gets updated too.
+    """
+    token = uuid.uuid4().hex
+    acquired = cache.add(FEED_LOCK_KEY, token, FEED_LOCK_TIMEOUT)
+    try:
+        yield token if acquired else None
+    finally:
+        if acquired and cache.get(FEED_LOCK_KEY) == token:
+            cache.delete(FEED_LOCK_KEY)
+
+
+def store_feeds(feeds, token):
+    """
+    Stores ``feeds`` (key -> feed) under the lock held with ``token``. They
+    are dropped again when a writer deleted feeds while this holder had the
+    lock, as they may hold rows it changed.
+    """
+    cache.set_many(feeds, HOT_FEED_TIMEOUT)
+    if cache.get(FEED_STALE_KEY) == token:
+        cache.delete_many(list(feeds))
+
+
+def get_feed(group, value):
+    """
+    The cached feed, built from the database on a miss. The build is only
+    stored when the lock is free; otherwise this request just uses it.
+    """
+    key = feed_key(group, value)
+    feed = cache.get(key)
+    if feed is not None:
+        return feed
+    with feed_lock() as token:
+        feed = cache.get(key) if token else None
+        if feed is None:
+            with primary_reads():
+                feed = build_feed(group, value)
+            if token:
+                store_feeds({key: feed}, token)
+    return feed
+
+
+def warm_feeds():
+    """Builds every tag and category feed; returns how many were stored."""
+    with feed_lock() as token:
+        if not token:
+            return 0
+        feeds = {feed_key('tag', tag): build_feed('tag', tag) for tag in TAGS}
+        for category_id in Category.objects.values_list('id', flat=True):
+            feeds[feed_key('category', category_id)] = build_feed('category', category_id)
+        store_feeds(feeds, token)
+    return len(feeds)
+
+
+def update_feeds(ids, category_ids=None):
+    """
+    Moves the articles in ``ids`` to their current place in every cached
+    feed: out of feeds they no longer belong to (or when deleted) and into
+    the ones of their current tag and category. Only the feeds of
+    ``category_ids`` are touched (every category's when None) besides the
+    tag feeds. Feeds that are not cached are left to be built on the next
+    read.
+    """
+    if category_ids is None:
+        category_ids = Category.objects.values_list('id', flat=True)
+    keys = [feed_key('tag', tag) for tag in TAGS]
+    keys += [feed_key('category', pk) for pk in category_ids]
+    with feed_lock() as token:
+        if not token:
+            # Rebuilding on the next read beats waiting on the writer's thread
+            delete_feeds(keys)
+            return
+        _update_feeds(keys, set(ids), token)
+
+
+def _update_feeds(keys, ids, token):
+    feeds = cache.get_many(keys)
+    if not feeds:
+        return
+
+    changed = {key for key, feed in feeds.items() if feed.remove(ids)}
+    serializer = ArticleSerializer(fields=ARTICLE_COMPACT_FIELDS)
+    for article in compact_queryset().filter(pk__in=ids):
+        item = FeedItem.from_article(article, serializer)
+        for key in (feed_key('tag', article.tag), feed_key('category', article.category_id)):
+            feed = feeds.get(key)
+            if feed is not None and feed.insert(item):
+                changed.add(key)
+    if changed:
+        store_feeds({key: feeds[key] for key in changed}, token)
+
+
+def feed_categories(articles, created=False):
+    """
+    Ids of the categories whose feeds saving ``articles`` changes: the ones
+    they were loaded with and the ones they have now, which become the
+    loaded ones for the next save. None when a previous category is unknown.
+    """
+    category_ids, known = set(), True
+    for article in articles:
+        if not created:
+            known = known and hasattr(article, '_loaded_category_id')
+            category_ids.add(getattr(article, '_loaded_category_id', None))
+        article._loaded_category_id = article.category_id
+        category_ids.add(article.category_id)
+    category_ids.discard(None)
+    return category_ids if known else None
+
+
+def update_feeds_on_commit(ids, category_ids=None):
+    ids = list(ids)
+    transaction.on_commit(lambda: update_feeds(ids, category_ids))
+
+
+def delete_feeds(keys):
+    # The current lock holder may be storing older rows; flagged first, it
+    # drops them after storing. Later holders read committed rows.
+    holder = cache.get(FEED_LOCK_KEY)
+    if holder is not None:
+        cache.set(FEED_STALE_KEY, holder, FEED_LOCK_TIMEOUT)
+    cache.delete_many(keys)
+
+
+def invalidate_category_feeds(category_id):
+    # Tag feeds show the category's name too
+    keys = [feed_key('tag', tag) for tag in TAGS] + [feed_key('category', category_id)]
+    transaction.on_commit(lambda: delete_feeds(keys))
+
+
+class HotFeedMixin:
+    """
+    Serves the first pages of a tag or category feed from the hot-feed
+    store instead of sorting the table, for compact responses (``?view=
+    compact`` or ``?fields=`` within the compact fields) with the default
+    ``-updated_at`` ordering. Anything else, and pages past what the store
+    holds, return None so the view falls back to the database.
+    """
+    # Query parameters that select the feed (filters of the list endpoint)
+    hot_feed_filters = ()
+    # Whether an unknown category is a validation error rather than an empty feed
+    hot_feed_requires_group = False
+
+    def get_hot_feed_group(self):
+        """``(group, value, published)``, or None when no feed applies."""
+        return None
+
+    def hot_feed_response(self, with_counts=False):
+        if not HOT_FEED_SIZE:
+            return None
+        params = self.request.query_params
+        if set(params) - FEED_PARAMS - set(self.hot_feed_filters):
+            return None
+        if params.get('ordering', '-updated_at') != '-updated_at':
+            return None
+        requested = self.get_requested_fields()
+        if requested is None or not set(requested) <= set(ARTICLE_COMPACT_FIELDS):
+            return None
+        selected = self.get_hot_feed_group()
+        if selected is None:
+            return None
+
+        group, value, published = selected
+        feed = get_feed(group, value)
+        if not feed.exists and self.hot_feed_requires_group:
+            return None
+        rows = feed.rows(published)
+
+        if self.uses_cursor_pagination():
+            return self.hot_feed_cursor_page(feed, rows)
+        return self.hot_feed_numbered_page(feed, rows, with_counts)
+
+    def hot_feed_data(self, items, requested):
+        requested = set(requested)
+        return [{name: value for name, value in item.data.items() if name in requested} for item in items]
+
+    def hot_feed_cursor_page(self, feed, rows):
+        paginator = self.paginator
+        paginator.prepare(self.request)
+        if paginator.field != 'updated_at' or not paginator.descending or paginator.reverse:
+            return None
+
+        start = 0
+        if paginator.cursor:
+            value, pk, _ = paginator.cursor
+            start = next((index for index, item in enumerate(rows) if item.sort_key < (value, pk)), len(rows))
+        if start + paginator.page_size + 1 > len(rows) and not feed.complete:
+            return None
+
+        page = paginator.finish_page(rows[start:start + paginator.page_size + 1])
+        return paginator.get_paginated_response(self.hot_feed_data(page, self.get_requested_fields()))
+
+    def hot_feed_numbered_page(self, feed, rows, with_counts):
+        paginator = self.paginator
+        page_size = paginator.get_page_size(self.request)
+        try:
+            number = int(self.request.query_params.get(paginator.page_query_param, 1))
+        except ValueError:
+            return None
+        if number < 1:
+            return None
+        end = number * page_size
+        if end > len(rows) and not feed.complete:
+            return None
+
+        counts, approximate = None, False
+        if feed.complete:
+            published = sum(1 for item in rows if item.is_published)
+            totals = {'total': len(rows), 'published': published, 'draft': len(rows) - published}
+        elif with_counts:
+            queryset = self.filter_queryset(self.get_queryset())
+            totals, approximate = get_counts(queryset, estimated=wants_estimated_counts(self.request))
+        else:
+            totals = {'total': self.filter_queryset(self.get_queryset()).count()}
+        if with_counts:
+            counts = {'published': totals['published'], 'draft': totals['draft']}
+
+        django_paginator = CountedPaginator([], page_size, count=totals['total'])
+        if number > django_paginator.num_pages:
+            return None
+        items = rows[end - page_size:end]
+        paginator.page = Page(items, number, django_paginator)
+        paginator.request = self.request
+
+        data = self.hot_feed_data(items, self.get_requested_fields())
+        if with_counts:
+            return paginator.get_paginated_response(data, counts=counts, approximate=approximate)
+        return paginator.get_paginated_response(data)
@@ -0,0 +1,71 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsetMixin:
+    """
+    List-view side of sparse fieldsets.
+
+    ``?fields=a,b`` (or ``?view=compact`` for ``compact_fields``) limits the
+    rendered fields, and the queryset loads only the columns those fields
+    read. Related fields such as ``category_name`` are joined once with
+    ``select_related`` instead of one query per row.
+    """
+    fields_query_param = 'fields'
+    compact_fields = None
+    # Columns that pagination, ordering and counts read from every row
+    always_loaded_fields = ('id',)
+
+    def get_requested_fields(self):
+        if self.request.method != 'GET':
+            return None
+        params = self.request.query_params
+        if params.get('view') == 'compact' and self.compact_fields:
+            return list(self.compact_fields)
+        raw = params.get(self.fields_query_param)
+        if not raw:
+            return None
+
+        requested = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = set(requested) - set(self.get_serializer_class()().fields)
+        if unknown:
+            raise ValidationError({
+                self.fields_query_param: f"Unknown field(s): {', '.join(sorted(unknown))}"
+            })
+        return requested
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_loaded_fields(self):
+        return set(self.always_loaded_fields)
+
+    def project_queryset(self, queryset):
+        requested = self.get_requested_fields()
+        model = queryset.model
+        related, columns = set(), self.get_loaded_fields()
+
+        for name, field in self.get_serializer_class()().fields.items():
+            if requested is not None and name not in requested:
+                continue
+            if field.source == '*':
+                return queryset
+            parts = field.source.split('.')
+            try:
+                model_field = model._meta.get_field(parts[0])
+            except FieldDoesNotExist:
+                continue
+            if len(parts) > 1 and model_field.is_relation:
+                related.add(parts[0])
+                columns.add('__'.join(parts))
+            elif not model_field.many_to_many:
+                columns.add(parts[0])
+
+        if related:
+            queryset = queryset.select_related(*related)
+        if requested is not None:
+            queryset = queryset.only(*columns)
+        return queryset
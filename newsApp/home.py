@@ -0,0 +1,199 @@
+import uuid
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils.timezone import now
+
+from .models import Article
+from .routers import primary_reads
+from .serializers import ARTICLE_COMPACT_DEFERRED_FIELDS, ARTICLE_COMPACT_FIELDS, ArticleSerializer
+
+HOME_ITEMS = getattr(settings, 'NEWS_HOME_ITEMS', 6)
+HOME_CATEGORIES = getattr(settings, 'NEWS_HOME_CATEGORIES', 12)
+HOME_SNAPSHOT_TIMEOUT = getattr(settings, 'NEWS_HOME_SNAPSHOT_TIMEOUT', 300)
+
+HOME_KEY = 'news:home'
+HOME_LOCK_KEY = 'news:home:lock'
+HOME_DIRTY_KEY = 'news:home:dirty'
+# Longest a crashed rebuild can hold the lock
+HOME_LOCK_TIMEOUT = 30
+
+
+def top_per_group(queryset, group, limit):
+    """
+    The newest ``limit`` articles of every ``group`` value in one query,
+    ranked with ROW_NUMBER() so the database does the per-group cut.
+    """
+    return (
+        queryset
+        .filter(**{f'{group}__isnull': False})
+        .select_related('category')
+        .defer(*ARTICLE_COMPACT_DEFERRED_FIELDS)
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=F(group),
+            order_by=[F('updated_at').desc(), F('id').desc()],
+        ))
+        .filter(rank__lte=limit)
+        .order_by(group, 'rank')
+    )
+
+
+def build_home_snapshot(limit=HOME_ITEMS, max_categories=HOME_CATEGORIES):
+    """
+    Top ``limit`` published articles per tag and per category, in two
+    queries regardless of how many tags and categories exist. Category
+    strips are ordered by their newest article.
+
+    Returns the snapshot and its cutoff: the oldest ``updated_at`` shown
+    when every group is full, below which no article can get in (None when
+    some group still has room).
+    """
+    published = Article.objects.filter(is_published=True)
+    serializer = ArticleSerializer(fields=ARTICLE_COMPACT_FIELDS)
+
+    labels = dict(Article.TagChoices.choices)
+    by_tag = {tag: [] for tag in labels}
+    oldest = {}
+    for article in top_per_group(published, 'tag', limit):
+        by_tag.setdefault(article.tag, []).append(serializer.to_representation(article))
+        oldest[('tag', article.tag)] = article.updated_at
+
+    strips, newest = {}, {}
+    for article in top_per_group(published, 'category', limit):
+        strip = strips.get(article.category_id)
+        if strip is None:
+            strip = strips[article.category_id] = {
+                'id': article.category_id,
+                'name': article.category.name,
+                'slug': article.category.slug,
+                'articles': [],
+            }
+            # Rows come rank 1 first, so this is the strip's newest article
+            newest[article.category_id] = (article.updated_at, article.pk)
+        strip['articles'].append(serializer.to_representation(article))
+        oldest[('category', article.category_id)] = article.updated_at
+    categories = sorted(strips.values(), key=lambda strip: newest[strip['id']], reverse=True)
+    categories = categories[:max_categories]
+
+    full = (
+        all(len(articles) == limit for articles in by_tag.values())
+        and len(categories) == max_categories
+        and all(len(strip['articles']) == limit for strip in categories)
+    )
+    # Hidden categories' newest articles are older than the last strip's
+    # newest, so the shown groups alone bound what can get in.
+    cutoff = None
+    if full:
+        cutoff = min(
+            [oldest[('tag', tag)] for tag in by_tag]
+            + [oldest[('category', strip['id'])] for strip in categories]
+        )
+
+    snapshot = {
+        'generated_at': now().isoformat(),
+        'tags': [
+            {'tag': tag, 'label': labels.get(tag, tag), 'articles': articles}
+            for tag, articles in by_tag.items()
+        ],
+        'categories': categories,
+    }
+    return snapshot, cutoff
+
+
+def snapshot_ids(snapshot):
+    return {
+        'articles': {
+            article['id']
+            for group in snapshot['tags'] + snapshot['categories']
+            for article in group['articles']
+        },
+        'categories': {strip['id'] for strip in snapshot['categories']},
+    }
+
+
+def store_home_snapshot():
+    with primary_reads():
+        snapshot, cutoff = build_home_snapshot()
+    cache.set(
+        HOME_KEY, {'data': snapshot, 'ids': snapshot_ids(snapshot), 'cutoff': cutoff}, HOME_SNAPSHOT_TIMEOUT,
+    )
+    return snapshot
+
+
+def rebuild_home_snapshot():
+    """
+    Rebuilds the stored snapshot, one process at a time. A rebuild asked
+    for while another runs only marks the snapshot dirty: the running one
+    then builds once more, so a burst of writes costs two rebuilds rather
+    than one per writer. Returns the snapshot, or None when another
+    process is rebuilding.
+    """
+    cache.set(HOME_DIRTY_KEY, True, HOME_LOCK_TIMEOUT)
+    token = uuid.uuid4().hex
+    snapshot = None
+    # Checked again after every release: a writer that marked the snapshot
+    # dirty just before it may have found the lock still held.
+    while cache.get(HOME_DIRTY_KEY) and cache.add(HOME_LOCK_KEY, token, HOME_LOCK_TIMEOUT):
+        try:
+            cache.delete(HOME_DIRTY_KEY)
+            snapshot = store_home_snapshot()
+        finally:
+            if cache.get(HOME_LOCK_KEY) == token:
+                cache.delete(HOME_LOCK_KEY)
+    return snapshot
+
+
+def get_home_snapshot():
+    stored = cache.get(HOME_KEY)
+    if stored is not None:
+        return stored['data']
+    snapshot = rebuild_home_snapshot()
+    if snapshot is None:
+        # Another process is storing one; serve a fresh build meanwhile
+        with primary_reads():
+            snapshot, _ = build_home_snapshot()
+    return snapshot
+
+
+def shows_article(article):
+    """Whether saving or deleting ``article`` can change the homepage."""
+    stored = cache.get(HOME_KEY)
+    if stored is None:
+        return article.is_published
+    if article.pk in stored['ids']['articles']:
+        return True
+    if not article.is_published:
+        return False
+    cutoff = stored.get('cutoff')
+    return cutoff is None or article.updated_at is None or article.updated_at >= cutoff
+
+
+def shows_category(category):
+    stored = cache.get(HOME_KEY)
+    return stored is not None and category.pk in stored['ids']['categories']
+
+
+def rebuild_home_snapshot_on_commit():
+    """
+    Rebuilds once the transaction commits, at most once per transaction
+    however many saves ask for it. The flag is a weak reference on the
+    connection to the pending callback: running it clears the flag, and
+    rolling back discards the callback and so the flag.
+    """
+    # Rebuilding before commit would read the rows as they were
+    connection = transaction.get_connection()
+    scheduled = getattr(connection, 'home_rebuild_scheduled', None)
+    if scheduled is not None and scheduled() is not None:
+        return
+
+    def rebuild():
+        connection.home_rebuild_scheduled = None
+        rebuild_home_snapshot()
+
+    connection.home_rebuild_scheduled = weakref.ref(rebuild)
+    transaction.on_commit(rebuild)
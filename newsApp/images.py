@@ -0,0 +1,251 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.dispatch import Signal
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .storage import get_s3_client, object_url
+
+logger = logging.getLogger("app")
+
+# Bounding boxes; images are scaled down to fit, never up or cropped
+VARIANTS = {
+    'thumbnail': (320, 180),
+    'card': (640, 360),
+    'hero': (1280, 720),
+}
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+# Article image field: the field recording its variants
+IMAGE_FIELDS = {
+    'banner_image': 'banner_variants',
+    'secondary_banner_image': 'secondary_banner_variants',
+}
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+
+QUALITY = 82
+
+_lock = threading.Lock()
+_render_pool = None
+_upload_pool = None
+
+# Sent once every variant of an image is stored, with ``key`` (the
+# original's object key) and ``variants`` ({size: {format: variant key}})
+variants_rendered = Signal()
+
+
+def variant_key(key, name, extension):
+    stem = os.path.splitext(key)[0]
+    return f"{stem}_{name}.{extension}"
+
+
+def stored_image_key(url):
+    """
+    Object key of an image uploaded to our bucket, or None for anything
+    else (external URLs, non-images), which gets no variants.
+    """
+    if not url:
+        return None
+    prefix = object_url('')
+    if not url.startswith(prefix):
+        return None
+    key = url[len(prefix):]
+    if '/' in key or os.path.splitext(key)[1].lower() not in IMAGE_EXTENSIONS:
+        return None
+    return key
+
+
+def banner_variants(variants):
+    """URLs of the variant keys recorded for an image (``Article.banner_variants``)."""
+    if not variants:
+        return None
+    return {
+        name: {extension: object_url(key) for extension, key in formats.items()}
+        for name, formats in variants.items()
+    }
+
+
+def rendered_variants(keys):
+    """Recorded variant keys by image key, for the ``keys`` that have them."""
+    # Imported here: render workers import this module without Django set up
+    from .models import ImageVariants
+
+    keys = {key for key in keys if key}
+    if not keys:
+        return {}
+    return dict(ImageVariants.objects.filter(key__in=keys).values_list('key', 'variants'))
+
+
+def attach_variants(articles):
+    """
+    Copies the recorded variants of each article's images onto it (one
+    query); returns the articles whose variant fields changed.
+    """
+    keys = {
+        image_field: [stored_image_key(getattr(article, image_field)) for article in articles]
+        for image_field in IMAGE_FIELDS
+    }
+    found = rendered_variants(key for field_keys in keys.values() for key in field_keys)
+    changed = []
+    for position, article in enumerate(articles):
+        dirty = False
+        for image_field, variants_field in IMAGE_FIELDS.items():
+            variants = found.get(keys[image_field][position])
+            if getattr(article, variants_field) != variants:
+                setattr(article, variants_field, variants)
+                dirty = True
+        if dirty:
+            changed.append(article)
+    return changed
+
+
+def record_variants(key, variants):
+    from .models import ImageVariants
+
+    ImageVariants.objects.update_or_create(key=key, defaults={'variants': variants})
+    variants_rendered.send(sender=ImageVariants, key=key, variants=variants)
+
+
+def render_variants(data):
+    """
+    Encodes every size/format variant of the image in ``data``. Runs in a
+    worker process, so it takes and returns plain bytes.
+    """
+    rendered = {}
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        for name, box in VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail(box, Image.Resampling.LANCZOS)
+            for extension, (pil_format, _) in FORMATS.items():
+                if pil_format == 'JPEG' or not has_alpha:
+                    frame = resized.convert('RGB')
+                else:
+                    frame = resized.convert('RGBA')
+                buffer = BytesIO()
+                frame.save(buffer, pil_format, quality=QUALITY, optimize=pil_format == 'JPEG')
+                rendered[(name, extension)] = buffer.getvalue()
+    return rendered
+
+
+def upload_variants(key, rendered):
+    """Stores the variants, then records them so articles start linking them."""
+    client = get_s3_client()
+    variants = {}
+    for (name, extension), body in rendered.items():
+        client.put_object(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=variant_key(key, name, extension),
+            Body=body,
+            ACL='public-read',
+            ContentType=FORMATS[extension][1],
+            CacheControl='public, max-age=31536000, immutable',
+        )
+        variants.setdefault(name, {})[extension] = variant_key(key, name, extension)
+    record_variants(key, variants)
+
+
+def generate_variants(key, data):
+    """Renders and uploads the variants of ``key`` in the calling thread."""
+    upload_variants(key, render_variants(data))
+
+
+def _pools():
+    global _render_pool, _upload_pool
+    if _render_pool is None:
+        with _lock:
+            if _render_pool is None:
+                _upload_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-upload')
+                # Forking a multithreaded server process can copy a held lock
+                # into the child; a fork server starts workers from a clean one
+                _render_pool = ProcessPoolExecutor(
+                    max_workers=getattr(settings, 'NEWS_IMAGE_WORKERS', 2),
+                    mp_context=multiprocessing.get_context('forkserver'),
+                )
+    return _render_pool, _upload_pool
+
+
+def _log_failure(key, exc):
+    logger.error(
+        "Image variant generation failed",
+        extra={"view": "images", "method": None, "path": key, "status_code": None, "error": str(exc)},
+    )
+
+
+def _upload_when_rendered(key, upload_pool):
+    def callback(future):
+        try:
+            rendered = future.result()
+        except Exception as exc:
+            _log_failure(key, exc)
+            return
+        upload_pool.submit(_safe_upload, key, rendered)
+    return callback
+
+
+def _safe_upload(key, rendered):
+    try:
+        upload_variants(key, rendered)
+    except Exception as exc:
+        _log_failure(key, exc)
+
+
+def is_image(data):
+    try:
+        with Image.open(BytesIO(data)) as image:
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        return False
+    return True
+
+
+def schedule_variants(key, data):
+    """
+    Derives the variants of an uploaded image off the request path:
+    resizing runs in a process pool and the results are uploaded from a
+    thread pool. ``NEWS_IMAGE_WORKERS = 0`` runs everything inline instead,
+    which is what tests use. Returns False when ``data`` is not an image.
+    """
+    if not is_image(data):
+        return False
+    if getattr(settings, 'NEWS_IMAGE_WORKERS', 2) == 0:
+        try:
+            generate_variants(key, data)
+        except Exception as exc:
+            _log_failure(key, exc)
+        return True
+    render_pool, upload_pool = _pools()
+    future = render_pool.submit(render_variants, data)
+    future.add_done_callback(_upload_when_rendered(key, upload_pool))
+    return True
+
+
+def _derive_stored(key):
+    try:
+        data = get_s3_client().get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)['Body'].read()
+        schedule_variants(key, data)
+    except Exception as exc:
+        _log_failure(key, exc)
+
+
+def schedule_variants_for_key(key):
+    """
+    Like ``schedule_variants`` for an object that is already in the bucket
+    (direct uploads): the download also happens off the request path.
+    """
+    if getattr(settings, 'NEWS_IMAGE_WORKERS', 2) == 0:
+        _derive_stored(key)
+        return
+    _, upload_pool = _pools()
+    upload_pool.submit(_derive_stored, key)
@@ -0,0 +1,212 @@
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from django.utils.timezone import now
+from rest_framework.parsers import BaseParser
+
+from .models import Article, Category
+from .serializers import ArticleIngestSerializer
+from .signals import articles_bulk_saved
+
+INGEST_CHUNK_SIZE = getattr(settings, 'NEWS_INGEST_CHUNK_SIZE', 500)
+
+INGEST_FIELDS = [
+    name if name != 'category' else 'category_id' for name in ArticleIngestSerializer.Meta.fields
+]
+
+
+class InvalidRow:
+    """Placeholder for an input line that is not a JSON object."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def parse_ndjson(lines):
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield InvalidRow(f"Line {number}: invalid JSON ({exc})")
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class IngestResult:
+    def __init__(self):
+        self.rows = []
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+
+    def ok(self, index, status, article):
+        setattr(self, status, getattr(self, status) + 1)
+        self.rows.append({'index': index, 'status': status, 'id': article.pk, 'slug': article.slug})
+
+    def error(self, index, errors):
+        self.failed += 1
+        self.rows.append({'index': index, 'status': 'error', 'errors': errors})
+
+    def summary(self):
+        return {'created': self.created, 'updated': self.updated, 'failed': self.failed}
+
+    def as_dict(self):
+        return {**self.summary(), 'results': sorted(self.rows, key=lambda row: row['index'])}
+
+
+def ingest_articles(rows, chunk_size=INGEST_CHUNK_SIZE, upsert=False, result=None):
+    """
+    Validates and writes ``rows`` (dicts) in chunks of ``chunk_size``.
+
+    Every chunk costs a fixed number of queries: one for existing titles and
+    slugs, one for category ids, then ``bulk_create``/``bulk_update``. With
+    ``upsert`` an article whose slug already exists is updated; otherwise it
+    is reported as a duplicate. Invalid rows are reported and skipped.
+    """
+    result = result or IngestResult()
+    offset = 0
+    for chunk in chunked(rows, chunk_size):
+        _ingest_chunk(list(enumerate(chunk, start=offset)), upsert, result)
+        offset += len(chunk)
+    return result
+
+
+def _ingest_chunk(rows, upsert, result):
+    valid = []
+    seen_slugs = set()
+    for index, row in rows:
+        if isinstance(row, InvalidRow):
+            result.error(index, {'non_field_errors': [row.message]})
+            continue
+        if not isinstance(row, dict):
+            result.error(index, {'non_field_errors': ["Expected a JSON object"]})
+            continue
+        serializer = ArticleIngestSerializer(data=row)
+        if not serializer.is_valid():
+            result.error(index, serializer.errors)
+            continue
+        data = dict(serializer.validated_data)
+        # A row that leaves out ``category`` keeps the article's on upsert
+        if 'category' in data:
+            data['category_id'] = data.pop('category')
+        slug = slugify(data['title'])
+        if slug in seen_slugs:
+            result.error(index, {'title': ["Duplicate title in this batch"]})
+            continue
+        seen_slugs.add(slug)
+        valid.append((index, slug, data))
+
+    if not valid:
+        return
+
+    titles = [data['title'] for _, _, data in valid]
+    by_slug, by_title = {}, {}
+    for article in Article.objects.filter(Q(slug__in=seen_slugs) | Q(title__in=titles)):
+        by_slug[article.slug] = article
+        by_title[article.title] = article
+
+    category_ids = {data['category_id'] for _, _, data in valid if data.get('category_id') is not None}
+    known_categories = set(
+        Category.objects.filter(id__in=category_ids).values_list('id', flat=True)
+    ) if category_ids else set()
+
+    to_create, to_update, previously_published = [], [], {}
+    timestamp = now()
+    for index, slug, data in valid:
+        if data.get('category_id') is not None and data['category_id'] not in known_categories:
+            result.error(index, {'category': [f"Invalid pk \"{data['category_id']}\" - object does not exist."]})
+            continue
+
+        article = by_slug.get(slug) or by_title.get(data['title'])
+        if article is not None and not upsert:
+            result.error(index, {'title': ["article with this title already exists."]})
+            continue
+        fields = None
+        if article is None:
+            article = Article()
+            to_create.append((index, article))
+        else:
+            # Only the fields the row sent are written back
+            fields = set(data) | {'slug', 'updated_at'}
+            to_update.append((index, article, fields))
+            previously_published[article.pk] = article.is_published
+
+        for field, value in data.items():
+            setattr(article, field, value)
+        article.slug = slug
+        # Same derivation as Article.save, which bulk writes skip
+        if article.is_published and not article.published_at:
+            article.published_at = timestamp
+            if fields is not None:
+                fields.add('published_at')
+        article.updated_at = timestamp
+
+    try:
+        with transaction.atomic():
+            _write(to_create, to_update, previously_published)
+    except IntegrityError as exc:
+        # A concurrent writer took one of the titles/slugs after our check
+        for index, *_ in to_create + to_update:
+            result.error(index, {'non_field_errors': [f"Batch rejected by the database: {exc}"]})
+        return
+
+    for index, article in to_create:
+        result.ok(index, 'created', article)
+    for index, article, _ in to_update:
+        result.ok(index, 'updated', article)
+
+
+def _write(to_create, to_update, previously_published):
+    if to_create:
+        Article.objects.bulk_create([article for _, article in to_create])
+        # MySQL does not return primary keys from bulk inserts
+        if any(article.pk is None for _, article in to_create):
+            ids = dict(
+                Article.objects.filter(slug__in=[a.slug for _, a in to_create]).values_list('slug', 'id')
+            )
+            for _, article in to_create:
+                article.pk = ids[article.slug]
+        for _, article in to_create:
+            # In no category's feed before
+            article._loaded_category_id = None
+    # One UPDATE per distinct set of sent fields; usually every row sends the same
+    by_fields = {}
+    for _, article, fields in to_update:
+        by_fields.setdefault(frozenset(fields), []).append(article)
+    for fields, articles in by_fields.items():
+        Article.objects.bulk_update(articles, sorted(fields))
+
+    saved = [article for _, article in to_create] + [article for _, article, _ in to_update]
+    if saved:
+        # Created rows were not published before
+        previously_published = {
+            **{article.pk: False for _, article in to_create}, **previously_published,
+        }
+        written = set(INGEST_FIELDS) | {'slug', 'updated_at', 'published_at'} if to_create else set().union(*by_fields)
+        articles_bulk_saved.send(
+            sender=Article, articles=saved, fields=written, previously_published=previously_published,
+        )
+
+
+class NDJSONParser(BaseParser):
+    """Parses newline-delimited JSON into a list of rows."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return list(parse_ndjson(stream))
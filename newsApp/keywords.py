@@ -0,0 +1,99 @@
+from django.db.models import Count
+
+from .models import ArticleKeyword
+
+MAX_KEYWORD_LENGTH = ArticleKeyword._meta.get_field('keyword').max_length
+
+
+def normalize_keyword(value):
+    return ' '.join(str(value).split()).lower()[:MAX_KEYWORD_LENGTH]
+
+
+def normalize_keywords(values):
+    keywords = {normalize_keyword(value) for value in values or [] if value is not None}
+    keywords.discard('')
+    return keywords
+
+
+def split_param(value):
+    return normalize_keywords(value.split(',')) if value else set()
+
+
+def sync_article_keywords(article):
+    """Makes the article's ArticleKeyword rows match ``related_keywords``."""
+    wanted = normalize_keywords(article.related_keywords)
+    existing = set(
+        ArticleKeyword.objects.filter(article=article).values_list('keyword', flat=True)
+    )
+    stale = existing - wanted
+    if stale:
+        ArticleKeyword.objects.filter(article=article, keyword__in=stale).delete()
+    missing = wanted - existing
+    if missing:
+        ArticleKeyword.objects.bulk_create(
+            [ArticleKeyword(article=article, keyword=keyword) for keyword in missing],
+            ignore_conflicts=True,
+        )
+
+
+def sync_keywords_bulk(articles):
+    """Set-based ``sync_article_keywords`` for a batch of articles."""
+    article_ids = [article.pk for article in articles]
+    ArticleKeyword.objects.filter(article_id__in=article_ids).delete()
+    ArticleKeyword.objects.bulk_create(
+        [
+            ArticleKeyword(article_id=article.pk, keyword=keyword)
+            for article in articles
+            for keyword in normalize_keywords(article.related_keywords)
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def articles_with_any(keywords):
+    return ArticleKeyword.objects.filter(keyword__in=keywords).values('article_id')
+
+
+def articles_with_all(keywords):
+    return (
+        ArticleKeyword.objects.filter(keyword__in=keywords)
+        .values('article_id')
+        .annotate(matched=Count('keyword'))
+        .filter(matched=len(keywords))
+        .values('article_id')
+    )
+
+
+class KeywordFilter:
+    """
+    Filter backend for keyword lookups through the ArticleKeyword table:
+
+    - ``related_keywords=<kw>``: exact keyword
+    - ``keywords_any=<kw>,<kw>``: at least one of the keywords
+    - ``keywords_all=<kw>,<kw>``: every one of the keywords
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        exact = split_param(params.get('related_keywords'))
+        if exact:
+            queryset = queryset.filter(pk__in=articles_with_all(exact))
+        any_of = split_param(params.get('keywords_any'))
+        if any_of:
+            queryset = queryset.filter(pk__in=articles_with_any(any_of))
+        all_of = split_param(params.get('keywords_all'))
+        if all_of:
+            queryset = queryset.filter(pk__in=articles_with_all(all_of))
+        return queryset
+
+
+def keyword_frequencies(prefix=None):
+    queryset = ArticleKeyword.objects.all()
+    if prefix:
+        queryset = queryset.filter(keyword__startswith=normalize_keyword(prefix))
+    return (
+        queryset.values('keyword')
+        .annotate(count=Count('article_id'))
+        .order_by('-count', 'keyword')
+    )
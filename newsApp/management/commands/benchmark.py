@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from newsApp.benchmark import compare_runs, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the read endpoints in-process and report latency percentiles, "
+        "throughput, SQL queries and response bytes as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--with-cache', action='store_true', help="Keep the response cache enabled")
+        parser.add_argument('--only', action='append', help="Run endpoints whose name contains this text")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+        parser.add_argument('--compare', help="Baseline JSON report to compare against")
+        parser.add_argument(
+            '--fail-above', type=float,
+            help="With --compare, exit with an error when any p95 ratio exceeds this (e.g. 1.2)",
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1")
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as source:
+                    baseline = json.load(source)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline: {exc}")
+
+        report = run_benchmark(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            use_cache=options['with_cache'],
+            only=options['only'],
+            stdout=self.stderr if options['output'] is None else self.stdout,
+        )
+        if baseline is not None:
+            report['comparison'] = compare_runs(baseline, report)
+
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                target.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+        if baseline is not None and options['fail_above']:
+            slower = [
+                row['name'] for row in report['comparison']
+                if row['p95_ms']['ratio'] and row['p95_ms']['ratio'] > options['fail_above']
+            ]
+            if slower:
+                raise CommandError(f"p95 regressed beyond {options['fail_above']}x: {', '.join(slower)}")
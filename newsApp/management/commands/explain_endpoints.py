@@ -0,0 +1,139 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from newsApp.models import Article, ArticleKeyword, Category
+from newsApp.search import get_search_backend, tokenize
+from newsApp.trending import views_not_counted
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every public endpoint in-process, EXPLAIN the SQL it runs and "
+        "report full table scans and filesorts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict', action='store_true',
+            help="Exit with an error when any query scans a full table or filesorts",
+        )
+        parser.add_argument(
+            '--verbose-plans', action='store_true',
+            help="Print the plan of every query, not only the problematic ones",
+        )
+
+    def endpoints(self):
+        article = Article.objects.exclude(category=None).order_by('-id').first() or Article.objects.order_by('-id').first()
+        category_id = article.category_id if article and article.category_id else (
+            Category.objects.values_list('id', flat=True).first()
+        )
+        keyword = ArticleKeyword.objects.values_list('keyword', flat=True).first()
+        deep_page = max(Article.objects.count() // 10, 1)
+
+        endpoints = [
+            ('article list', '/news/articles/'),
+            ('published articles', '/news/articles/?is_published=true'),
+            ('tag feed', '/news/articles/?tag=breaking_news'),
+            ('tag feed by published_at', '/news/articles/?tag=breaking_news&pagination=cursor&ordering=-published_at'),
+            ('article list, cursor', '/news/articles/?pagination=cursor'),
+            ('article list, deep page', f'/news/articles/?page={deep_page}'),
+            ('categories', '/news/categories/'),
+            ('keywords', '/news/keywords/'),
+            ('home', '/news/home/'),
+            ('trending', '/news/articles/trending/'),
+        ]
+        if category_id:
+            endpoints += [
+                ('published articles in category', f'/news/articles/?is_published=true&category={category_id}'),
+                ('articles by category', f'/news/categories/{category_id}/articles/'),
+            ]
+        if article:
+            endpoints += [
+                ('article detail', f'/news/articles/{article.pk}/'),
+                ('article by slug', f'/news/articles/by-slug/{article.slug}/'),
+                ('article by slug filter', f'/news/articles/?slug={article.slug}'),
+                ('related articles', f'/news/articles/{article.pk}/related/'),
+            ]
+            terms = tokenize(article.title or '')
+            if terms:
+                endpoints.append(('full-text search', f'/news/articles/?q={terms[0]}'))
+        if keyword:
+            endpoints.append(('keyword filter', f'/news/articles/?related_keywords={keyword}'))
+        return endpoints
+
+    def explain(self, sql):
+        # Derived tables and subqueries show up as scans too; only real tables count
+        tables = set(connection.introspection.table_names())
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'EXPLAIN {sql}')
+                columns = [col[0] for col in cursor.description]
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                issues = []
+                for row in rows:
+                    if row.get('type') == 'ALL' and row.get('table') in tables:
+                        issues.append(f"full scan of {row.get('table')} (~{row.get('rows')} rows)")
+                    if 'filesort' in (row.get('Extra') or ''):
+                        issues.append(f"filesort on {row.get('table')}")
+                plan = [
+                    f"{row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                    f"rows={row.get('rows')} extra={row.get('Extra')}"
+                    for row in rows
+                ]
+                return plan, issues
+
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[3] for row in cursor.fetchall()]
+                issues = []
+                for detail in plan:
+                    scan = re.match(r'SCAN (\S+)$', detail)
+                    if scan and scan.group(1) in tables:
+                        issues.append(f"full scan: {detail}")
+                    if 'TEMP B-TREE' in detail:
+                        issues.append(f"sort: {detail}")
+                return plan, issues
+
+        raise CommandError(f"EXPLAIN is not supported for the {connection.vendor} backend")
+
+    def handle(self, *args, **options):
+        client = Client()
+        problems = 0
+        # The in-memory index reads every article once when first searched;
+        # that one-off scan is not what the search endpoint costs
+        get_search_backend().search('warm up')
+
+        # Bypass the response cache so every endpoint really hits the database;
+        # diagnostic requests must not count as article views
+        with override_settings(CACHES=NO_CACHE), views_not_counted():
+            for name, url in self.endpoints():
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url, HTTP_ACCEPT='application/json')
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{name}: GET {url} -> {response.status_code}"))
+
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT'):
+                        continue
+                    plan, issues = self.explain(sql)
+                    if issues or options['verbose_plans']:
+                        self.stdout.write(f"  {sql[:200]}{'...' if len(sql) > 200 else ''}")
+                        for line in plan:
+                            self.stdout.write(f"    {line}")
+                    for issue in issues:
+                        problems += 1
+                        self.stdout.write(self.style.WARNING(f"    ! {issue}"))
+
+        if problems:
+            message = f"{problems} full scan(s)/filesort(s) found"
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No full scans or filesorts found"))
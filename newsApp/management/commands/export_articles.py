@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from newsApp.export import EXPORT_CHUNK_SIZE, EXPORTERS, parse_updated_since
+from newsApp.models import Article
+
+
+class Command(BaseCommand):
+    help = "Stream articles as NDJSON or CSV with constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORTERS), default='ndjson')
+        parser.add_argument('--output', help="File to write to (defaults to stdout)")
+        parser.add_argument('--updated-since', help="ISO 8601 date or datetime lower bound on updated_at")
+        parser.add_argument('--category', type=int)
+        parser.add_argument('--tag', choices=Article.TagChoices.values)
+        parser.add_argument('--published', choices=['true', 'false'])
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = Article.objects.all()
+        if options['updated_since']:
+            since = parse_updated_since(options['updated_since'])
+            if since is None:
+                raise CommandError("--updated-since expects an ISO 8601 date or datetime")
+            queryset = queryset.filter(updated_at__gte=since)
+        if options['category'] is not None:
+            queryset = queryset.filter(category_id=options['category'])
+        if options['tag']:
+            queryset = queryset.filter(tag=options['tag'])
+        if options['published']:
+            queryset = queryset.filter(is_published=options['published'] == 'true')
+
+        chunks = EXPORTERS[options['format']](queryset, chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from newsApp.images import generate_variants, rendered_variants, stored_image_key
+from newsApp.models import Article
+from newsApp.storage import get_s3_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Render thumbnail/card/hero variants for article images that have none "
+        "recorded, and link them to their articles"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Re-render variants that are already recorded")
+
+    def handle(self, *args, **options):
+        client = get_s3_client()
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        done = failed = 0
+
+        keys = set()
+        for banner, secondary in Article.objects.values_list('banner_image', 'secondary_banner_image').iterator():
+            keys.update(key for key in map(stored_image_key, (banner, secondary)) if key)
+        if not options['force']:
+            keys -= set(rendered_variants(keys))
+
+        for key in sorted(keys):
+            try:
+                data = client.get_object(Bucket=bucket, Key=key)['Body'].read()
+                generate_variants(key, data)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{key}: {exc}")
+                continue
+            done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered variants for {done} image(s), {failed} failed"))
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from newsApp.ingest import INGEST_CHUNK_SIZE, ingest_articles, parse_ndjson
+
+
+class Command(BaseCommand):
+    help = "Bulk import articles from an NDJSON file or a JSON array"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file; NDJSON is streamed line by line")
+        parser.add_argument('--format', choices=['ndjson', 'json'], default='ndjson')
+        parser.add_argument('--chunk-size', type=int, default=INGEST_CHUNK_SIZE)
+        parser.add_argument('--upsert', action='store_true', help="Update articles whose slug already exists")
+        parser.add_argument('--show-errors', action='store_true', help="Print every rejected row")
+
+    def handle(self, *args, **options):
+        try:
+            source = open(options['path'], encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with source:
+            if options['format'] == 'json':
+                try:
+                    rows = json.load(source)
+                except ValueError as exc:
+                    raise CommandError(f"Invalid JSON: {exc}")
+                if not isinstance(rows, list):
+                    raise CommandError("Expected a JSON array")
+            else:
+                rows = parse_ndjson(source)
+
+            result = ingest_articles(rows, chunk_size=options['chunk_size'], upsert=options['upsert'])
+
+        if options['show_errors']:
+            for row in result.rows:
+                if row['status'] == 'error':
+                    self.stdout.write(self.style.WARNING(f"row {row['index']}: {json.dumps(row['errors'])}"))
+        summary = result.summary()
+        style = self.style.SUCCESS if not summary['failed'] else self.style.WARNING
+        self.stdout.write(style(
+            f"{summary['created']} created, {summary['updated']} updated, {summary['failed']} failed"
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from newsApp.related import RELATED_COUNT, rebuild_related
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the related-articles index of every published article. Saves "
+        "keep it current incrementally; run this after imports that bypass "
+        "signals or to drop stale entries."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_related()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} articles with up to {RELATED_COUNT} related each"))
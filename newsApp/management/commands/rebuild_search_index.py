@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from newsApp.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the article full-text search index from the database"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index with {backend.__class__.__name__}"))
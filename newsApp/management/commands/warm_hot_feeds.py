@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from newsApp.feeds import HOT_FEED_SIZE, warm_feeds
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the hot-feed store with every tag and category feed. Run it at "
+        "startup against the shared cache so the first readers skip the build."
+    )
+
+    def handle(self, *args, **options):
+        if not HOT_FEED_SIZE:
+            self.stdout.write(self.style.WARNING("Hot feeds are disabled (NEWS_HOT_FEED_SIZE = 0)"))
+            return
+        count = warm_feeds()
+        self.stdout.write(self.style.SUCCESS(f"Warmed {count} feeds of up to {HOT_FEED_SIZE} articles"))
@@ -0,0 +1,254 @@
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+logger = logging.getLogger("app")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name: (help, buckets)
+HISTOGRAMS = {
+    'news_http_request_duration_seconds': ("Time spent in the view, including middleware below this one", DURATION_BUCKETS),
+    'news_http_request_queries': ("SQL queries executed per request", QUERY_COUNT_BUCKETS),
+    'news_http_request_query_duration_seconds': ("Time spent executing SQL per request", DURATION_BUCKETS),
+    'news_http_response_size_bytes': ("Response body size; streaming responses are not counted", SIZE_BUCKETS),
+}
+
+SLOW_REQUEST_MS = getattr(settings, 'NEWS_SLOW_REQUEST_MS', 500)
+SLOW_REQUEST_STATEMENTS = 10
+
+_current = contextvars.ContextVar('news_request_metrics', default=None)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.count += other.count
+
+
+class ThreadMetrics:
+    """
+    Counters owned by one thread. Only that thread writes to them, so
+    recording a request takes no lock; the scrape merges all threads.
+    Async requests all run on the event loop thread and never yield in the
+    middle of an update.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.requests = Counter()
+
+    def histogram(self, name, labels):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(HISTOGRAMS[name][1])
+        return histogram
+
+
+_local = threading.local()
+_all_threads = []
+_all_threads_lock = threading.Lock()
+
+
+def thread_metrics():
+    metrics = getattr(_local, 'metrics', None)
+    if metrics is None:
+        metrics = _local.metrics = ThreadMetrics()
+        with _all_threads_lock:
+            _all_threads.append(metrics)
+    return metrics
+
+
+def reset_metrics():
+    with _all_threads_lock:
+        for metrics in _all_threads:
+            metrics.histograms = {}
+            metrics.requests = Counter()
+
+
+class RequestMetrics:
+    """SQL executed on behalf of the current request."""
+    __slots__ = ('queries', 'query_time', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements = []
+
+    def add(self, sql, duration):
+        self.queries += 1
+        self.query_time += duration
+        self.statements.append((duration, sql))
+
+    def breakdown(self, limit=SLOW_REQUEST_STATEMENTS):
+        repeated = Counter(sql for _, sql in self.statements)
+        lines = [
+            f"{duration * 1000:.1f}ms x{repeated[sql]} {sql[:300]}"
+            for duration, sql in sorted(self.statements, key=lambda item: item[0], reverse=True)[:limit]
+        ]
+        return '; '.join(lines)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper, installed on every connection. Queries run
+    outside a request (commands, background threads) are not recorded.
+    The request context follows async views into ``sync_to_async`` threads.
+    """
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current.add(sql, time.perf_counter() - start)
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    view = getattr(match.func, 'view_class', None) or match.func
+    return getattr(view, '__name__', match.view_name)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, SQL query count/time and response size per view, and
+    logs requests slower than ``NEWS_SLOW_REQUEST_MS`` with their SQL.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        current = RequestMetrics()
+        token = _current.set(current)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, current, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        current = RequestMetrics()
+        token = _current.set(current)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, current, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, current, duration):
+        view = view_name(request)
+        labels = (view, request.method)
+        metrics = thread_metrics()
+        metrics.requests[(view, request.method, str(response.status_code))] += 1
+        metrics.histogram('news_http_request_duration_seconds', labels).observe(duration)
+        metrics.histogram('news_http_request_queries', labels).observe(current.queries)
+        metrics.histogram('news_http_request_query_duration_seconds', labels).observe(current.query_time)
+        if not response.streaming:
+            metrics.histogram('news_http_response_size_bytes', labels).observe(len(response.content))
+
+        if duration * 1000 >= SLOW_REQUEST_MS:
+            logger.warning(
+                f"Slow request: {duration * 1000:.0f}ms, {current.queries} queries in "
+                f"{current.query_time * 1000:.0f}ms: {current.breakdown()}",
+                extra={
+                    "view": view,
+                    "method": request.method,
+                    "path": request.path,
+                    "status_code": response.status_code,
+                },
+            )
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def render_metrics():
+    """Every thread's counters merged into the Prometheus text format."""
+    with _all_threads_lock:
+        snapshot = list(_all_threads)
+
+    requests = Counter()
+    histograms = {}
+    for metrics in snapshot:
+        requests.update(dict(metrics.requests))
+        for (name, labels), histogram in list(metrics.histograms.items()):
+            merged = histograms.get((name, labels))
+            if merged is None:
+                merged = histograms[(name, labels)] = Histogram(histogram.buckets)
+            merged.merge(histogram)
+
+    lines = [
+        '# HELP news_http_requests_total Requests handled, by view, method and status',
+        '# TYPE news_http_requests_total counter',
+    ]
+    for labels, count in sorted(requests.items()):
+        lines.append(f'news_http_requests_total{{{_label_text(("view", "method", "status"), labels)}}} {count}')
+
+    for name, (description, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            label_text = _label_text(('view', 'method'), labels)
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label_text}}} {histogram.total}')
+            lines.append(f'{name}_count{{{label_text}}} {histogram.count}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FULLTEXT_INDEXES = {
+    'article_search_title_ft': 'title',
+    'article_search_body_ft': 'body',
+    'article_search_title_body_ft': 'title, body',
+}
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    table = apps.get_model('newsApp', 'ArticleSearchDocument')._meta.db_table
+    for name, columns in FULLTEXT_INDEXES.items():
+        schema_editor.execute(f'ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({columns})')
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    table = apps.get_model('newsApp', 'ArticleSearchDocument')._meta.db_table
+    for name in FULLTEXT_INDEXES:
+        schema_editor.execute(f'ALTER TABLE {table} DROP INDEX {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsApp', '0006_article_secondary_banner_image_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSearchDocument',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='newsApp.article')),
+                ('title', models.TextField(blank=True, default='')),
+                ('body', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.RunPython(add_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_keywords(apps, schema_editor):
+    Article = apps.get_model('newsApp', 'Article')
+    ArticleKeyword = apps.get_model('newsApp', 'ArticleKeyword')
+    batch = []
+    for article_id, related_keywords in Article.objects.values_list('id', 'related_keywords').iterator():
+        keywords = {' '.join(str(kw).split()).lower()[:191] for kw in related_keywords or [] if kw is not None}
+        keywords.discard('')
+        batch.extend(ArticleKeyword(article_id=article_id, keyword=kw) for kw in keywords)
+        if len(batch) >= 1000:
+            ArticleKeyword.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    ArticleKeyword.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsApp', '0007_article_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleKeyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keyword', models.CharField(max_length=191)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keywords', to='newsApp.article')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['keyword', 'article'], name='article_keyword_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('article', 'keyword'), name='unique_article_keyword')],
+            },
+        ),
+        migrations.RunPython(backfill_keywords, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsApp', '0010_slug_redirects'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedArticles',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='related_articles', serialize=False, to='newsApp.article')),
+                ('related', models.JSONField(default=list)),
+                ('norm', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RelatedTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=191)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_terms', to='newsApp.article')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'article'], name='related_term_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('article', 'term'), name='unique_article_related_term')],
+            },
+        ),
+    ]
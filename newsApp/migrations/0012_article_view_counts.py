@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsApp', '0011_related_articles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='trending',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='view_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['is_published', '-trending', '-id'], name='article_pub_trending_idx'),
+        ),
+    ]
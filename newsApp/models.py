@@ -1,8 +1,13 @@
 from django.db import models
+from django.db.models import DEFERRED
 from django.contrib.auth.models import User
 from django.utils.text import slugify
 from uuid import uuid4
 
+# Longest indexed CharField: 191 utf8mb4 characters keep an index within
+# InnoDB's 767-byte key limit
+INDEXED_CHAR_LENGTH = 191
+
 
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, editable=False)
@@ -11,10 +16,31 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
-class Category(BaseModel):
+class SlugTrackingMixin:
+    """
+    Remembers the slug an instance was loaded with, so saving a renamed
+    object can leave a redirect from its old slug (see ``slugs.py``).
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'slug' in field_names:
+            slug = values[field_names.index('slug')]
+            if slug is not DEFERRED:
+                instance._loaded_slug = slug
+        return instance
+
+
+class Category(SlugTrackingMixin, BaseModel):
     name = models.CharField(max_length=100, unique=True, null=True, blank=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-updated_at'], name='category_updated_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if self.name:
             new_slug = slugify(self.name)
@@ -26,7 +52,7 @@ class Category(BaseModel):
         return self.name or "Unnamed Category"
 
 
-class Article(BaseModel):
+class Article(SlugTrackingMixin, BaseModel):
 
     class TagChoices(models.TextChoices):
         BREAKING_NEWS = 'breaking_news', 'Breaking News'
@@ -44,12 +70,46 @@ class Article(BaseModel):
     content = models.TextField(null=True, blank=True)
     banner_image = models.CharField(max_length=600, null=True, blank=True)
     secondary_banner_image = models.CharField(max_length=600, null=True, blank=True)
+    # Keys of the rendered variants of each image ({size: {format: key}}),
+    # copied from ImageVariants; None until they exist
+    banner_variants = models.JSONField(null=True, blank=True, editable=False)
+    secondary_banner_variants = models.JSONField(null=True, blank=True, editable=False)
     secondary_content = models.TextField(null=True, blank=True)
     is_published = models.BooleanField(default=False)
     published_at = models.DateTimeField(null=True, blank=True)
     tag = models.CharField(max_length=100, choices=TagChoices.choices, null=True, blank=True)
     related_keywords = models.JSONField(default=list, blank=True, null=True)
-    
+    # Written in batches from buffered page views (see trending.py), never by save()
+    view_count = models.PositiveBigIntegerField(default=0, editable=False)
+    # log2 of the decayed view count, on a scale that grows with time so older
+    # scores need no rewrite to stay comparable; 0 for never viewed
+    trending = models.FloatField(default=0, editable=False)
+
+    class Meta:
+        # Composite indexes for the list filters (is_published/category/tag)
+        # followed by their ordering, so MySQL can read rows in order instead
+        # of filesorting. The trailing id doubles as the keyset tie-breaker.
+        indexes = [
+            models.Index(fields=['is_published', 'category', '-updated_at', '-id'], name='article_pub_cat_updated_idx'),
+            models.Index(fields=['category', '-updated_at', '-id'], name='article_cat_updated_idx'),
+            models.Index(fields=['tag', '-updated_at', '-id'], name='article_tag_updated_idx'),
+            models.Index(fields=['tag', '-published_at', '-id'], name='article_tag_published_idx'),
+            models.Index(fields=['-updated_at', '-id'], name='article_updated_id_idx'),
+            models.Index(fields=['-published_at', '-id'], name='article_published_id_idx'),
+            models.Index(fields=['is_published', '-trending', '-id'], name='article_pub_trending_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The feed of this category is the one a save moves the article out of
+        if 'category_id' in instance.__dict__:
+            instance._loaded_category_id = instance.category_id
+        # Tells a publish from an update without reading the row again (see events.py)
+        if 'is_published' in instance.__dict__:
+            instance._loaded_is_published = instance.is_published
+        return instance
+
     def save(self, *args, **kwargs):
         if self.title:
             new_slug = slugify(self.title)
@@ -59,6 +119,111 @@ class Article(BaseModel):
             from django.utils.timezone import now
             self.published_at = now()
         super().save(*args, **kwargs)
+        self._loaded_is_published = self.is_published
 
     def __str__(self):
         return self.title or "Untitled Article"
+
+
+class ArticleSearchDocument(models.Model):
+    """
+    Tokenized text of an article, kept in sync on save/delete and indexed
+    with FULLTEXT on MySQL (see migration 0007).
+    """
+    article = models.OneToOneField(
+        Article, on_delete=models.CASCADE, primary_key=True, related_name='search_document'
+    )
+    title = models.TextField(blank=True, default='')
+    body = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f"Search document for article {self.article_id}"
+
+
+class ArticleKeyword(models.Model):
+    """
+    One normalized entry of ``Article.related_keywords`` per row, so keyword
+    filters are index seeks instead of JSON substring scans.
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='keywords')
+    keyword = models.CharField(max_length=INDEXED_CHAR_LENGTH)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'keyword'], name='unique_article_keyword'),
+        ]
+        indexes = [
+            models.Index(fields=['keyword', 'article'], name='article_keyword_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return self.keyword
+
+
+class ImageVariants(models.Model):
+    """
+    Manifest of the resized variants uploaded for an image in our bucket,
+    written once every variant is stored (see ``images.py``).
+    """
+    key = models.CharField(max_length=INDEXED_CHAR_LENGTH, unique=True)
+    # {size: {format: variant key}}
+    variants = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+
+    def __str__(self):
+        return self.key
+
+
+class SlugRedirect(models.Model):
+    """An old slug of a renamed object, kept so its old URLs keep working."""
+    slug = models.SlugField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.slug
+
+
+class ArticleSlugRedirect(SlugRedirect):
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='slug_redirects')
+
+
+class CategorySlugRedirect(SlugRedirect):
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='slug_redirects')
+
+
+class RelatedTerm(models.Model):
+    """
+    A keyword (``k:``) or title word (``t:``) of a published article, so
+    related-article candidates are index seeks on shared terms.
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='related_terms')
+    term = models.CharField(max_length=INDEXED_CHAR_LENGTH)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'term'], name='unique_article_related_term'),
+        ]
+        indexes = [
+            models.Index(fields=['term', 'article'], name='related_term_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class RelatedArticles(models.Model):
+    """Precomputed related articles of a published article (see ``related.py``)."""
+    article = models.OneToOneField(
+        Article, on_delete=models.CASCADE, primary_key=True, related_name='related_articles'
+    )
+    # [[article id, score], ...], best first
+    related = models.JSONField(default=list)
+    # Length of the article's weighted term vector
+    norm = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Related articles of article {self.article_id}"
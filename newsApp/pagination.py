@@ -1,12 +1,67 @@
-from rest_framework.pagination import PageNumberPagination
+import binascii
+import json
+from base64 import urlsafe_b64decode as b64decode, urlsafe_b64encode as b64encode
+
+from django.core.paginator import InvalidPage, Page as DjangoPage, Paginator as DjangoPaginator
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CountedPaginator(DjangoPaginator):
+    """
+    Paginator that accepts a count computed elsewhere instead of running
+    its own ``COUNT(*)``.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+    known_count = None
 
-    def get_paginated_response(self, data, counts=None):
+    def django_paginator_class(self, object_list, per_page):
+        return CountedPaginator(object_list, per_page, count=self.known_count)
+
+    def paginate_queryset(self, queryset, request, view=None, count=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        return self.finish_page(list(self.page_queryset(queryset, request, count=count)))
+
+    def page_queryset(self, queryset, request, count=None):
+        """
+        The sliced queryset for the requested page. Evaluating it is left to
+        the caller so async views can iterate it with ``async for``.
+        """
+        self.request = request
+        self.known_count = count
+        self.paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        page_number = self.get_page_number(request, self.paginator)
+        try:
+            self.number = self.paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        bottom = (self.number - 1) * self.paginator.per_page
+        return queryset[bottom:bottom + self.paginator.per_page]
+
+    def finish_page(self, rows):
+        """Wraps the fetched ``rows`` of ``page_queryset`` into the current page."""
+        self.page = DjangoPage(rows, self.number, self.paginator)
+        if self.paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+    def get_paginated_response(self, data, counts=None, approximate=False):
         response_data = {
             'page': self.page.number,
             'page_size': self.page.paginator.per_page,
@@ -16,4 +71,177 @@ class StandardResultsSetPagination(PageNumberPagination):
         }
         if counts:
             response_data['counts'] = counts
+        if approximate:
+            response_data['approximate'] = True
         return Response(response_data)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over ``(<timestamp>, id)`` keyset seeks.
+
+    Every page is a ``WHERE (field, id) < (value, id) ORDER BY field, id
+    LIMIT n`` query, so deep pages cost the same as the first one and do not
+    shift when new articles arrive. Tokens are opaque; no total is computed.
+    Rows without a value of the field (drafts under ``published_at``) sort
+    lowest, as in the page-number list. Other orderings are rejected.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    keyset_fields = ('updated_at', 'published_at')
+    default_ordering = '-updated_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, '')
+        if not ordering:
+            return self.default_ordering
+        if ordering.lstrip('-') not in self.keyset_fields:
+            # Serving another order than the one asked for would be worse
+            raise ValidationError({self.ordering_query_param: [
+                f"Cursor pagination orders by one of: {', '.join(self.keyset_fields)}."
+            ]})
+        return ordering
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(b64decode(encoded.encode()).decode())
+            # None for rows without a value of the ordering field
+            value = payload['v']
+            if value is not None:
+                value = parse_datetime(value)
+                if value is None:
+                    raise ValueError
+            return value, int(payload['i']), bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        # Rows of the .values() fast path are dicts
+        if isinstance(instance, dict):
+            value, pk = instance[self.field], instance['id']
+        else:
+            value, pk = getattr(instance, self.field), instance.pk
+        payload = {
+            'v': value.isoformat() if value is not None else None,
+            'i': pk,
+            'r': 1 if reverse else 0,
+        }
+        encoded = b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    def prepare(self, request):
+        """Reads page size, ordering and cursor of ``request``."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        ordering = self.get_ordering(request)
+        self.field = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor[2])
+
+    def page_queryset(self, queryset, request):
+        """
+        The sliced queryset for the requested page (one row more than the
+        page size, to detect a further page). Evaluating it is left to the
+        caller so async views can iterate it with ``async for``.
+        """
+        self.prepare(request)
+        field, cursor = self.field, self.cursor
+        nullable = queryset.model._meta.get_field(field).null
+        # Walking backwards flips the scan direction; rows are flipped back in finish_page
+        scan_descending = self.descending != self.reverse
+
+        if cursor:
+            value, pk, _ = cursor
+            queryset = queryset.filter(self.seek(field, value, pk, scan_descending, nullable))
+
+        prefix = '-' if scan_descending else ''
+        column = f'{prefix}{field}'
+        if nullable:
+            # Rows without a value (drafts have no published_at) sort lowest,
+            # where MySQL and SQLite put them anyway, so their indexes still serve
+            column = F(field).desc(nulls_last=True) if scan_descending else F(field).asc(nulls_first=True)
+        return queryset.order_by(column, f'{prefix}pk')[:self.page_size + 1]
+
+    def seek(self, field, value, pk, descending, nullable):
+        """Rows after ``(value, pk)`` in scan order, NULL values sorting lowest."""
+        op = 'lt' if descending else 'gt'
+        if value is None:
+            after = Q(**{f'{field}__isnull': True, f'pk__{op}': pk})
+            return after if descending else after | Q(**{f'{field}__isnull': False})
+        after = Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'pk__{op}': pk})
+        if descending and nullable:
+            after |= Q(**{f'{field}__isnull': True})
+        return after
+
+    def finish_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data, **kwargs):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+            'results': data,
+        })
+
+
+class SelectablePaginationMixin:
+    """
+    Lets a request pick keyset pagination with ``?pagination=cursor`` (or by
+    sending a ``cursor``); page-number pagination stays the default for the
+    admin UI that needs ``total_pages``.
+    """
+    cursor_pagination_class = KeysetPagination
+
+    def uses_cursor_pagination(self):
+        params = self.request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.uses_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
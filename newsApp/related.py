@@ -0,0 +1,307 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count
+
+from .counts import estimated_table_rows
+from .keywords import normalize_keywords
+from .models import Article, RelatedArticles, RelatedTerm
+from .search import tokenize
+
+logger = logging.getLogger("app")
+
+RELATED_COUNT = getattr(settings, 'NEWS_RELATED_COUNT', 10)
+CATEGORY_BOOST = getattr(settings, 'NEWS_RELATED_CATEGORY_BOOST', 0.25)
+RECENCY_BOOST = getattr(settings, 'NEWS_RELATED_RECENCY_BOOST', 0.25)
+RECENCY_HALF_LIFE_DAYS = getattr(settings, 'NEWS_RELATED_HALF_LIFE_DAYS', 7)
+
+MAX_TERM_LENGTH = RelatedTerm._meta.get_field('term').max_length
+
+# A shared keyword says more than a shared title word
+TERM_WEIGHTS = {'k': 2.0, 't': 1.0}
+
+# Terms of more than this share of the articles (and more than
+# COMMON_TERM_MIN) would make nearly every article a candidate for little
+# score. They count in vector lengths but not in dot products.
+COMMON_TERM_SHARE = 0.1
+COMMON_TERM_MIN = 100
+
+_refresh_executor = None
+_refresh_lock = threading.Lock()
+_refresh_queued = False
+# Ids saved since the queued refresh started, refreshed together by the next one
+_pending_ids = set()
+
+
+def article_terms(title, keywords):
+    terms = {f'k:{keyword}' for keyword in normalize_keywords(keywords)}
+    terms.update(f't:{token}' for token in tokenize(title or ''))
+    return {term[:MAX_TERM_LENGTH] for term in terms}
+
+
+def load_articles(queryset):
+    """``(id, terms, category_id, timestamp)`` of the published articles of ``queryset``."""
+    rows = queryset.filter(is_published=True).values_list(
+        'id', 'title', 'related_keywords', 'category_id', 'published_at', 'updated_at'
+    )
+    return [
+        (pk, article_terms(title, keywords), category_id, (published_at or updated_at).timestamp())
+        for pk, title, keywords, category_id, published_at, updated_at in rows
+    ]
+
+
+def term_weights(terms, df, total):
+    """
+    TF-IDF weight of each of ``terms`` given their document frequencies
+    ``df`` among ``total`` articles. TF is 1: an article has a term or not.
+    """
+    fields = np.array([TERM_WEIGHTS[term[0]] for term in terms], dtype=float)
+    return fields * (np.log((1 + total) / (1 + np.asarray(df, dtype=float))) + 1)
+
+
+def is_common(df, total):
+    return (df > COMMON_TERM_MIN) & (df > total * COMMON_TERM_SHARE)
+
+
+def top_related(ids, scores):
+    """The best ``RELATED_COUNT`` as ``[[id, score], ...]``, ties by id."""
+    keep = scores > 0
+    ids, scores = ids[keep], scores[keep]
+    if len(ids) > RELATED_COUNT:
+        best = np.argpartition(-scores, RELATED_COUNT - 1)[:RELATED_COUNT]
+        ids, scores = ids[best], scores[best]
+    return [[int(ids[k]), round(float(scores[k]), 4)] for k in np.lexsort((ids, -scores))]
+
+
+class Catalog:
+    """Column arrays of the articles scored against each other, by position."""
+
+    def __init__(self, ids, categories, timestamps, norms):
+        self.ids = np.array(ids, dtype=np.int64)
+        self.categories = np.array([-1 if pk is None else pk for pk in categories], dtype=np.int64)
+        self.norms = np.array(norms, dtype=float)
+        age_days = np.maximum(time.time() - np.array(timestamps, dtype=float), 0) / 86400
+        self.recency = 1 + RECENCY_BOOST * np.exp2(-age_days / RECENCY_HALF_LIFE_DAYS)
+
+    def similarity(self, position, others, dots):
+        """
+        Cosine similarity of the article at ``position`` with those at
+        ``others`` (whose vectors have dot products ``dots`` with it),
+        boosted where they share a category. Symmetric: a score is this
+        times the recency of the article recommended.
+        """
+        lengths = self.norms[position] * self.norms[others]
+        similarity = np.divide(dots, lengths, out=np.zeros_like(dots), where=lengths > 0)
+        if self.categories[position] >= 0:
+            similarity *= np.where(self.categories[others] == self.categories[position], 1 + CATEGORY_BOOST, 1.0)
+        similarity[others == position] = 0
+        return similarity
+
+
+class TermIndex:
+    """Postings (article positions per term index) built from ``(position, term)`` pairs."""
+
+    def __init__(self, positions, terms, term_count):
+        positions = np.asarray(positions, dtype=np.int64)
+        terms = np.asarray(terms, dtype=np.int64)
+        self.postings = positions[np.argsort(terms, kind='stable')]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(terms, minlength=term_count))))
+
+    def dots(self, terms, squared):
+        """
+        Positions of the articles having any of ``terms`` and the dot
+        products of their vectors with one of those terms (``squared`` holds
+        the squared term weights).
+        """
+        terms = np.asarray(terms, dtype=np.int64)
+        if not len(terms):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        candidates = np.concatenate([self.postings[self.offsets[t]:self.offsets[t + 1]] for t in terms])
+        shared = np.repeat(squared[terms], np.diff(self.offsets)[terms])
+        positions, inverse = np.unique(candidates, return_inverse=True)
+        return positions, np.bincount(inverse, weights=shared, minlength=len(positions))
+
+
+def rebuild_related():
+    """
+    Recomputes the terms and related articles of every published article
+    in one pass over the table; returns how many articles were indexed.
+    """
+    articles = load_articles(Article.objects.order_by('pk'))
+    total = len(articles)
+    vocabulary = {}
+    positions, term_ids = [], []
+    for position, (_, terms, _, _) in enumerate(articles):
+        for term in terms:
+            positions.append(position)
+            term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+    positions = np.array(positions, dtype=np.int64)
+    term_ids = np.array(term_ids, dtype=np.int64)
+
+    df = np.bincount(term_ids, minlength=len(vocabulary))
+    squared = term_weights(list(vocabulary), df, total) ** 2
+    norms = np.sqrt(np.bincount(positions, weights=squared[term_ids], minlength=total))
+    catalog = Catalog(
+        [pk for pk, _, _, _ in articles], [category for _, _, category, _ in articles],
+        [timestamp for _, _, _, timestamp in articles], norms,
+    )
+    index = TermIndex(positions, term_ids, len(vocabulary))
+    followed = ~is_common(df, total)
+    # Pairs were appended per article, so each article's terms are a slice
+    starts = np.concatenate(([0], np.cumsum(np.bincount(positions, minlength=total))))
+
+    entries = []
+    for position, (pk, _, _, _) in enumerate(articles):
+        own = term_ids[starts[position]:starts[position + 1]]
+        others, dots = index.dots(own[followed[own]], squared)
+        scores = catalog.similarity(position, others, dots) * catalog.recency[others]
+        entries.append(RelatedArticles(
+            article_id=pk, related=top_related(catalog.ids[others], scores), norm=float(norms[position]),
+        ))
+
+    with transaction.atomic():
+        RelatedTerm.objects.all().delete()
+        RelatedTerm.objects.bulk_create(
+            (RelatedTerm(article_id=pk, term=term) for pk, terms, _, _ in articles for term in terms),
+            batch_size=1000,
+        )
+        RelatedArticles.objects.all().delete()
+        RelatedArticles.objects.bulk_create(entries, batch_size=1000)
+    return total
+
+
+def refresh_related(ids):
+    """
+    Re-indexes the articles in ``ids`` (saved, unpublished or deleted)
+    without a table scan: their terms are replaced, their lists recomputed
+    against the articles sharing a term, and those articles' lists take
+    them in or out where their score changed. Document frequencies are
+    current; other articles' vector lengths are as of their last refresh,
+    and lists still naming articles that no longer share a term keep them
+    until the next rebuild (reads skip unpublished ones).
+    """
+    ids = set(ids)
+    with transaction.atomic():
+        articles = load_articles(Article.objects.filter(pk__in=ids))
+        RelatedTerm.objects.filter(article_id__in=ids).delete()
+        RelatedArticles.objects.filter(article_id__in=ids).delete()
+        RelatedTerm.objects.bulk_create(
+            [RelatedTerm(article_id=pk, term=term) for pk, terms, _, _ in articles for term in terms],
+            batch_size=1000,
+        )
+        if not articles:
+            return
+        total = (estimated_table_rows(RelatedArticles) or RelatedArticles.objects.count()) + len(articles)
+
+        vocabulary = sorted(set().union(*(terms for _, terms, _, _ in articles)))
+        term_index = {term: index for index, term in enumerate(vocabulary)}
+        counts = dict(
+            RelatedTerm.objects.filter(term__in=vocabulary).values('term').annotate(n=Count('id')).values_list('term', 'n')
+        )
+        df = np.array([counts.get(term, 1) for term in vocabulary])
+        squared = term_weights(vocabulary, df, total) ** 2
+        followed = {term for term, common in zip(vocabulary, is_common(df, total)) if not common}
+        pairs = list(RelatedTerm.objects.filter(term__in=followed).values_list('article_id', 'term'))
+
+        refreshed = {pk for pk, _, _, _ in articles}
+        others = list(
+            Article.objects.filter(pk__in={pk for pk, _ in pairs} - refreshed, is_published=True, related_articles__isnull=False)
+            .values_list('id', 'category_id', 'published_at', 'updated_at', 'related_articles__norm', 'related_articles__related')
+        )
+        catalog = Catalog(
+            [pk for pk, _, _, _ in articles] + [row[0] for row in others],
+            [category for _, _, category, _ in articles] + [row[1] for row in others],
+            [timestamp for _, _, _, timestamp in articles] + [(row[2] or row[3]).timestamp() for row in others],
+            [np.sqrt(squared[[term_index[term] for term in terms]].sum()) for _, terms, _, _ in articles]
+            + [row[4] for row in others],
+        )
+        position_of = {pk: position for position, pk in enumerate(catalog.ids.tolist())}
+        known = [(position_of[pk], term_index[term]) for pk, term in pairs if pk in position_of]
+        index = TermIndex([p for p, _ in known], [t for _, t in known], len(vocabulary))
+        lists = {row[0]: row[5] for row in others}
+        changed = set()
+
+        entries = []
+        for position, (pk, terms, _, _) in enumerate(articles):
+            own = [term_index[term] for term in terms if term in followed]
+            positions, dots = index.dots(own, squared)
+            similarity = catalog.similarity(position, positions, dots)
+            entries.append(RelatedArticles(
+                article_id=pk,
+                related=top_related(catalog.ids[positions], similarity * catalog.recency[positions]),
+                norm=float(catalog.norms[position]),
+            ))
+            for other, score in zip(positions.tolist(), (similarity * catalog.recency[position]).tolist()):
+                other_pk = int(catalog.ids[other])
+                if other_pk in lists and merge_related(lists, other_pk, pk, score):
+                    changed.add(other_pk)
+
+        RelatedArticles.objects.bulk_create(entries, batch_size=1000)
+        RelatedArticles.objects.bulk_update(
+            [RelatedArticles(article_id=pk, related=lists[pk]) for pk in changed], ['related'], batch_size=1000,
+        )
+
+
+def merge_related(lists, pk, related_pk, score):
+    """Puts ``related_pk`` at its ``score`` in the list of ``pk``; returns whether it changed."""
+    current = lists[pk]
+    entries = [entry for entry in current if entry[0] != related_pk]
+    if score > 0:
+        entries.append([related_pk, round(score, 4)])
+        entries.sort(key=lambda entry: (-entry[1], entry[0]))
+        entries = entries[:RELATED_COUNT]
+    if entries == current:
+        return False
+    lists[pk] = entries
+    return True
+
+
+def _refresh_in_background():
+    global _refresh_queued
+    with _refresh_lock:
+        ids = set(_pending_ids)
+        _pending_ids.clear()
+        _refresh_queued = False
+    close_old_connections()
+    try:
+        refresh_related(ids)
+    except Exception:
+        # Lists of these ids stay as they were until the next save or rebuild
+        logger.exception(
+            "Related articles refresh failed",
+            extra={"view": None, "method": None, "path": None, "status_code": None},
+        )
+    finally:
+        close_old_connections()
+
+
+def refresh_related_async(ids):
+    """
+    Refreshes ``ids`` off the request path. Ids saved while a refresh is
+    queued join it, so a burst of saves costs one refresh per batch rather
+    than one per writer.
+    """
+    global _refresh_executor, _refresh_queued
+    with _refresh_lock:
+        _pending_ids.update(ids)
+        if _refresh_queued:
+            return
+        _refresh_queued = True
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='related-refresh')
+    _refresh_executor.submit(_refresh_in_background)
+
+
+def refresh_related_on_commit(ids):
+    ids = list(ids)
+    transaction.on_commit(lambda: refresh_related_async(ids))
+
+
+def get_related(article_id):
+    """``[[id, score], ...]`` for an article, or None when it has no entry."""
+    return RelatedArticles.objects.filter(article_id=article_id).values_list('related', flat=True).first()
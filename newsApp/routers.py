@@ -0,0 +1,171 @@
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICAS = list(getattr(settings, 'NEWS_DB_REPLICAS', ()))
+# Longer than the replicas usually lag behind the primary
+PIN_SECONDS = getattr(settings, 'NEWS_DB_PIN_SECONDS', 5)
+
+PIN_COOKIE = 'news_db_pin'
+PIN_KEY = 'news:db:pin:user:{}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current = contextvars.ContextVar('news_db_routing', default=None)
+
+
+class RoutingState:
+    """
+    Where the current request reads from. Mutated rather than replaced so
+    writes made in ``sync_to_async`` threads are seen by the request.
+    """
+    __slots__ = ('replica', 'pinned', 'wrote', 'user_id')
+
+    def __init__(self, replica, pinned):
+        self.replica = replica
+        self.pinned = pinned
+        self.wrote = False
+        self.user_id = None
+
+
+def pin_user_reads(user_id):
+    """
+    Called by authentication with the token's user: a user who wrote
+    within ``NEWS_DB_PIN_SECONDS`` keeps reading from the primary, for
+    clients that do not send the pin cookie back.
+    """
+    state = _current.get()
+    if state is None:
+        return
+    state.user_id = user_id
+    if not state.pinned and cache.get(PIN_KEY.format(user_id)):
+        state.pinned = True
+
+
+def reads_replica():
+    state = _current.get()
+    return state is not None and not (state.pinned or state.wrote)
+
+
+def replica_may_lag(changed_at):
+    """
+    Whether the current request reads from a replica that may not have
+    replayed a write made at ``changed_at`` (a timestamp) yet. Results read
+    then must not be cached past the request.
+    """
+    return reads_replica() and time.time() - changed_at < PIN_SECONDS
+
+
+def request_read_database():
+    """
+    The database the current request reads from. Streamed responses are
+    iterated after ``ReplicaRoutingMiddleware`` has returned, when reads
+    would go to the primary, so their querysets are bound to this first.
+    """
+    return ReplicaRouter().db_for_read(None)
+
+
+@contextmanager
+def primary_reads():
+    """Reads inside the block go to the primary, for data cached past the request."""
+    state = _current.get()
+    if state is None or state.pinned:
+        yield
+        return
+    state.pinned = True
+    try:
+        yield
+    finally:
+        state.pinned = False
+
+
+class ReplicaRouter:
+    """
+    Sends reads of safe-method requests to the request's replica and
+    everything else to the primary: writes, reads of unsafe requests or
+    after a write in the same request, reads inside a transaction, clients
+    pinned after a recent write, and anything outside a request (commands,
+    on-commit hooks of writes), which must see its own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not reads_replica() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return _current.get().replica
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary through replication
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Picks a replica for each request and, after a request that wrote, pins
+    the client to the primary for ``NEWS_DB_PIN_SECONDS`` (cookie, and the
+    authenticated user's id) so it reads its own writes. Does nothing when
+    no replicas are configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not REPLICAS:
+            return self.get_response(request)
+        state = self.routing_state(request)
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if state.wrote:
+            self.pin(response)
+            if state.user_id is not None:
+                cache.set(PIN_KEY.format(state.user_id), True, PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not REPLICAS:
+            return await self.get_response(request)
+        state = self.routing_state(request)
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        if state.wrote:
+            self.pin(response)
+            if state.user_id is not None:
+                await cache.aset(PIN_KEY.format(state.user_id), True, PIN_SECONDS)
+        return response
+
+    def routing_state(self, request):
+        pinned = request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+        return RoutingState(random.choice(REPLICAS), pinned)
+
+    def pin(self, response):
+        response.set_cookie(PIN_COOKIE, '1', max_age=PIN_SECONDS, httponly=True, samesite='Lax')
@@ -0,0 +1,129 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.response import Response
+
+# Fields whose to_representation returns the column value unchanged (exact
+# types: subclasses may override it)
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+    serializers.JSONField, serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField, serializers.SlugField,
+)
+
+
+class RowConverter:
+    """
+    ``serializer.to_representation`` precompiled for ``.values()`` rows.
+
+    Every rendered field becomes a ``(name, column, convert, relation)``
+    entry: the ``.values()`` key it reads (``category__name`` for
+    ``category.name``), the field's ``to_representation`` or None where that
+    returns the value unchanged, and for fields read through a relation its
+    foreign key column. Like the serializer, None renders as None without
+    conversion, and a field whose relation is empty is left out.
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        columns = [column for _, column, _, _ in plan]
+        columns += [relation for _, _, _, relation in plan if relation is not None]
+        self.columns = list(dict.fromkeys(columns))
+
+    def __call__(self, row):
+        data = {}
+        for name, column, convert, relation in self.plan:
+            if relation is not None and row[relation] is None:
+                continue
+            value = row[column]
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+    @classmethod
+    def compile(cls, serializer_class, fields=None):
+        """
+        The converter for ``serializer_class`` limited to ``fields``, or None
+        when a field cannot be read from a column (``source='*'``, methods,
+        reverse or many-to-many relations).
+        """
+        serializer = serializer_class(fields=fields) if fields is not None else serializer_class()
+        model = serializer.Meta.model
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            parts = field.source.split('.')
+            if field.source == '*' or len(parts) > 2:
+                return None
+            try:
+                model_field = model._meta.get_field(parts[0])
+            except FieldDoesNotExist:
+                return None
+            if model_field.many_to_many or model_field.one_to_many:
+                return None
+            relation = None
+            if len(parts) == 2:
+                if not model_field.many_to_one:
+                    return None
+                try:
+                    model_field.related_model._meta.get_field(parts[1])
+                except FieldDoesNotExist:
+                    return None
+                # Without a related object the serializer skips the field
+                # only when it has no default, is not nullable and optional
+                if field.default is not empty or field.allow_null or field.required:
+                    return None
+                relation = parts[0]
+            elif model_field.is_relation and not isinstance(field, serializers.PrimaryKeyRelatedField):
+                return None
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is not None:
+                return None
+            convert = None if type(field) in PASSTHROUGH_FIELDS else field.to_representation
+            plan.append((name, '__'.join(parts), convert, relation))
+        return cls(tuple(plan))
+
+
+@lru_cache(maxsize=128)
+def get_row_converter(serializer_class, fields=None):
+    return RowConverter.compile(serializer_class, list(fields) if fields is not None else None)
+
+
+class ValuesListMixin:
+    """
+    Fast read path for list views: rows are fetched with ``.values()`` and
+    turned into dicts by a ``RowConverter`` compiled once per serializer and
+    field subset, instead of a serializer building field objects per row.
+    Responses are the same bytes as the serializer's (see tests).
+
+    Views return None from ``get_row_converter`` where the serializer must
+    run (e.g. search results, which annotate the model instances).
+    """
+
+    def get_row_converter(self):
+        if self.request.method != 'GET':
+            return None
+        fields = self.get_requested_fields()
+        return get_row_converter(self.get_serializer_class(), tuple(fields) if fields is not None else None)
+
+    def values_queryset(self, queryset):
+        converter = self.get_row_converter()
+        if converter is None:
+            return queryset
+        # Pagination reads the keyset and ordering columns from the rows
+        loaded = sorted(self.get_loaded_fields() - set(converter.columns))
+        return queryset.values(*converter.columns, *loaded)
+
+    def serialize_rows(self, rows):
+        """Rows of ``values_queryset`` (or model instances) as response data."""
+        converter = self.get_row_converter()
+        if converter is None:
+            return self.get_serializer(rows, many=True).data
+        return [converter(row) for row in rows]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.values_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_rows(page))
+        return Response(self.serialize_rows(queryset))
@@ -0,0 +1,330 @@
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, When
+from django.utils.html import escape, strip_tags
+from django.utils.module_loading import import_string
+
+from .models import Article, ArticleSearchDocument
+
+MAX_RESULTS = getattr(settings, 'NEWS_SEARCH_MAX_RESULTS', 1000)
+
+# Word characters plus the Devanagari block, whose vowel signs \w would split on
+TOKEN_RE = re.compile(r'[\w\u0900-\u097f]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its of on or
+that the their this to was were will with
+""".split())
+
+# Relative weight of a term occurrence in each field
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'related_keywords': 2.0,
+    'summary': 1.5,
+    'content': 1.0,
+}
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def article_fields(article):
+    """Plain-text value of every searchable field of an article."""
+    return {
+        'title': article.title or '',
+        'related_keywords': ' '.join(str(kw) for kw in article.related_keywords or []),
+        'summary': strip_tags(article.summary or ''),
+        'content': strip_tags(article.content or ''),
+    }
+
+
+def highlight(text, terms, max_length=200):
+    """
+    HTML-escaped snippet of ``text`` around the first matching term, with
+    every match wrapped in ``<mark>``. Returns None when nothing matches.
+    """
+    if not text or not terms:
+        return None
+    pattern = re.compile(
+        r'(?<![\w\u0900-\u097f])(%s)(?![\w\u0900-\u097f])' % '|'.join(re.escape(t) for t in terms),
+        re.IGNORECASE,
+    )
+    match = pattern.search(text)
+    if match is None:
+        return None
+
+    start = max(0, match.start() - max_length // 4)
+    end = min(len(text), start + max_length)
+    snippet = text[start:end]
+
+    parts = []
+    position = 0
+    for m in pattern.finditer(snippet):
+        parts.append(escape(snippet[position:m.start()]))
+        parts.append(f'<mark>{escape(m.group(0))}</mark>')
+        position = m.end()
+    parts.append(escape(snippet[position:]))
+
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if end < len(text) else ''
+    return prefix + ''.join(parts) + suffix
+
+
+def article_highlights(article, query):
+    terms = tokenize(query)
+    fields = article_fields(article)
+    highlights = {}
+    for field in FIELD_WEIGHTS:
+        snippet = highlight(fields[field], terms)
+        if snippet:
+            highlights[field] = snippet
+    return highlights
+
+
+class BaseSearchBackend:
+    def index(self, article):
+        raise NotImplementedError
+
+    def index_many(self, articles):
+        for article in articles:
+            self.index(article)
+
+    def remove(self, article_id):
+        raise NotImplementedError
+
+    def search(self, query, limit=MAX_RESULTS):
+        """
+        Returns ``[(article_id, score), ...]`` ordered by descending score,
+        at most ``limit`` of them (all of them when ``limit`` is None).
+        """
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+
+class InMemorySearchBackend(BaseSearchBackend):
+    """
+    Pure-Python inverted index with BM25 ranking, for sqlite and tests.
+
+    The index lives in process memory and is built from the database on
+    first use; signals keep it current for writes made by this process.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        self._doc_lengths = {}
+
+    def _document(self, article):
+        weights = defaultdict(float)
+        for field, text in article_fields(article).items():
+            for token in tokenize(text):
+                weights[token] += FIELD_WEIGHTS[field]
+        return weights
+
+    def _add(self, article_id, weights):
+        for term, weight in weights.items():
+            self._postings[term][article_id] = weight
+        self._doc_terms[article_id] = set(weights)
+        self._doc_lengths[article_id] = sum(weights.values())
+
+    def _discard(self, article_id):
+        for term in self._doc_terms.pop(article_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(article_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._doc_lengths.pop(article_id, None)
+
+    def index(self, article):
+        if not self._built:
+            return
+        weights = self._document(article)
+        with self._lock:
+            self._discard(article.pk)
+            self._add(article.pk, weights)
+
+    def remove(self, article_id):
+        if not self._built:
+            return
+        with self._lock:
+            self._discard(article_id)
+
+    def rebuild(self):
+        documents = [
+            (article.pk, self._document(article))
+            for article in Article.objects.only(*FIELD_WEIGHTS).iterator(chunk_size=500)
+        ]
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._doc_terms = {}
+            self._doc_lengths = {}
+            for article_id, weights in documents:
+                self._add(article_id, weights)
+            self._built = True
+
+    def search(self, query, limit=MAX_RESULTS):
+        if not self._built:
+            self.rebuild()
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        scores = defaultdict(float)
+        with self._lock:
+            total = len(self._doc_lengths)
+            if not total:
+                return []
+            average_length = sum(self._doc_lengths.values()) / total
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for article_id, tf in postings.items():
+                    norm = 1 - self.b + self.b * self._doc_lengths[article_id] / average_length
+                    scores[article_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:limit]
+
+
+class MySQLFulltextSearchBackend(BaseSearchBackend):
+    """
+    Ranks with InnoDB FULLTEXT indexes over ``ArticleSearchDocument``, which
+    holds the tokenized text of every article (title and keywords in
+    ``title``, summary and content in ``body``).
+    """
+    title_boost = 2
+
+    def _document_values(self, article):
+        fields = article_fields(article)
+        return {
+            'title': ' '.join(tokenize(f"{fields['title']} {fields['related_keywords']}")),
+            'body': ' '.join(tokenize(f"{fields['summary']} {fields['content']}")),
+        }
+
+    def index(self, article):
+        ArticleSearchDocument.objects.update_or_create(
+            article_id=article.pk, defaults=self._document_values(article)
+        )
+
+    def index_many(self, articles):
+        ArticleSearchDocument.objects.bulk_create(
+            [ArticleSearchDocument(article_id=article.pk, **self._document_values(article)) for article in articles],
+            batch_size=500,
+            update_conflicts=True,
+            update_fields=['title', 'body'],
+        )
+
+    def remove(self, article_id):
+        ArticleSearchDocument.objects.filter(article_id=article_id).delete()
+
+    def rebuild(self):
+        with transaction.atomic():
+            ArticleSearchDocument.objects.all().delete()
+            batch = []
+            for article in Article.objects.only(*FIELD_WEIGHTS).iterator(chunk_size=500):
+                batch.append(ArticleSearchDocument(article_id=article.pk, **self._document_values(article)))
+                if len(batch) >= 500:
+                    ArticleSearchDocument.objects.bulk_create(batch)
+                    batch = []
+            ArticleSearchDocument.objects.bulk_create(batch)
+
+    def search(self, query, limit=MAX_RESULTS):
+        terms = ' '.join(tokenize(query))
+        if not terms:
+            return []
+        table = ArticleSearchDocument._meta.db_table
+        sql = (
+            f"SELECT article_id, "
+            f"MATCH(title) AGAINST (%s) * %s + MATCH(body) AGAINST (%s) AS score "
+            f"FROM {table} WHERE MATCH(title, body) AGAINST (%s) "
+            f"ORDER BY score DESC, article_id DESC"
+        )
+        params = [terms, self.title_boost, terms, terms]
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [(article_id, float(score)) for article_id, score in cursor.fetchall()]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """
+    Backend named by ``NEWS_SEARCH_BACKEND``, or FULLTEXT on MySQL and the
+    in-memory index everywhere else.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'NEWS_SEARCH_BACKEND', None)
+                if path:
+                    _backend = import_string(path)()
+                elif connection.vendor == 'mysql':
+                    _backend = MySQLFulltextSearchBackend()
+                else:
+                    _backend = InMemorySearchBackend()
+    return _backend
+
+
+class FullTextSearchFilter:
+    """
+    Filter backend for ``?q=``: restricts the queryset to indexed matches and,
+    unless the client asked for another ordering, orders them by relevance.
+    Scores are left on ``view.search_scores`` for the response.
+
+    Only the ``NEWS_SEARCH_MAX_RESULTS`` best matches are kept, so a page
+    past that rank comes back empty and ``total_items`` stops there. Views
+    that need every match (exports) set ``search_max_results = None``.
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+
+        ranked = get_search_backend().search(query, limit=getattr(view, 'search_max_results', MAX_RESULTS))
+        view.search_query = query
+        view.search_scores = dict(ranked)
+        queryset = queryset.filter(pk__in=view.search_scores)
+
+        if ranked and not request.query_params.get('ordering'):
+            queryset = queryset.order_by(
+                Case(*[When(pk=pk, then=rank) for rank, (pk, _) in enumerate(ranked)]),
+                '-pk',
+            )
+        return queryset
+
+
+def add_search_metadata(view, articles, data):
+    """Adds ``score`` and ``highlights`` to serialized search results."""
+    scores = getattr(view, 'search_scores', None)
+    if scores is None:
+        return data
+    for article, item in zip(articles, data):
+        item['score'] = round(scores.get(article.pk, 0.0), 4)
+        item['highlights'] = article_highlights(article, view.search_query)
+    return data
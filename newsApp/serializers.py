@@ -1,18 +1,43 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Category, Article
 from rest_framework.validators import UniqueValidator
 from django.contrib.auth.password_validation import validate_password
+from .images import banner_variants
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Accepts an optional ``fields`` argument naming the subset of fields to
+    render (``?fields=`` sparse fieldsets).
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class BannerVariantsField(serializers.ReadOnlyField):
+    """Resized WebP/JPEG URLs of an uploaded image, or None until they are rendered."""
+
+    def to_representation(self, value):
+        return banner_variants(value)
+
+
+class ArticleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
+    banner_variants = BannerVariantsField()
+    secondary_banner_variants = BannerVariantsField()
     title = serializers.CharField(
         required=True,
         validators=[UniqueValidator(queryset=Article.objects.all())]
@@ -22,11 +47,70 @@ class ArticleSerializer(serializers.ModelSerializer):
         model = Article
         fields = [
             'id', 'title', 'slug', 'author', 'category', 'category_name', 'related_keywords', 'summary', 'content', 'banner_image',
-            'secondary_banner_image', 'secondary_content', 'is_published', 'published_at', 'tag', 'created_at', 'updated_at'
+            'banner_variants', 'secondary_banner_image', 'secondary_banner_variants', 'secondary_content', 'is_published', 'published_at', 'tag', 'created_at', 'updated_at'
+        ]
+
+
+class TrendingArticleSerializer(ArticleSerializer):
+    """Articles of the trending endpoint, which also show their view counts."""
+
+    class Meta(ArticleSerializer.Meta):
+        fields = ArticleSerializer.Meta.fields + ['view_count']
+
+
+# Feed-card representation used by ?view=compact: no article bodies
+ARTICLE_COMPACT_FIELDS = [
+    'id', 'title', 'slug', 'author', 'category', 'category_name', 'summary', 'banner_image',
+    'banner_variants', 'is_published', 'published_at', 'tag', 'updated_at'
+]
+
+ARTICLE_TRENDING_FIELDS = ARTICLE_COMPACT_FIELDS + ['view_count']
+
+# Columns the compact fields never read
+ARTICLE_COMPACT_DEFERRED_FIELDS = (
+    'content', 'secondary_content', 'secondary_banner_image', 'secondary_banner_variants', 'related_keywords'
+)
+
+class ArticleIngestSerializer(serializers.ModelSerializer):
+    """
+    Per-row validation for bulk ingest. Uniqueness and category existence
+    are checked set-based per batch, so no field here queries the database.
+    """
+    title = serializers.CharField(max_length=255)
+    category = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Article
+        fields = [
+            'title', 'author', 'category', 'related_keywords', 'summary', 'content', 'banner_image',
+            'secondary_banner_image', 'secondary_content', 'is_published', 'published_at', 'tag'
         ]
 
+
+class KeywordFrequencySerializer(serializers.Serializer):
+    keyword = serializers.CharField()
+    count = serializers.IntegerField()
+
+
 class FileUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
+
+
+class PresignedUploadSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    method = serializers.ChoiceField(choices=['post', 'put'], default='post')
+
+    def validate_size(self, value):
+        limit = settings.NEWS_UPLOAD_MAX_BYTES
+        if value > limit:
+            raise serializers.ValidationError(f"Uploads are limited to {limit} bytes")
+        return value
+
+
+class CompleteUploadSerializer(serializers.Serializer):
+    token = serializers.CharField()
     
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,213 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .authentication import invalidate_cached_user
+from .cache import bump_generation_on_commit
+from .events import article_event_type, publish_article_event_on_commit, was_published
+from .feeds import feed_categories, invalidate_category_feeds, update_feeds_on_commit
+from .home import rebuild_home_snapshot_on_commit, shows_article, shows_category
+from .images import IMAGE_FIELDS, attach_variants, variants_rendered
+from .keywords import sync_article_keywords, sync_keywords_bulk
+from .metrics import install_query_recorder
+from .models import Article, Category
+from .related import refresh_related_on_commit
+from .search import FIELD_WEIGHTS, get_search_backend
+from .slugs import record_slug_change
+from .storage import object_url
+
+# Sent after bulk_create/bulk_update of articles, which bypass post_save.
+# Receivers get ``articles``: the saved instances, with primary keys set.
+# Senders that know them also pass ``fields`` (the names written) and
+# ``previously_published`` (id -> is_published before the write).
+articles_bulk_saved = Signal()
+
+
+@receiver([post_save, post_delete], sender=Article)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_response_cache(sender, **kwargs):
+    bump_generation_on_commit(sender)
+
+
+@receiver(post_save, sender=Article)
+def index_article(sender, instance, **kwargs):
+    transaction.on_commit(lambda: get_search_backend().index(instance))
+
+
+@receiver(post_delete, sender=Article)
+def unindex_article(sender, instance, **kwargs):
+    article_id = instance.pk
+    transaction.on_commit(lambda: get_search_backend().remove(article_id))
+
+
+@receiver(post_save, sender=Article)
+def sync_keywords(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'related_keywords' not in update_fields:
+        return
+    sync_article_keywords(instance)
+
+
+@receiver(articles_bulk_saved)
+def articles_bulk_saved_cache(sender, articles, **kwargs):
+    bump_generation_on_commit(Article)
+
+
+@receiver(articles_bulk_saved)
+def articles_bulk_saved_search(sender, articles, fields=None, **kwargs):
+    if fields is not None and not set(fields) & set(FIELD_WEIGHTS):
+        return
+    transaction.on_commit(lambda: get_search_backend().index_many(articles))
+
+
+@receiver(articles_bulk_saved)
+def articles_bulk_saved_keywords(sender, articles, fields=None, **kwargs):
+    if fields is not None and 'related_keywords' not in fields:
+        return
+    sync_keywords_bulk(articles)
+
+
+@receiver([post_save, post_delete], sender=Article)
+def refresh_home_snapshot(sender, instance, **kwargs):
+    # Drafts that are not on the homepage cannot change it
+    if shows_article(instance):
+        rebuild_home_snapshot_on_commit()
+
+
+@receiver([post_save, post_delete], sender=Category)
+def refresh_home_snapshot_category(sender, instance, **kwargs):
+    if shows_category(instance):
+        rebuild_home_snapshot_on_commit()
+
+
+@receiver(articles_bulk_saved)
+def articles_bulk_saved_home(sender, articles, **kwargs):
+    if any(shows_article(article) for article in articles):
+        rebuild_home_snapshot_on_commit()
+
+
+@receiver([post_save, post_delete], sender=Article)
+def refresh_hot_feeds(sender, instance, created=False, **kwargs):
+    update_feeds_on_commit([instance.pk], feed_categories([instance], created))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_hot_feeds(sender, instance, created=False, **kwargs):
+    if not created:
+        invalidate_category_feeds(instance.pk)
+
+
+@receiver(articles_bulk_saved)
+def articles_bulk_saved_feeds(sender, articles, **kwargs):
+    update_feeds_on_commit((article.pk for article in articles), feed_categories(articles))
+
+
+# Fields the related-articles index reads
+RELATED_FIELDS = {'title', 'related_keywords', 'category', 'category_id', 'is_published', 'published_at'}
+
+
+@receiver([post_save, post_delete], sender=Article)
+def refresh_related_articles(sender, instance, update_fields=None, **kwargs):
+    # Drafts that were never published are not in the index
+    if not instance.is_published and not getattr(instance, '_was_published', True):
+        return
+    if update_fields is not None and not set(update_fields) & RELATED_FIELDS:
+        return
+    refresh_related_on_commit([instance.pk])
+
+
+@receiver(articles_bulk_saved)
+def articles_bulk_saved_related(sender, articles, fields=None, previously_published=None, **kwargs):
+    if fields is not None and not set(fields) & RELATED_FIELDS:
+        return
+    ids = [
+        article.pk for article in articles
+        if article.is_published or previously_published is None or previously_published.get(article.pk)
+    ]
+    if ids:
+        refresh_related_on_commit(ids)
+
+
+@receiver(pre_save, sender=Article)
+def remember_publication_state(sender, instance, **kwargs):
+    # post_save cannot tell a publish from an update of a published article;
+    # loaded and saved instances know without a query (see was_published)
+    instance._was_published = was_published(instance)
+
+
+@receiver(post_save, sender=Article)
+def push_article_event(sender, instance, **kwargs):
+    previously = getattr(instance, '_was_published', False)
+    publish_article_event_on_commit(instance, article_event_type(instance, previously))
+
+
+@receiver(post_delete, sender=Article)
+def push_article_removed_event(sender, instance, **kwargs):
+    publish_article_event_on_commit(instance, article_event_type(instance, instance.is_published, deleted=True))
+
+
+@receiver(articles_bulk_saved)
+def articles_bulk_saved_events(sender, articles, previously_published=None, **kwargs):
+    # Without the previous state, report published rows as updates and
+    # drafts as removals, which clients ignore for unseen ids
+    for article in articles:
+        previously = True if previously_published is None else previously_published.get(article.pk, False)
+        publish_article_event_on_commit(article, article_event_type(article, previously))
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    # Covers UserAPIView.patch as well as admin edits
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Category)
+def redirect_old_slug(sender, instance, **kwargs):
+    record_slug_change(instance)
+
+
+@receiver(articles_bulk_saved)
+def articles_bulk_saved_slugs(sender, articles, **kwargs):
+    for article in articles:
+        record_slug_change(article)
+
+
+@receiver(pre_save, sender=Article)
+def attach_image_variants(sender, instance, update_fields=None, **kwargs):
+    # Images rendered before the article pointed at them
+    if update_fields is None:
+        attach_variants([instance])
+
+
+@receiver(articles_bulk_saved)
+def articles_bulk_saved_variants(sender, articles, fields=None, **kwargs):
+    if fields is not None and not set(fields) & set(IMAGE_FIELDS):
+        return
+    changed = attach_variants(articles)
+    if changed:
+        Article.objects.bulk_update(changed, list(IMAGE_FIELDS.values()))
+
+
+@receiver(variants_rendered)
+def link_rendered_variants(sender, key, variants, **kwargs):
+    # Articles saved while the variants were still rendering
+    url = object_url(key)
+    ids, category_ids = set(), set()
+    for image_field, variants_field in IMAGE_FIELDS.items():
+        articles = Article.objects.filter(**{image_field: url})
+        for pk, category_id in articles.values_list('id', 'category_id'):
+            ids.add(pk)
+            category_ids.add(category_id)
+        articles.update(**{variants_field: variants})
+    if ids:
+        category_ids.discard(None)
+        bump_generation_on_commit(Article)
+        update_feeds_on_commit(ids, category_ids)
+        rebuild_home_snapshot_on_commit()
+
+
+@receiver(connection_created)
+def record_request_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
@@ -0,0 +1,63 @@
+from django.http import HttpResponsePermanentRedirect
+from django.urls import reverse
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from .models import Article, ArticleSlugRedirect, Category, CategorySlugRedirect
+
+# model: (redirect model, its foreign key to the model)
+REDIRECT_MODELS = {
+    Article: (ArticleSlugRedirect, 'article'),
+    Category: (CategorySlugRedirect, 'category'),
+}
+
+
+def resolve_slug(queryset, slug):
+    """
+    ``(object, None)`` for a live slug, ``(None, current_slug)`` for an old
+    slug of a renamed object, and ``(None, None)`` for an unknown one.
+    """
+    obj = queryset.filter(slug=slug).first()
+    if obj is not None:
+        return obj, None
+
+    redirect_model, field = REDIRECT_MODELS[queryset.model]
+    current = redirect_model.objects.filter(slug=slug).values_list(f'{field}__slug', flat=True).first()
+    return None, current
+
+
+def record_slug_change(instance):
+    """
+    After ``save()`` regenerated the slug of a loaded object: its old slug
+    redirects to it, and a redirect that the new slug would shadow is
+    dropped. Objects not loaded from the database have no old slug.
+    """
+    old, new = getattr(instance, '_loaded_slug', None), instance.slug
+    instance._loaded_slug = new
+    if old == new or old is None:
+        return
+
+    model = type(instance)
+    redirect_model, field = REDIRECT_MODELS[model]
+    if new:
+        redirect_model.objects.filter(slug=new).delete()
+    redirect_model.objects.update_or_create(slug=old, defaults={field: instance})
+
+
+class SlugRetrieveMixin:
+    """
+    Retrieve by ``slug`` with one unique-index lookup. Old slugs of renamed
+    objects answer 301 to the current URL (``slug_url_name``).
+    """
+    slug_url_name = None
+
+    def retrieve(self, request, *args, **kwargs):
+        instance, current = resolve_slug(self.filter_queryset(self.get_queryset()), kwargs['slug'])
+        if instance is None:
+            if current is None:
+                raise NotFound(f"No {self.get_queryset().model._meta.object_name} matches the given query.")
+            url = reverse(self.slug_url_name, kwargs={'slug': current})
+            query = request.META.get('QUERY_STRING')
+            return HttpResponsePermanentRedirect(f'{url}?{query}' if query else url)
+        self.check_object_permissions(request, instance)
+        return Response(self.get_serializer(instance).data)
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+
+logger = logging.getLogger("app")
+
+MB = 1024 * 1024
+
+_client = None
+_client_lock = threading.Lock()
+_verify_executor = None
+
+
+def get_s3_client():
+    """
+    Process-wide S3 client. boto3 clients are thread-safe, so one client
+    (and its urllib3 connection pool with live TLS sessions) is shared by
+    every request instead of being built per upload.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = boto3.session.Session().client(
+                    's3',
+                    region_name=settings.AWS_S3_REGION_NAME,
+                    endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    config=Config(
+                        max_pool_connections=getattr(settings, 'AWS_S3_MAX_POOL_CONNECTIONS', 20),
+                        connect_timeout=getattr(settings, 'AWS_S3_CONNECT_TIMEOUT', 5),
+                        read_timeout=getattr(settings, 'AWS_S3_READ_TIMEOUT', 60),
+                        retries={'max_attempts': 3, 'mode': 'standard'},
+                        tcp_keepalive=True,
+                    ),
+                )
+    return _client
+
+
+def reset_s3_client():
+    """Drops the shared client, e.g. after settings change in tests."""
+    global _client
+    with _client_lock:
+        _client = None
+
+
+def get_transfer_config():
+    return TransferConfig(
+        multipart_threshold=getattr(settings, 'AWS_S3_MULTIPART_THRESHOLD', 8 * MB),
+        multipart_chunksize=getattr(settings, 'AWS_S3_MULTIPART_CHUNKSIZE', 8 * MB),
+        max_concurrency=getattr(settings, 'AWS_S3_MAX_CONCURRENCY', 4),
+    )
+
+
+def object_url(key):
+    endpoint_url = settings.AWS_S3_ENDPOINT_URL.rstrip('/')
+    return f"{endpoint_url}/{settings.AWS_STORAGE_BUCKET_NAME}/{key}"
+
+
+class PhaseTimer:
+    """Collects wall-clock milliseconds per named phase."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def server_timing(self):
+        return ', '.join(f'{name};dur={duration}' for name, duration in self.timings.items())
+
+
+def verify_upload(key):
+    get_s3_client().head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+
+
+def _verify_in_background(key):
+    try:
+        verify_upload(key)
+    except Exception:
+        logger.exception(
+            "Upload verification failed",
+            extra={"view": "FileUploadView", "method": None, "path": key, "status_code": None},
+        )
+
+
+def verify_upload_async(key):
+    global _verify_executor
+    if _verify_executor is None:
+        with _client_lock:
+            if _verify_executor is None:
+                _verify_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='s3-verify')
+    return _verify_executor.submit(_verify_in_background, key)
+
+
+def upload_file(fileobj, key, content_type, timer=None):
+    """
+    Uploads ``fileobj`` with the shared client, switching to multipart
+    uploads above ``AWS_S3_MULTIPART_THRESHOLD``.
+
+    ``AWS_S3_VERIFY_UPLOADS`` picks the ``head_object`` check: ``sync``
+    (fail the upload if the object is missing), ``async`` (check off the
+    request path and log failures) or ``off``.
+    """
+    timer = timer or PhaseTimer()
+    with timer.phase('client'):
+        client = get_s3_client()
+    with timer.phase('upload'):
+        client.upload_fileobj(
+            fileobj,
+            settings.AWS_STORAGE_BUCKET_NAME,
+            key,
+            ExtraArgs={'ACL': 'public-read', 'ContentType': content_type},
+            Config=get_transfer_config(),
+        )
+
+    mode = getattr(settings, 'AWS_S3_VERIFY_UPLOADS', 'async')
+    if mode == 'sync':
+        with timer.phase('verify'):
+            verify_upload(key)
+    elif mode == 'async':
+        verify_upload_async(key)
+    return object_url(key)
+
+
+def presign_upload(key, content_type, size, method='post', expires_in=None):
+    """
+    Presigned request that lets a client upload ``key`` straight to the
+    bucket. POST policies enforce the exact size and content type; PUT URLs
+    sign the content type and length, so the client must send the returned
+    headers; completion re-checks both either way.
+    """
+    client = get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    expires_in = expires_in or getattr(settings, 'NEWS_PRESIGNED_UPLOAD_EXPIRY', 900)
+
+    if method == 'put':
+        headers = {'Content-Type': content_type, 'Content-Length': str(size), 'x-amz-acl': 'public-read'}
+        url = client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': bucket, 'Key': key, 'ContentType': content_type,
+                'ContentLength': size, 'ACL': 'public-read',
+            },
+            ExpiresIn=expires_in,
+        )
+        return {'method': 'PUT', 'url': url, 'headers': headers, 'expires_in': expires_in}
+
+    post = client.generate_presigned_post(
+        bucket,
+        key,
+        Fields={'acl': 'public-read', 'Content-Type': content_type},
+        Conditions=[
+            {'acl': 'public-read'},
+            {'Content-Type': content_type},
+            ['content-length-range', size, size],
+        ],
+        ExpiresIn=expires_in,
+    )
+    return {'method': 'POST', 'url': post['url'], 'fields': post['fields'], 'expires_in': expires_in}
+
+
+def stored_object(key):
+    """``head_object`` metadata of ``key``, or None if it does not exist."""
+    try:
+        return get_s3_client().head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+    except ClientError as exc:
+        if exc.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
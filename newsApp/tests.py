@@ -1,3 +1,1398 @@
-from django.test import TestCase
+import asyncio
+import base64
+import io
+import json
+import re
+import threading
+import time
+from datetime import timedelta
+from unittest import addModuleCleanup, mock, skipIf
+
+from botocore.exceptions import ClientError
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from .authentication import USER_KEY, PartialUser
+from .benchmark.corpus import seed_corpus
+from .benchmark.runner import compare_runs, percentile, run_benchmark
+from .cache import GENERATION_KEY, CachedResponseMixin, bump_generation, get_generation
+from .counts import COUNT_CACHE_TIMEOUT, refresh_counts
+from .events import ARTICLE_PUBLISHED, ARTICLE_REMOVED, ARTICLE_UPDATED, get_event_broker, was_published
+from .export import ExportRateThrottle
+from .feeds import build_feed, feed_key, feed_lock, get_feed, store_feeds, update_feeds_on_commit
+from .home import (
+    HOME_KEY, HOME_LOCK_KEY, build_home_snapshot, get_home_snapshot, rebuild_home_snapshot, shows_article,
+)
+from .images import record_variants
+from .metrics import Histogram, reset_metrics
+from .ingest import ingest_articles
+from .models import Article, ArticleKeyword, ArticleSlugRedirect, Category, RelatedArticles
+from .related import _refresh_in_background, rebuild_related, refresh_related, refresh_related_async
+from .renderers import FastJSONRenderer, orjson
+from .routers import (
+    PIN_COOKIE, PIN_SECONDS, ReplicaRouter, ReplicaRoutingMiddleware, pin_user_reads, primary_reads, replica_may_lag,
+)
+from .rows import ValuesListMixin
+from .search import InMemorySearchBackend, highlight
+from .serializers import ARTICLE_COMPACT_DEFERRED_FIELDS, ARTICLE_COMPACT_FIELDS
+from .storage import (
+    PhaseTimer, get_s3_client, object_url, reset_s3_client, stored_object, upload_file, verify_upload_async,
+)
+from .trending import count_view, flush_views, stop_flush_timer, view_buffer, views_not_counted
+from .views import ArticleListCreateView
+
+try:
+    import requests
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+
+def setUpModule():
+    # A background refresh reads through another connection, which cannot see
+    # the rows of the test transaction; RelatedArticlesTests index explicitly
+    patcher = mock.patch('newsApp.related.refresh_related_async')
+    patcher.start()
+    addModuleCleanup(patcher.stop)
+
+
+class ValuesFastPathTests(TestCase):
+    """The .values() rows and the orjson renderer must not change a single byte."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.world = Category.objects.create(name='World')
+        cls.sports = Category.objects.create(name='Spörts')
+        record_variants('budget.jpg', {'card': {'webp': 'budget_card.webp', 'jpeg': 'budget_card.jpeg'}})
+        rows = [
+            dict(title='Budget passed', category=cls.world, is_published=True, tag='breaking_news',
+                 related_keywords=['budget', 'economy'], banner_image=object_url('budget.jpg')),
+            dict(title='Café réopens today', category=cls.world, author='Zoë', summary='“Quoted” <b>', tag='featured'),
+            dict(title='Final score', category=cls.sports, is_published=True, content='Line\nbreak\t\x01',
+                 banner_image='https://example.com/final.png', secondary_banner_image=object_url('x.webp')),
+            dict(title='Uncategorized', related_keywords=None, summary=''),
+            dict(title='Emoji 🎉', category=cls.sports, related_keywords=[{'nested': [1, 2.5, None, 1e-05, -3.5e-07]}]),
+        ]
+        for row in rows:
+            Article.objects.create(**row)
+
+    def setUp(self):
+        # Hot feeds would answer compact requests without either path
+        patcher = mock.patch('newsApp.feeds.HOT_FEED_SIZE', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch(self, url, fast=True):
+        cache.clear()
+        if fast:
+            response = self.client.get(url)
+        else:
+            with mock.patch.object(ValuesListMixin, 'get_row_converter', return_value=None):
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.content
+
+    def assertSameBytes(self, urls):
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.fetch(url), self.fetch(url, fast=False))
+
+    def test_article_lists_match_serializer(self):
+        self.assertSameBytes([
+            '/news/articles/',
+            '/news/articles/?page_size=2&page=2',
+            '/news/articles/?view=compact',
+            '/news/articles/?fields=title,category_name,banner_variants',
+            '/news/articles/?is_published=true&ordering=title',
+            '/news/articles/?pagination=cursor&page_size=2',
+            '/news/articles/?pagination=cursor&ordering=-published_at&page_size=1',
+            f'/news/categories/{self.world.pk}/articles/',
+            f'/news/categories/{self.sports.pk}/articles/?view=compact&pagination=cursor',
+            '/news/async/articles/?page_size=3',
+            f'/news/async/categories/{self.world.pk}/articles/?pagination=cursor',
+        ])
+
+    def test_category_lists_match_serializer(self):
+        self.assertSameBytes([
+            '/news/categories/',
+            '/news/categories/?fields=name,slug',
+            '/news/async/categories/',
+        ])
+
+    def test_cursor_links_match_serializer(self):
+        first = json.loads(self.fetch('/news/articles/?pagination=cursor&page_size=2'))
+        self.assertSameBytes([first['next']])
+
+    def test_renderer_matches_stdlib_renderer(self):
+        if orjson is None:
+            self.skipTest("orjson is not installed")
+        for url in ('/news/articles/', '/news/categories/', '/news/home/'):
+            with self.subTest(url=url):
+                cache.clear()
+                data = self.client.get(url).data
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class IngestEventTests(TestCase):
+    """Bulk ingest must report publishes like single saves do."""
+
+    def ingest(self, rows, **kwargs):
+        broker = get_event_broker()
+        start = broker.last_sequence()
+        with self.captureOnCommitCallbacks(execute=True):
+            result = ingest_articles(rows, **kwargs)
+        events, _ = broker.since(start)
+        return result, [(event.type, event.data.get('article', event.data).get('id')) for event in events]
+
+    def test_created_published_article_is_published_event(self):
+        result, events = self.ingest([
+            {'title': 'Wire story', 'is_published': True},
+            {'title': 'Wire draft'},
+        ])
+        self.assertEqual(result.created, 2)
+        story = Article.objects.get(title='Wire story')
+        # The draft never reached readers, so nothing is removed either
+        self.assertEqual(events, [(ARTICLE_PUBLISHED, story.pk)])
+
+    def test_upserted_articles_keep_their_previous_state(self):
+        published = Article.objects.create(title='Live story', is_published=True)
+        draft = Article.objects.create(title='Held story')
+        _, events = self.ingest(
+            [{'title': 'Live story', 'is_published': True}, {'title': 'Held story', 'is_published': True}],
+            upsert=True,
+        )
+        self.assertEqual(sorted(events), sorted([(ARTICLE_UPDATED, published.pk), (ARTICLE_PUBLISHED, draft.pk)]))
+
+    def test_upsert_keeps_fields_the_row_leaves_out(self):
+        world = Category.objects.create(name='World')
+        article = Article.objects.create(title='Wire story', category=world, tag='featured', summary='Old')
+        result, _ = self.ingest([{'title': 'Wire story', 'content': 'New body', 'author': 'Desk'}], upsert=True)
+        self.assertEqual(result.updated, 1)
+        article.refresh_from_db()
+        self.assertEqual((article.category_id, article.tag, article.summary), (world.pk, 'featured', 'Old'))
+        self.assertEqual((article.content, article.author), ('New body', 'Desk'))
+
+
+class ArticleEventTests(TestCase):
+    """Saves report publishes without rereading the row; the SSE stream delivers them."""
+
+    def saved_events(self, article):
+        broker = get_event_broker()
+        start = broker.last_sequence()
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+        return [event.type for event in broker.since(start)[0]]
+
+    def test_publication_state_comes_from_the_loaded_row(self):
+        Article.objects.create(title='Draft')
+        article = Article.objects.get(title='Draft')
+        with self.assertNumQueries(0):
+            self.assertFalse(was_published(article))
+        article.is_published = True
+        self.assertEqual(self.saved_events(article), [ARTICLE_PUBLISHED])
+        article.title = 'Published'
+        self.assertEqual(self.saved_events(article), [ARTICLE_UPDATED])
+        article.is_published = False
+        self.assertEqual(self.saved_events(article), [ARTICLE_REMOVED])
+
+    async def test_stream_delivers_matching_events(self):
+        broker = get_event_broker()
+        response = await self.async_client.get('/news/events/?tag=featured')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        try:
+            self.assertTrue((await anext(stream)).startswith(b'retry:'))
+            broker.publish(ARTICLE_UPDATED, 'exclusive', None, {'article': {'id': 1}})
+            broker.publish(ARTICLE_PUBLISHED, 'featured', None, {'article': {'id': 2}})
+            chunk = (await asyncio.wait_for(anext(stream), 5)).decode()
+        finally:
+            await stream.aclose()
+        self.assertIn(f'id: {broker.epoch}-{broker.last_sequence()}\nevent: {ARTICLE_PUBLISHED}\n', chunk)
+        self.assertIn('"id":2', chunk)
+
+
+class BulkPatchTests(TestCase):
+    url = '/news/articles/bulk/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.world = Category.objects.create(name='World')
+        cls.drafts = [Article.objects.create(title=f'Draft {i}', category=cls.world) for i in range(3)]
+        cls.live = Article.objects.create(title='Live', is_published=True, tag='featured')
+        cls.admin = User.objects.create_user('editor', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def patch(self, body):
+        return self.client.patch(self.url, body, format='json')
+
+    def test_ids_publish_sets_published_at(self):
+        ids = [article.pk for article in self.drafts]
+        response = self.patch({'ids': ids, 'changes': {'is_published': True, 'tag': 'breaking_news'}})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['updated'], 3)
+        published = Article.objects.filter(pk__in=ids)
+        self.assertTrue(all(article.is_published and article.published_at for article in published))
+        self.assertEqual({article.tag for article in published}, {'breaking_news'})
+
+    def test_missing_ids_answer_207(self):
+        response = self.patch({'ids': [self.drafts[0].pk, 999999], 'changes': {'author': 'Desk'}})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['updated'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['results'][1]['status'], 'error')
+        self.assertEqual(Article.objects.get(pk=self.drafts[0].pk).author, 'Desk')
+
+    def test_filter_updates_matches_only(self):
+        response = self.patch({'filter': {'is_published': False}, 'changes': {'author': 'Desk'}})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['updated'], 3)
+        self.assertIsNone(Article.objects.get(pk=self.live.pk).author)
+
+    def test_filter_rejects_unknown_keys_and_unparsable_values(self):
+        for filters in ({'tags': 'breaking_news'}, {'is_published': 'maybe'}, {'tag': ''}, {'tag': 'nope'}):
+            with self.subTest(filters=filters):
+                response = self.patch({'filter': filters, 'changes': {'is_published': False}})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('filter', response.data)
+
+    def test_empty_changes_are_rejected(self):
+        before = Article.objects.get(pk=self.live.pk).updated_at
+        response = self.patch({'filter': {'is_published': True}, 'changes': {}})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('changes', response.data)
+        self.assertEqual(Article.objects.get(pk=self.live.pk).updated_at, before)
+        response = self.patch({'items': [{'id': self.live.pk}]})
+        self.assertEqual((response.status_code, response.data['failed']), (207, 1))
+
+    def test_repeated_ids_are_written_and_reported_once(self):
+        pk = self.drafts[0].pk
+        response = self.patch({'ids': [pk, pk], 'changes': {'author': 'Desk'}})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['updated'], len(response.data['results'])), (1, 1))
+
+        item = {'id': pk, 'author': 'Wire'}
+        response = self.patch({'items': [item, item]})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['updated'], len(response.data['results'])), (1, 1))
+        response = self.patch({'items': [item, {'id': pk, 'author': 'Other'}]})
+        self.assertEqual((response.status_code, response.data['failed']), (207, 1))
+        self.assertTrue(Article.objects.get(pk=self.live.pk).is_published)
+
+    def test_items_rename_regenerates_slug_and_redirects(self):
+        first, second = self.drafts[:2]
+        response = self.patch({'items': [
+            {'id': first.pk, 'title': 'Renamed story'},
+            {'id': second.pk, 'title': 'Live'},
+        ]})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['results'][1]['errors'], {'title': ["article with this title already exists."]})
+        self.assertEqual(Article.objects.get(pk=first.pk).slug, 'renamed-story')
+        self.assertTrue(ArticleSlugRedirect.objects.filter(slug='draft-0', article=first).exists())
+        self.assertEqual(Article.objects.get(pk=second.pk).title, 'Draft 1')
+
+
+class ExportTests(TestCase):
+    """Only staff export drafts, and only non-staff exports are throttled."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('editor', password='x', is_staff=True)
+        with cls.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title='Budget passed', is_published=True)
+            Article.objects.create(title='Budget draft')
+            Article.objects.create(title='Final score', is_published=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def titles(self, url='/news/articles/export/'):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line)['title'] for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_drafts_are_exported_to_staff_only(self):
+        self.assertEqual(self.titles(), ['Budget passed', 'Final score'])
+        self.assertEqual(self.titles('/news/articles/export/?is_published=false'), [])
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.titles(), ['Budget passed', 'Budget draft', 'Final score'])
+
+    def test_full_text_search(self):
+        self.assertEqual(self.titles('/news/articles/export/?q=budget'), ['Budget passed'])
+
+    def test_anonymous_exports_are_throttled(self):
+        with mock.patch.object(ExportRateThrottle, 'rate', '1/hour'):
+            self.titles()
+            self.assertEqual(self.client.get('/news/articles/export/').status_code, 429)
+            self.client.force_authenticate(self.staff)
+            self.titles()
+            self.titles()
+
+
+class SearchTests(TestCase):
+    """BM25 ranking of the in-memory index and the ?q= list and export."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title_match = Article.objects.create(title='Budget vote', content='Parliament met.', is_published=True)
+        cls.body_match = Article.objects.create(title='Parliament', content='The budget was late.', is_published=True)
+        cls.unrelated = Article.objects.create(title='Final score', content='A late goal.', is_published=True)
+
+    def setUp(self):
+        cache.clear()
+        backend_patch = mock.patch('newsApp.search._backend', InMemorySearchBackend())
+        self.backend = backend_patch.start()
+        self.addCleanup(backend_patch.stop)
+        self.client = APIClient()
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['results']]
+
+    def test_title_matches_rank_first(self):
+        ranked = self.backend.search('budget')
+        self.assertEqual([pk for pk, _ in ranked], [self.title_match.pk, self.body_match.pk])
+        self.assertGreater(ranked[0][1], ranked[1][1])
+        self.assertEqual(self.backend.search('the of'), [])
+
+    def test_list_is_ordered_by_relevance_with_highlights(self):
+        response = self.client.get('/news/articles/?q=budget')
+        results = response.json()['results']
+        self.assertEqual([item['id'] for item in results], [self.title_match.pk, self.body_match.pk])
+        self.assertEqual(results[0]['highlights']['title'], '<mark>Budget</mark> vote')
+        self.assertGreater(results[0]['score'], results[1]['score'])
+        # An explicit ordering wins over relevance
+        self.assertEqual(self.ids('/news/articles/?q=budget&ordering=-title'), [self.body_match.pk, self.title_match.pk])
+
+    def test_highlight_escapes_and_marks_whole_words(self):
+        self.assertEqual(highlight('<b>Budget</b> budgets', ['budget']), '&lt;b&gt;<mark>Budget</mark>&lt;/b&gt; budgets')
+        self.assertIsNone(highlight('Budgets', ['budget']))
+        snippet = highlight('word ' * 100 + 'budget', ['budget'], max_length=40)
+        self.assertTrue(snippet.startswith('…'))
+        self.assertIn('<mark>budget</mark>', snippet)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.backend.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unrelated.title = 'Budget goal'
+            self.unrelated.save()
+        self.assertIn(self.unrelated.pk, dict(self.backend.search('budget')))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.title_match.delete()
+        self.assertNotIn(self.title_match.pk, dict(self.backend.search('budget')))
+
+    @mock.patch('newsApp.search.MAX_RESULTS', 1)
+    def test_results_are_capped_except_in_exports(self):
+        self.assertEqual(self.ids('/news/articles/?q=budget'), [self.title_match.pk])
+        response = self.client.get('/news/articles/export/?q=budget')
+        exported = [json.loads(line)['id'] for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(exported, [self.title_match.pk, self.body_match.pk])
+
+
+class KeywordTests(TestCase):
+    """Keyword rows follow related_keywords and back the keyword filters."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.both = Article.objects.create(title='Both', related_keywords=['Nepal', ' Budget  2025 '], is_published=True)
+        cls.nepal = Article.objects.create(title='Nepal', related_keywords=['nepal', 'Floods'], is_published=True)
+        cls.none = Article.objects.create(title='None', related_keywords=[], is_published=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def keywords(self, article):
+        return set(ArticleKeyword.objects.filter(article=article).values_list('keyword', flat=True))
+
+    def ids(self, query):
+        response = self.client.get(f'/news/articles/?{query}&ordering=title')
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['results']]
+
+    def test_keywords_are_normalized_and_synced_on_save(self):
+        self.assertEqual(self.keywords(self.both), {'nepal', 'budget 2025'})
+        self.both.related_keywords = ['Budget 2025', 'Election']
+        self.both.save()
+        self.assertEqual(self.keywords(self.both), {'budget 2025', 'election'})
+        # Saves that leave the keywords alone do not touch the rows
+        with self.assertNumQueries(1):
+            self.both.save(update_fields=['title'])
+
+    def test_bulk_ingest_syncs_keywords(self):
+        ingest_articles([{'title': 'Bulk', 'related_keywords': ['Floods', 'Relief']}])
+        self.assertEqual(self.keywords(Article.objects.get(title='Bulk')), {'floods', 'relief'})
+
+    def test_filters(self):
+        self.assertEqual(self.ids('related_keywords=NEPAL'), [self.both.pk, self.nepal.pk])
+        self.assertEqual(self.ids('keywords_any=floods,budget%202025'), [self.both.pk, self.nepal.pk])
+        self.assertEqual(self.ids('keywords_all=nepal,floods'), [self.nepal.pk])
+        self.assertEqual(self.ids('keywords_all=nepal,election'), [])
+
+    def test_frequencies(self):
+        response = self.client.get('/news/keywords/')
+        self.assertEqual(response.json()['results'], [
+            {'keyword': 'nepal', 'count': 2},
+            {'keyword': 'budget 2025', 'count': 1},
+            {'keyword': 'floods', 'count': 1},
+        ])
+        response = self.client.get('/news/keywords/?prefix=Fl')
+        self.assertEqual(response.json()['results'], [{'keyword': 'floods', 'count': 1}])
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= and ?view=compact trim both the SELECT and the payload."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Politics')
+        Article.objects.create(title='Budget', content='Long body', category=category, is_published=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        rows_sql = next(query['sql'] for query in queries if 'ORDER BY' in query['sql'])
+        return response.json()['results'][0], rows_sql
+
+    def test_fields_project_queryset_and_payload(self):
+        item, sql = self.get('/news/articles/?fields=id,title,category_name')
+        self.assertEqual(set(item), {'id', 'title', 'category_name'})
+        self.assertEqual(item['category_name'], 'Politics')
+        self.assertNotIn('"content"', sql)
+        self.assertNotIn('"summary"', sql)
+        # The category name comes from a join, not a query per row
+        self.assertIn('JOIN', sql)
+
+    def test_compact_view_leaves_out_bodies(self):
+        item, sql = self.get('/news/articles/?view=compact')
+        self.assertEqual(list(item), ARTICLE_COMPACT_FIELDS)
+        for column in ARTICLE_COMPACT_DEFERRED_FIELDS:
+            self.assertNotIn(f'"{column}"', sql)
+
+    def test_full_payload_without_parameters(self):
+        item, sql = self.get('/news/articles/')
+        self.assertEqual(item['content'], 'Long body')
+        self.assertIn('"content"', sql)
+
+    def project(self, **params):
+        view = ArticleListCreateView(request=Request(RequestFactory().get('/news/articles/', params)), format_kwarg=None)
+        return view.project_queryset(Article.objects.all())
+
+    def test_model_queryset_is_projected(self):
+        # Search results and other non-.values() paths load model instances
+        queryset = self.project(fields='id,title,category_name')
+        self.assertEqual(queryset.query.select_related, {'category': {}})
+        self.assertTrue({'content', 'summary'} <= queryset.get().get_deferred_fields())
+        compact = self.project(view='compact').get()
+        self.assertTrue(set(ARTICLE_COMPACT_DEFERRED_FIELDS) <= compact.get_deferred_fields())
+        self.assertEqual(self.project().get().get_deferred_fields(), set())
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/news/articles/?fields=id,nope,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['fields'], 'Unknown field(s): nope, secret')
+
+
+class ImageVariantTests(TestCase):
+    """Variant URLs appear only once the variants are recorded as stored."""
+
+    def test_variants_are_linked_once_rendered(self):
+        article = Article.objects.create(
+            title='Pending', banner_image=object_url('pending.jpg'), secondary_banner_image=object_url('second.png'),
+        )
+        self.assertIsNone(self.client.get(f'/news/articles/{article.pk}/').json()['banner_variants'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_variants('pending.jpg', {'hero': {'webp': 'pending_hero.webp'}})
+        cache.clear()
+        data = self.client.get(f'/news/articles/{article.pk}/').json()
+        self.assertEqual(data['banner_variants'], {'hero': {'webp': object_url('pending_hero.webp')}})
+        self.assertIsNone(data['secondary_banner_variants'])
+
+    def test_saved_articles_pick_up_recorded_variants(self):
+        record_variants('second.png', {'card': {'jpeg': 'second_card.jpeg'}})
+        article = Article.objects.create(title='Later', secondary_banner_image=object_url('second.png'))
+        self.assertEqual(article.secondary_banner_variants, {'card': {'jpeg': 'second_card.jpeg'}})
+        article.secondary_banner_image = 'https://example.com/elsewhere.png'
+        article.save()
+        self.assertIsNone(Article.objects.get(pk=article.pk).secondary_banner_variants)
+
+
+class HotFeedTests(TestCase):
+    """Feed pages served from the hot-feed store must match the database path."""
+    urls = [
+        '/news/articles/?tag=featured&view=compact',
+        '/news/articles/?tag=featured&view=compact&is_published=true&page_size=2&page=2',
+        '/news/articles/?tag=featured&fields=id,title&pagination=cursor&page_size=3',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.world = Category.objects.create(name='World')
+        for i in range(6):
+            Article.objects.create(title=f'Feature {i}', tag='featured', category=cls.world, is_published=i % 2 == 0)
+        Article.objects.create(title='Other', tag='exclusive', category=cls.world)
+
+    def setUp(self):
+        cache.clear()
+        # Compare what each path renders, not cached responses
+        patcher = mock.patch.object(CachedResponseMixin, 'is_response_cacheable', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertMatchesDatabase(self):
+        for url in self.urls + [f'/news/categories/{self.world.pk}/articles/?view=compact']:
+            with self.subTest(url=url):
+                hot = self.client.get(url).content
+                with mock.patch('newsApp.feeds.HOT_FEED_SIZE', 0):
+                    self.assertEqual(hot, self.client.get(url).content)
+        self.assertIsNotNone(cache.get(feed_key('tag', 'featured')))
+
+    def test_pages_match_database(self):
+        self.assertMatchesDatabase()
+
+    def test_feeds_follow_writes(self):
+        self.assertMatchesDatabase()
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title='Feature new', tag='featured', category=self.world, is_published=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = Article.objects.get(title='Feature 0')
+            moved.tag = 'exclusive'
+            moved.save()
+        self.assertMatchesDatabase()
+
+    def test_builds_are_not_stored_while_a_writer_holds_the_lock(self):
+        with feed_lock() as locked:
+            self.assertTrue(locked)
+            self.assertEqual(len(get_feed('tag', 'featured').items), 6)
+        self.assertIsNone(cache.get(feed_key('tag', 'featured')))
+        get_feed('tag', 'featured')
+        self.assertIsNotNone(cache.get(feed_key('tag', 'featured')))
+
+    def test_moves_touch_the_old_and_new_category_feeds_only(self):
+        sports = Category.objects.create(name='Sports')
+        self.assertMatchesDatabase()
+        moved = Article.objects.get(title='Feature 1')
+        with mock.patch('newsApp.signals.update_feeds_on_commit', wraps=update_feeds_on_commit) as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                moved.category = sports
+                moved.save()
+        self.assertEqual(update.call_args.args[1], {self.world.pk, sports.pk})
+        self.assertNotIn(moved.pk, [item.pk for item in get_feed('category', self.world.pk).items])
+        self.assertEqual([item.pk for item in get_feed('category', sports.pk).items], [moved.pk])
+        self.assertMatchesDatabase()
+
+    def test_writers_do_not_wait_for_the_lock(self):
+        self.assertMatchesDatabase()
+        with feed_lock() as token:
+            self.assertTrue(token)
+            started = time.monotonic()
+            with self.captureOnCommitCallbacks(execute=True):
+                Article.objects.create(title='Feature new', tag='featured', category=self.world)
+            self.assertLess(time.monotonic() - started, 1)
+            # Dropped rather than left stale, including a store racing the write
+            self.assertIsNone(cache.get(feed_key('tag', 'featured')))
+            store_feeds({feed_key('tag', 'featured'): build_feed('tag', 'featured', capacity=1)}, token)
+            self.assertIsNone(cache.get(feed_key('tag', 'featured')))
+        self.assertMatchesDatabase()
+
+
+class HomeSnapshotTests(TestCase):
+    """Writes rebuild the homepage snapshot once, and only when they can change it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # The class transaction never commits; a pending rebuild would stand
+        # in for every rebuild the tests ask for
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.world = Category.objects.create(name='World')
+            cls.old = Article.objects.create(title='Old', tag='featured', category=cls.world, is_published=True)
+            Article.objects.filter(pk=cls.old.pk).update(updated_at=now() - timedelta(days=365))
+            for tag in Article.TagChoices.values:
+                Article.objects.create(title=f'Top {tag}', tag=tag, category=cls.world, is_published=True)
+
+    def setUp(self):
+        cache.clear()
+        # One article per tag and a single strip, so every group is full
+        patcher = mock.patch.object(build_home_snapshot, '__defaults__', (1, 1))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def rebuilds(self, write):
+        with mock.patch('newsApp.home.rebuild_home_snapshot') as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+        return rebuild.call_count
+
+    def test_one_rebuild_per_transaction(self):
+        def write():
+            for i in range(3):
+                Article.objects.create(title=f'New {i}', tag='featured', is_published=True)
+        self.assertEqual(self.rebuilds(write), 1)
+        # The next transaction asks again
+        later = Article(title='Later', tag='featured', is_published=True)
+        self.assertEqual(self.rebuilds(later.save), 1)
+
+    def test_rolled_back_rebuild_does_not_hold_the_next_one(self):
+        def write():
+            with self.assertRaises(ValueError), transaction.atomic():
+                Article.objects.create(title='Rolled back', tag='featured', is_published=True)
+                raise ValueError
+            Article.objects.create(title='Kept', tag='featured', is_published=True)
+        self.assertEqual(self.rebuilds(write), 1)
+
+    def test_articles_older_than_the_cutoff_are_skipped(self):
+        get_home_snapshot()
+        old = Article.objects.get(pk=self.old.pk)
+        self.assertNotIn(old.pk, cache.get(HOME_KEY)['ids']['articles'])
+        self.assertFalse(shows_article(old))
+        self.assertEqual(self.rebuilds(old.delete), 0)
+
+        shown = Article.objects.get(title='Top featured')
+        self.assertTrue(shows_article(shown))
+        old.is_published = True
+        self.assertEqual(self.rebuilds(old.save), 1)
+
+    def test_rebuild_waits_for_the_running_one(self):
+        cache.add(HOME_LOCK_KEY, 'other')
+        self.assertIsNone(rebuild_home_snapshot())
+        self.assertIsNone(cache.get(HOME_KEY))
+        self.assertEqual(len(get_home_snapshot()['tags']), len(Article.TagChoices.values))
+        self.assertIsNone(cache.get(HOME_KEY))
+        cache.delete(HOME_LOCK_KEY)
+        self.assertIsNotNone(rebuild_home_snapshot())
+        self.assertIsNotNone(cache.get(HOME_KEY))
+
+
+class TokenAuthTests(TestCase):
+    """Access tokens carry a current is_staff claim; the user cache holds no password hash."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('editor', password='secret', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def obtain(self):
+        response = self.client.post('/auth/token/', {'username': 'editor', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def claims(self, token):
+        return json.loads(base64.urlsafe_b64decode(token.split('.')[1] + '=='))
+
+    def test_staff_claim_is_on_access_tokens_only(self):
+        tokens = self.obtain()
+        self.assertIs(self.claims(tokens['access'])['is_staff'], True)
+        self.assertNotIn('is_staff', self.claims(tokens['refresh']))
+
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        response = self.client.post('/auth/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertIs(self.claims(response.json()['access'])['is_staff'], False)
+
+    def test_cached_user_keeps_only_auth_fields(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain()['access']}")
+        url = '/news/articles/export/?is_published=false'
+        self.assertEqual(client.get(url).status_code, 200)
+        entry = cache.get(USER_KEY.format(self.user.pk))
+        self.assertNotIn(self.user.password, repr(entry))
+        self.assertEqual(entry['fields'], {'is_active': True, 'is_staff': True, 'is_superuser': False})
+
+        with self.assertNumQueries(1):
+            # The export's query; the user comes from the cache
+            response = client.get(url)
+            b''.join(response.streaming_content)
+        self.assertIsInstance(response.wsgi_request.user, PartialUser)
+
+
+class ResponseCacheTests(TestCase):
+    """Cached responses go stale when a write commits, and only then."""
+    url = '/news/categories/'
+
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name='World')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_writes_invalidate_on_commit(self):
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Category.objects.create(name='Sports')
+        # Not committed yet: a concurrent reader must not cache the old rows
+        # under a new generation
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('Sports', response.content.decode())
+
+    def test_etag_answers_304_until_a_write(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Sports')
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_responses_read_from_a_lagging_replica_are_not_cached(self):
+        with mock.patch('newsApp.cache.replica_may_lag', return_value=True) as may_lag:
+            self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+            self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        self.assertTrue(may_lag.called)
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+    def test_evicted_generation_restarts_above_the_old_one(self):
+        for _ in range(3):
+            bump_generation(Category)
+        generation = get_generation(Category)
+        cache.delete(GENERATION_KEY.format(Category._meta.label_lower))
+        with mock.patch('newsApp.cache.time.time', return_value=time.time() + 1):
+            self.assertGreater(get_generation(Category), generation)
+
+
+class AsyncResponseCacheTests(TestCase):
+    """Async views read and write the response cache through its async API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name='World')
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_async_views_use_async_cache_calls(self):
+        spies = {name: mock.patch.object(cache, name, wraps=getattr(cache, name)) for name in ('aget_many', 'aget', 'aset')}
+        with spies['aget_many'] as aget_many, spies['aget'] as aget, spies['aset'] as aset:
+            first = await self.async_client.get('/news/async/categories/')
+            second = await self.async_client.get('/news/async/categories/')
+            not_modified = await self.async_client.get('/news/async/categories/', headers={'If-None-Match': first['ETag']})
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertTrue(aget_many.called)
+        self.assertEqual(aset.call_count, 1)
+        self.assertTrue(any(call.args[0].startswith('news:resp:') for call in aget.call_args_list))
+
+
+class AsyncViewTests(TestCase):
+    """Async endpoints authenticate and report errors like the sync ones."""
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_errors_are_drf_json(self):
+        response = await self.async_client.get('/news/async/articles/?page=99')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('Invalid page', response.json()['detail'])
+
+    async def test_bad_token_is_rejected(self):
+        response = await self.async_client.get('/news/async/categories/', headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+
+
+@skipIf(mock_aws is None, 'moto is not installed')
+@override_settings(
+    AWS_S3_ENDPOINT_URL='https://s3.amazonaws.com', AWS_S3_REGION_NAME='us-east-1',
+    AWS_STORAGE_BUCKET_NAME='news', AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing',
+)
+class S3TestCase(TestCase):
+    """Runs against a moto bucket with a fresh shared client."""
+
+    def setUp(self):
+        mocked = mock_aws()
+        mocked.start()
+        self.addCleanup(mocked.stop)
+        reset_s3_client()
+        self.addCleanup(reset_s3_client)
+        get_s3_client().create_bucket(Bucket='news')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('editor'))
+
+
+class DirectUploadTests(S3TestCase):
+    """Presigned uploads go straight to the bucket and are checked on completion."""
+
+    def presign(self, method, size=5):
+        response = self.client.post('/news/upload/presign/', {
+            'filename': 'notes.txt', 'content_type': 'text/plain', 'size': size, 'method': method,
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def complete(self, token):
+        return self.client.post('/news/upload/complete/', {'token': token})
+
+    def test_presigned_put_then_complete(self):
+        presigned = self.presign('put')
+        upload = presigned['upload']
+        self.assertEqual(requests.put(upload['url'], data=b'hello', headers=upload['headers']).status_code, 200)
+        response = self.complete(presigned['token'])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'url': presigned['url'], 'variants': None})
+
+    def test_presigned_post_then_complete(self):
+        presigned = self.presign('post')
+        upload = presigned['upload']
+        response = requests.post(upload['url'], data=upload['fields'], files={'file': ('notes.txt', b'hello')})
+        self.assertLess(response.status_code, 300)
+        self.assertEqual(self.complete(presigned['token']).status_code, 201)
+
+    def test_complete_checks_size_and_content_type(self):
+        presigned = self.presign('put')
+        self.assertEqual(self.complete(presigned['token']).status_code, 400)
+
+        bucket = get_s3_client()
+        bucket.put_object(Bucket='news', Key=presigned['key'], Body=b'hello!', ContentType='text/plain')
+        self.assertEqual(self.complete(presigned['token']).status_code, 400)
+        bucket.put_object(Bucket='news', Key=presigned['key'], Body=b'hello', ContentType='text/html')
+        self.assertEqual(self.complete(presigned['token']).status_code, 400)
+        bucket.put_object(Bucket='news', Key=presigned['key'], Body=b'hello', ContentType='text/plain')
+        self.assertEqual(self.complete(presigned['token']).status_code, 201)
+
+    def test_bad_token_is_rejected(self):
+        token = self.presign('put')['token']
+        response = self.complete(token[:-2] + ('aa' if not token.endswith('aa') else 'bb'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['token'], ["Invalid or expired upload token."])
+
+
+class UploadStorageTests(S3TestCase):
+    """upload_file under each AWS_S3_VERIFY_UPLOADS mode, and stored_object."""
+
+    def upload(self, key, mode):
+        timer = PhaseTimer()
+        with self.settings(AWS_S3_VERIFY_UPLOADS=mode):
+            url = upload_file(io.BytesIO(b'hello'), key, 'text/plain', timer=timer)
+        self.assertEqual(url, object_url(key))
+        return timer
+
+    def test_verify_modes(self):
+        for mode in ('sync', 'async', 'off'):
+            with self.subTest(mode=mode), mock.patch('newsApp.storage.verify_upload_async') as verify_async:
+                timer = self.upload(f'{mode}.txt', mode)
+                self.assertEqual(set(timer.timings), {'client', 'upload', 'verify'} if mode == 'sync' else {'client', 'upload'})
+                self.assertEqual(verify_async.called, mode == 'async')
+                self.assertEqual(stored_object(f'{mode}.txt')['ContentLength'], 5)
+
+    def test_missing_object_fails_sync_verification_only(self):
+        with mock.patch.object(get_s3_client(), 'upload_fileobj'):
+            with self.assertRaises(ClientError):
+                self.upload('lost.txt', 'sync')
+            with mock.patch('newsApp.storage.verify_upload_async') as verify_async:
+                self.upload('lost.txt', 'async')
+            verify_async.assert_called_once_with('lost.txt')
+            # What the queued check does off the request path
+            with self.assertLogs('app', 'ERROR'):
+                verify_upload_async('lost.txt').result()
+            self.upload('lost.txt', 'off')
+        self.assertIsNone(stored_object('lost.txt'))
+
+    def test_upload_view_reports_server_timing(self):
+        with self.settings(AWS_S3_VERIFY_UPLOADS='sync'):
+            response = self.client.post('/news/upload/', {
+                'file': SimpleUploadedFile('notes.txt', b'hello', content_type='text/plain'),
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([phase.split(';')[0] for phase in response['Server-Timing'].split(', ')], ['client', 'upload', 'verify'])
+        self.assertEqual(stored_object(response.json()['url'].rsplit('/', 1)[1])['ContentType'], 'text/plain')
+
+
+@mock.patch('newsApp.routers.REPLICAS', ['replica'])
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Which database a request reads from. Not a TestCase: reads inside its
+    transaction always go to the primary.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def serve(self, request, view=lambda: None):
+        """Runs ``view`` inside the middleware; returns the response and where it read."""
+        read = []
+
+        def get_response(request):
+            view()
+            read.append(ReplicaRouter().db_for_read(Article))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return response, read[0]
+
+    def test_reads_go_to_a_replica_outside_primary_reads(self):
+        def view():
+            with primary_reads():
+                self.assertEqual(ReplicaRouter().db_for_read(Article), 'default')
+
+        self.assertEqual(self.serve(self.factory.get('/'), view)[1], 'replica')
+        self.assertEqual(self.serve(self.factory.post('/'))[1], 'default')
+        # Outside a request: commands and on-commit hooks
+        self.assertEqual(ReplicaRouter().db_for_read(Article), 'default')
+
+    def test_writers_are_pinned_by_cookie(self):
+        response, _ = self.serve(self.factory.get('/'), lambda: ReplicaRouter().db_for_write(Article))
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], PIN_SECONDS)
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.serve(request)[1], 'default')
+        self.assertEqual(self.serve(self.factory.get('/'))[1], 'replica')
+
+    def test_only_the_primary_is_migrated(self):
+        router = ReplicaRouter()
+        self.assertTrue(router.allow_migrate('default', 'newsApp', 'article'))
+        self.assertFalse(router.allow_migrate('replica', 'newsApp', 'article'))
+
+    def test_writers_are_pinned_by_user(self):
+        def write():
+            pin_user_reads(7)
+            ReplicaRouter().db_for_write(Article)
+
+        self.serve(self.factory.post('/'), write)
+        self.assertEqual(self.serve(self.factory.get('/'), lambda: pin_user_reads(7))[1], 'default')
+        self.assertEqual(self.serve(self.factory.get('/'), lambda: pin_user_reads(8))[1], 'replica')
+
+    def test_replica_may_lag_behind_recent_writes(self):
+        def view():
+            self.assertTrue(replica_may_lag(time.time()))
+            self.assertFalse(replica_may_lag(time.time() - PIN_SECONDS - 1))
+            with primary_reads():
+                self.assertFalse(replica_may_lag(time.time()))
+
+        self.serve(self.factory.get('/'), view)
+        self.assertFalse(replica_may_lag(time.time()))
+
+    def test_streamed_exports_read_from_the_request_replica(self):
+        databases = []
+
+        def export(queryset):
+            # Runs as the response streams, after the middleware returned
+            databases.append(queryset.db)
+            yield ''
+
+        with mock.patch.dict('newsApp.views.EXPORTERS', {'ndjson': export}):
+            response = self.client.get('/news/articles/export/')
+        self.assertEqual(databases, [])
+        b''.join(response.streaming_content)
+        self.assertEqual(databases, ['replica'])
+
+
+class CountTests(TestCase):
+    """Exact counts run one aggregate; estimated counts never wait for one on a warm or measured table."""
+    url = '/news/articles/?counts=estimated'
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            Article.objects.create(title=f'Story {i}', is_published=i < 2)
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(CachedResponseMixin, 'is_response_cacheable', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url).json()
+        aggregates = [query for query in queries.captured_queries if 'COUNT(' in query['sql']]
+        return data, len(aggregates)
+
+    def test_exact_counts(self):
+        data, aggregates = self.get('/news/articles/')
+        self.assertEqual((data['total_items'], data['counts']), (3, {'published': 2, 'draft': 1}))
+        self.assertNotIn('approximate', data)
+        self.assertEqual(aggregates, 1)
+
+    def test_estimated_counts_from_table_statistics(self):
+        with mock.patch('newsApp.counts.estimated_table_rows', return_value=300), \
+                mock.patch('newsApp.counts.refresh_counts_async') as refresh:
+            data, aggregates = self.get(self.url)
+            self.assertEqual((data['total_items'], data['counts']), (300, {'published': None, 'draft': None}))
+            self.assertTrue(data['approximate'])
+            self.assertEqual(aggregates, 0)
+
+            refresh_counts(*refresh.call_args.args)
+            refresh.reset_mock()
+            data, aggregates = self.get(self.url)
+            self.assertEqual((data['total_items'], data['counts']), (300, {'published': 200, 'draft': 100}))
+            self.assertEqual(aggregates, 0)
+            self.assertFalse(refresh.called)
+
+            with mock.patch('newsApp.counts.time.time', return_value=time.time() + COUNT_CACHE_TIMEOUT):
+                data, aggregates = self.get(self.url)
+            self.assertEqual((data['counts'], aggregates), ({'published': 200, 'draft': 100}, 0))
+            self.assertTrue(refresh.called)
+
+    def test_estimated_counts_without_table_statistics(self):
+        data, aggregates = self.get(self.url)
+        self.assertEqual((data['total_items'], data['counts'], aggregates), (3, {'published': 2, 'draft': 1}, 1))
+        self.assertNotIn('approximate', data)
+        data, aggregates = self.get(self.url)
+        self.assertEqual((data['total_items'], data['counts'], aggregates), (3, {'published': 2, 'draft': 1}, 0))
+        self.assertTrue(data['approximate'])
+
+
+class SlugEndpointTests(TestCase):
+    """By-slug endpoints find objects by their current slug and redirect old ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.world = Category.objects.create(name='World')
+        cls.article = Article.objects.create(title='Budget passed', category=cls.world, is_published=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_current_slugs(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/news/articles/by-slug/budget-passed/')
+        self.assertEqual(response.json()['id'], self.article.pk)
+        self.assertEqual(self.client.get('/news/categories/by-slug/world/').json()['id'], self.world.pk)
+        self.assertEqual(self.client.get('/news/articles/by-slug/nothing-here/').status_code, 404)
+
+    def test_old_slugs_redirect_to_the_current_one(self):
+        article = Article.objects.get(pk=self.article.pk)
+        article.title = 'Budget approved'
+        article.save()
+        response = self.client.get('/news/articles/by-slug/budget-passed/?fields=id')
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], '/news/articles/by-slug/budget-approved/?fields=id')
+        self.assertEqual(self.client.get(response['Location']).json()['id'], article.pk)
+
+        category = Category.objects.get(pk=self.world.pk)
+        category.name = 'Global'
+        category.save()
+        response = self.client.get('/news/categories/by-slug/world/')
+        self.assertEqual((response.status_code, response['Location']), (301, '/news/categories/by-slug/global/'))
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages walk every row once in either direction, drafts included."""
+
+    @classmethod
+    def setUpTestData(cls):
+        start = now() - timedelta(days=1)
+        for i in range(7):
+            Article.objects.create(title=f'Story {i}')
+        # Two published the same instant, so ids break the tie; three drafts
+        times = [start, start + timedelta(hours=1), start + timedelta(hours=1), start + timedelta(hours=2)]
+        for article, published_at in zip(Article.objects.order_by('pk'), times):
+            Article.objects.filter(pk=article.pk).update(is_published=True, published_at=published_at)
+
+    def setUp(self):
+        cache.clear()
+
+    def expected(self, ordering):
+        field = ordering.lstrip('-')
+        if ordering.startswith('-'):
+            order = [F(field).desc(nulls_last=True), '-pk']
+        else:
+            order = [F(field).asc(nulls_first=True), 'pk']
+        return list(Article.objects.order_by(*order).values_list('id', flat=True))
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([row['id'] for row in data['results']])
+            url = data[link]
+        return pages
+
+    def test_pages_round_trip(self):
+        for ordering in ('-updated_at', '-published_at', 'published_at'):
+            with self.subTest(ordering=ordering):
+                forward = self.walk(f'/news/articles/?pagination=cursor&ordering={ordering}&page_size=2', 'next')
+                self.assertEqual(sum(forward, []), self.expected(ordering))
+                self.assertEqual([len(page) for page in forward], [2, 2, 2, 1])
+
+                last = self.client.get(f'/news/articles/?pagination=cursor&ordering={ordering}&page_size=2')
+                for _ in forward[1:]:
+                    last = self.client.get(last.json()['next'])
+                self.assertIsNone(last.json()['next'])
+                backward = self.walk(last.json()['previous'], 'previous')
+                self.assertEqual(backward, forward[-2::-1])
+
+    def test_drafts_are_listed_like_the_page_number_list(self):
+        cursor = self.walk('/news/articles/?pagination=cursor&ordering=-published_at&page_size=3', 'next')
+        numbered = self.client.get('/news/articles/?ordering=-published_at&page_size=100').json()['results']
+        self.assertEqual(sorted(sum(cursor, [])), sorted(row['id'] for row in numbered))
+
+    def test_invalid_cursor_and_ordering(self):
+        self.assertEqual(self.client.get('/news/articles/?cursor=not-a-cursor').status_code, 404)
+        response = self.client.get('/news/articles/?pagination=cursor&ordering=-trending')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.json())
+
+
+class TrendingTests(TestCase):
+    """Buffered views reach the database without further traffic, and only real traffic counts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = Article.objects.create(title='Viewed', is_published=True)
+
+    def setUp(self):
+        # A timer started earlier sleeps for the real interval
+        stop_flush_timer()
+        self.addCleanup(stop_flush_timer)
+        view_buffer.drain()
+        self.addCleanup(view_buffer.drain)
+
+    def test_timer_flushes_an_idle_buffer(self):
+        flushed = threading.Event()
+        with mock.patch('newsApp.trending.VIEW_FLUSH_SECONDS', 0.01), \
+                mock.patch('newsApp.trending.schedule_flush', side_effect=flushed.set):
+            count_view(pk=1)
+            self.assertTrue(flushed.wait(5))
+
+    def test_view_counts_only_show_on_the_trending_endpoint(self):
+        count_view(pk=self.article.pk)
+        flush_views()
+        detail = self.client.get(f'/news/articles/{self.article.pk}/').json()
+        self.assertNotIn('view_count', detail)
+        trending = self.client.get('/news/articles/trending/').json()['results']
+        self.assertEqual([(row['id'], row['view_count']) for row in trending], [(self.article.pk, 1)])
+
+    def test_diagnostic_requests_are_not_counted(self):
+        with views_not_counted():
+            self.client.get(f'/news/articles/{self.article.pk}/')
+        self.assertEqual(len(view_buffer), 0)
+        self.client.get(f'/news/articles/{self.article.pk}/')
+        self.assertEqual(len(view_buffer), 1)
+
+
+class ExplainEndpointsTests(TestCase):
+    """The EXPLAIN command requests every public endpoint without side effects."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Politics')
+        with cls.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(
+                title='Budget vote', category=category, related_keywords=['budget'], is_published=True,
+            )
+
+    def setUp(self):
+        stop_flush_timer()
+        self.addCleanup(stop_flush_timer)
+        view_buffer.drain()
+        self.addCleanup(view_buffer.drain)
+
+    def test_every_endpoint_answers_without_counting_views(self):
+        out = io.StringIO()
+        call_command('explain_endpoints', stdout=out)
+        self.assertEqual(len(view_buffer), 0)
+        requested = re.findall(r'^(.+): GET (\S+) -> (\d+)$', out.getvalue(), re.MULTILINE)
+        self.assertEqual({status for _, _, status in requested}, {'200'})
+        names = {name for name, _, _ in requested}
+        self.assertTrue({'home', 'full-text search', 'article detail', 'keyword filter'} <= names)
+
+
+class BenchmarkTests(TestCase):
+    """Benchmark statistics, run comparison and a reproducible corpus."""
+
+    def corpus(self, seed):
+        seed_corpus(articles=12, categories=3, seed=seed, chunk_size=5, content_words=60)
+        return list(
+            Article.objects.order_by('id').values_list(
+                'title', 'author', 'category__name', 'summary', 'content', 'is_published', 'tag', 'related_keywords',
+            )
+        )
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, pct) for pct in (0, 50, 95, 99, 100)], [1, 50, 95, 99, 100])
+        self.assertEqual(percentile([3.5], 99), 3.5)
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertIsNone(percentile([], 50))
+
+    def test_compare_runs_matches_endpoints_by_name(self):
+        baseline = {'results': [
+            {'name': 'list', 'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 0, 'queries': 4, 'bytes': 100},
+            {'name': 'gone', 'p50_ms': 1.0},
+        ]}
+        current = {'results': [
+            {'name': 'list', 'p50_ms': 5.0, 'p95_ms': 30.0, 'p99_ms': 1.0, 'queries': 4, 'bytes': 150},
+            {'name': 'new', 'p50_ms': 1.0},
+        ]}
+        [row] = compare_runs(baseline, current)
+        self.assertEqual(row['name'], 'list')
+        self.assertEqual(row['p50_ms'], {'baseline': 10.0, 'current': 5.0, 'ratio': 0.5})
+        self.assertEqual(row['p95_ms']['ratio'], 1.5)
+        self.assertEqual(row['queries']['ratio'], 1.0)
+        # No ratio against a zero baseline
+        self.assertIsNone(row['p99_ms']['ratio'])
+
+    def test_seed_corpus_is_deterministic(self):
+        first = self.corpus(seed=7)
+        self.assertEqual(len(first), 12)
+        Article.objects.all().delete()
+        Category.objects.all().delete()
+        self.assertEqual(self.corpus(seed=7), first)
+        Article.objects.all().delete()
+        Category.objects.all().delete()
+        self.assertNotEqual(self.corpus(seed=8), first)
+
+    def test_runs_do_not_count_views(self):
+        stop_flush_timer()
+        self.addCleanup(stop_flush_timer)
+        view_buffer.drain()
+        self.addCleanup(view_buffer.drain)
+        article = Article.objects.create(title='Measured', is_published=True)
+        report = run_benchmark(endpoints=[('detail', f'/news/articles/{article.pk}/')], iterations=3, warmup=1)
+        [result] = report['results']
+        self.assertEqual(result['status_codes'], {'200': 3})
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(len(view_buffer), 0)
+
+
+class MetricsTests(TestCase):
+    """Requests show up in the Prometheus scrape with their SQL and size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name='Politics')
+
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_scrape_after_a_request(self):
+        self.assertEqual(self.client.get('/news/categories/').status_code, 200)
+        self.client.get('/news/categories/99999/')
+        samples = self.scrape()
+
+        labels = 'view="CategoryListCreateView",method="GET"'
+        self.assertEqual(samples[f'news_http_requests_total{{{labels},status="200"}}'], 1)
+        self.assertEqual(
+            samples['news_http_requests_total{view="CategoryDetailView",method="GET",status="404"}'], 1
+        )
+        self.assertEqual(samples[f'news_http_request_queries_count{{{labels}}}'], 1)
+        self.assertGreaterEqual(samples[f'news_http_request_queries_sum{{{labels}}}'], 1)
+        self.assertGreater(samples[f'news_http_request_duration_seconds_sum{{{labels}}}'], 0)
+        self.assertEqual(samples[f'news_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], 1)
+        response = self.client.get('/news/categories/')
+        samples = self.scrape()
+        self.assertEqual(samples[f'news_http_response_size_bytes_count{{{labels}}}'], 2)
+        self.assertEqual(samples[f'news_http_response_size_bytes_sum{{{labels}}}'], 2 * len(response.content))
+
+    def test_histogram_buckets_are_upper_bounds(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 5, 9):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 2, 1])
+        self.assertEqual((histogram.count, histogram.total), (5, 18))
+
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with mock.patch('newsApp.metrics.SLOW_REQUEST_MS', 0), self.assertLogs('app', 'WARNING') as logs:
+            self.client.get('/news/categories/')
+        self.assertIn('Slow request', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+class RelatedArticlesTests(TestCase):
+    """The related index ranks shared terms and is refreshed off the request path."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.politics = Category.objects.create(name='Politics')
+        cls.budget = Article.objects.create(
+            title='Budget vote', related_keywords=['budget', 'parliament'], category=cls.politics, is_published=True,
+        )
+        cls.close = Article.objects.create(
+            title='Budget debate', related_keywords=['budget', 'parliament'], category=cls.politics, is_published=True,
+        )
+        cls.far = Article.objects.create(title='Tax', related_keywords=['budget'], is_published=True)
+        cls.unrelated = Article.objects.create(title='Final score', related_keywords=['football'], is_published=True)
+        cls.draft = Article.objects.create(title='Budget draft', related_keywords=['budget', 'parliament'])
+
+    def setUp(self):
+        cache.clear()
+
+    def related_ids(self, article):
+        return [pk for pk, _ in RelatedArticles.objects.get(article=article).related]
+
+    def test_rebuild_ranks_shared_terms(self):
+        self.assertEqual(rebuild_related(), 4)
+        self.assertEqual(self.related_ids(self.budget), [self.close.pk, self.far.pk])
+        self.assertEqual(self.related_ids(self.unrelated), [])
+        self.assertFalse(RelatedArticles.objects.filter(article=self.draft).exists())
+
+        response = self.client.get(f'/news/articles/{self.budget.pk}/related/')
+        results = response.json()['results']
+        self.assertEqual([item['id'] for item in results], [self.close.pk, self.far.pk])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+        self.assertEqual(self.client.get(f'/news/articles/{self.draft.pk}/related/').json(), {'results': []})
+        self.assertEqual(self.client.get('/news/articles/99999/related/').status_code, 404)
+
+    def test_refresh_updates_both_sides(self):
+        rebuild_related()
+        self.unrelated.related_keywords = ['budget', 'parliament']
+        self.unrelated.save()
+        refresh_related([self.unrelated.pk])
+        self.assertIn(self.budget.pk, self.related_ids(self.unrelated))
+        self.assertIn(self.unrelated.pk, self.related_ids(self.budget))
+
+        self.unrelated.is_published = False
+        self.unrelated.save()
+        refresh_related([self.unrelated.pk])
+        self.assertFalse(RelatedArticles.objects.filter(article=self.unrelated).exists())
+        response = self.client.get(f'/news/articles/{self.budget.pk}/related/')
+        self.assertNotIn(self.unrelated.pk, [item['id'] for item in response.json()['results']])
+
+    def test_saves_queue_one_batched_refresh(self):
+        executor = mock.Mock()
+        with mock.patch('newsApp.related.refresh_related_async', refresh_related_async), \
+                mock.patch('newsApp.related._refresh_executor', executor), \
+                mock.patch('newsApp.related.refresh_related') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.budget.save()
+                self.close.save()
+            # Nothing ran on the writer's thread; one refresh is queued for both
+            refresh.assert_not_called()
+            executor.submit.assert_called_once_with(_refresh_in_background)
+            _refresh_in_background()
+            refresh.assert_called_once_with({self.budget.pk, self.close.pk})
 
-# Create your tests here.
@@ -0,0 +1,244 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import Article
+
+logger = logging.getLogger("app")
+
+VIEW_FLUSH_SECONDS = getattr(settings, 'NEWS_VIEW_FLUSH_SECONDS', 10)
+VIEW_FLUSH_MAX = getattr(settings, 'NEWS_VIEW_FLUSH_MAX', 1000)
+TRENDING_HALF_LIFE_HOURS = getattr(settings, 'NEWS_TRENDING_HALF_LIFE_HOURS', 6)
+TRENDING_FEED_SIZE = getattr(settings, 'NEWS_TRENDING_FEED_SIZE', 20)
+
+# Scores are log2(sum of views * 2 ** (half-lives since TRENDING_EPOCH)), so
+# decaying every score by the same factor never needs a write: a view an
+# hour from now simply weighs more. Changing the half-life changes the
+# scale; existing scores then rank as if viewed at a different time.
+TRENDING_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def trending_exponent(timestamp=None):
+    """Half-lives between ``TRENDING_EPOCH`` and ``timestamp`` (default: now)."""
+    seconds = (time.time() if timestamp is None else timestamp) - TRENDING_EPOCH
+    return seconds / (TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+class ViewBuffer:
+    """
+    Page views per article counted in process memory, so a view costs a
+    dict increment. Slugs of by-slug requests are resolved at flush time.
+    """
+
+    def __init__(self):
+        self._ids = Counter()
+        self._slugs = Counter()
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def add(self, pk=None, slug=None, count=1):
+        """Counts a view; returns whether the buffer is due for a flush."""
+        with self._lock:
+            if pk is not None:
+                self._ids[pk] += count
+            elif slug is not None:
+                self._slugs[slug] += count
+            size = len(self._ids) + len(self._slugs)
+            return size >= VIEW_FLUSH_MAX or time.monotonic() - self._started >= VIEW_FLUSH_SECONDS
+
+    def drain(self):
+        """``(views by id, views by slug)`` counted so far, emptying the buffer."""
+        with self._lock:
+            ids, slugs = self._ids, self._slugs
+            self._ids, self._slugs = Counter(), Counter()
+            self._started = time.monotonic()
+            return ids, slugs
+
+    def restore(self, ids, slugs):
+        with self._lock:
+            self._ids.update(ids)
+            self._slugs.update(slugs)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids) + len(self._slugs)
+
+
+view_buffer = ViewBuffer()
+
+_flush_lock = threading.Lock()
+_flush_executor = None
+_flush_pending = False
+_flush_timer = None
+# False while serving diagnostic traffic (see views_not_counted)
+_counting_views = ContextVar('counting_views', default=True)
+
+
+def write_views(ids, slugs=None):
+    """
+    Adds ``ids`` (id -> views) to the articles' ``view_count`` and
+    ``trending`` scores: one locking read and one batched UPDATE, whatever
+    the number of views. Unknown ids and slugs are dropped.
+    """
+    ids = Counter(ids)
+    if slugs:
+        for slug, pk in Article.objects.filter(slug__in=list(slugs)).values_list('slug', 'id'):
+            ids[pk] += slugs[slug]
+    if not ids:
+        return 0
+
+    exponent = trending_exponent()
+    with transaction.atomic():
+        rows = list(
+            Article.objects.select_for_update().filter(pk__in=list(ids)).order_by('pk')
+            .values_list('id', 'view_count', 'trending')
+        )
+        if not rows:
+            return 0
+        views = np.array([ids[pk] for pk, _, _ in rows], dtype=float)
+        scores = np.array([trending for _, _, trending in rows], dtype=float)
+        added = exponent + np.log2(views)
+        scores = np.where(scores > 0, np.logaddexp2(scores, added), added)
+        Article.objects.bulk_update(
+            [
+                Article(pk=pk, view_count=view_count + ids[pk], trending=float(score))
+                for (pk, view_count, _), score in zip(rows, scores)
+            ],
+            ['view_count', 'trending'],
+            batch_size=500,
+        )
+    return len(rows)
+
+
+def flush_views():
+    """Writes the buffered views of this process; failed batches go back in the buffer."""
+    global _flush_pending
+    with _flush_lock:
+        _flush_pending = False
+    ids, slugs = view_buffer.drain()
+    try:
+        write_views(ids, slugs)
+    except Exception:
+        logger.exception(
+            "View count flush failed",
+            extra={"view": None, "method": None, "path": None, "status_code": None},
+        )
+        view_buffer.restore(ids, slugs)
+
+
+def _flush_in_background():
+    close_old_connections()
+    try:
+        flush_views()
+    finally:
+        close_old_connections()
+
+
+def schedule_flush():
+    """Flushes off the request path, at most one flush queued at a time."""
+    global _flush_executor, _flush_pending
+    with _flush_lock:
+        if _flush_pending:
+            return
+        _flush_pending = True
+        if _flush_executor is None:
+            _flush_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='view-flush')
+    _flush_executor.submit(_flush_in_background)
+
+
+def _flush_periodically(stopped):
+    while not stopped.wait(VIEW_FLUSH_SECONDS):
+        if view_buffer:
+            schedule_flush()
+
+
+def start_flush_timer():
+    """
+    Starts this process's flush timer, so views counted just before a
+    worker goes idle are written within ``VIEW_FLUSH_SECONDS`` rather than
+    at the next view or at exit. Started on the first view, and again in
+    a forked worker, where the parent's thread does not run.
+    """
+    global _flush_timer
+    if _flush_timer is not None and _flush_timer.is_alive():
+        return
+    with _flush_lock:
+        if _flush_timer is None or not _flush_timer.is_alive():
+            stopped = threading.Event()
+            _flush_timer = threading.Thread(
+                target=_flush_periodically, args=(stopped,), name='view-flush-timer', daemon=True,
+            )
+            _flush_timer.stopped = stopped
+            _flush_timer.start()
+
+
+def stop_flush_timer():
+    """Stops this process's flush timer and waits for it to exit."""
+    global _flush_timer
+    with _flush_lock:
+        timer, _flush_timer = _flush_timer, None
+    if timer is not None:
+        timer.stopped.set()
+        timer.join()
+
+
+@contextmanager
+def views_not_counted():
+    """Leaves the article views served inside uncounted, for diagnostic traffic."""
+    token = _counting_views.set(False)
+    try:
+        yield
+    finally:
+        _counting_views.reset(token)
+
+
+def count_view(pk=None, slug=None):
+    if not _counting_views.get():
+        return
+    start_flush_timer()
+    if view_buffer.add(pk=pk, slug=slug):
+        schedule_flush()
+
+
+# Views still buffered when the worker exits
+atexit.register(flush_views)
+
+
+class ViewCountMixin:
+    """
+    Counts successful GETs of an article, cached and 304 responses
+    included, by the ``pk`` or ``slug`` URL argument. List it before
+    ``CachedResponseMixin`` so cache hits are counted.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self._arecord_view(request, response, kwargs)
+        self.record_view(request, response, kwargs)
+        return response
+
+    async def _arecord_view(self, request, response, kwargs):
+        response = await response
+        self.record_view(request, response, kwargs)
+        return response
+
+    def record_view(self, request, response, kwargs):
+        if request.method == 'GET' and response.status_code in (200, 304):
+            count_view(pk=kwargs.get('pk'), slug=kwargs.get('slug'))
+
+
+def trending_queryset(queryset=None):
+    """Published, viewed articles hottest first."""
+    queryset = Article.objects.all() if queryset is None else queryset
+    return queryset.filter(is_published=True, trending__gt=0).order_by('-trending', '-id')
@@ -1,12 +1,32 @@
 from django.urls import path
 from .views import *
+from .async_views import (
+    ArticleEventStreamView, AsyncArticleDetailView, AsyncArticleListView, AsyncArticlesByCategoryView,
+    AsyncCategoryListView,
+)
 
 urlpatterns = [
     path('categories/', CategoryListCreateView.as_view(), name='category-list'),
     path('categories/<int:pk>/', CategoryDetailView.as_view(), name='category-detail'),
+    path('categories/by-slug/<slug:slug>/', CategoryBySlugView.as_view(), name='category-by-slug'),
     path('categories/<int:category_id>/articles/', ArticlesByCategoryView.as_view(), name='articles-by-category'),
     path('articles/', ArticleListCreateView.as_view(), name='article-list'),
+    path('articles/bulk/', ArticleBulkIngestView.as_view(), name='article-bulk-ingest'),
+    path('articles/trending/', ArticleTrendingView.as_view(), name='article-trending'),
+    path('articles/export/', ArticleExportView.as_view(), name='article-export'),
     path('articles/<int:pk>/', ArticleDetailView.as_view(), name='article-detail'),
+    path('articles/<int:pk>/related/', ArticleRelatedView.as_view(), name='article-related'),
+    path('articles/by-slug/<slug:slug>/', ArticleBySlugView.as_view(), name='article-by-slug'),
+    path('home/', HomeView.as_view(), name='home'),
+    path('keywords/', KeywordFrequencyView.as_view(), name='keyword-frequencies'),
     path('upload/', FileUploadView.as_view(), name='upload-file'),
+    path('upload/presign/', PresignedUploadView.as_view(), name='upload-presign'),
+    path('upload/complete/', UploadCompleteView.as_view(), name='upload-complete'),
     path('user/', UserAPIView.as_view(), name='create_user'),
+    # Async read path, see news_channel/asgi.py
+    path('async/categories/', AsyncCategoryListView.as_view(), name='async-category-list'),
+    path('async/categories/<int:category_id>/articles/', AsyncArticlesByCategoryView.as_view(), name='async-articles-by-category'),
+    path('async/articles/', AsyncArticleListView.as_view(), name='async-article-list'),
+    path('async/articles/<int:pk>/', AsyncArticleDetailView.as_view(), name='async-article-detail'),
+    path('events/', ArticleEventStreamView.as_view(), name='article-events'),
 ]
@@ -1,82 +1,364 @@
+import logging
 import os
-import boto3
 import uuid
 from rest_framework import generics, status, filters
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.parsers import JSONParser
 from .models import Category, Article
 from .permissions import IsAdminOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core import signing
 from django.db import transaction
 from .serializers import *
-from .pagination import StandardResultsSetPagination
+from .pagination import StandardResultsSetPagination, SelectablePaginationMixin
+from .cache import CachedResponseMixin
+from .counts import get_counts, wants_estimated_counts
+from .search import FIELD_WEIGHTS, FullTextSearchFilter, add_search_metadata
+from .keywords import KeywordFilter, keyword_frequencies
+from .fieldsets import SparseFieldsetMixin
+from .rows import ValuesListMixin
+from .slugs import SlugRetrieveMixin
+from .export import CONTENT_TYPES, EXPORTERS, ExportRateThrottle, parse_updated_since
+from .ingest import INGEST_CHUNK_SIZE, NDJSONParser, ingest_articles
+from .bulk import BULK_UPDATE_MAX, filtered_articles, update_article_items, update_articles
+from .storage import PhaseTimer, object_url, presign_upload, stored_object, upload_file
+from .images import banner_variants, rendered_variants, schedule_variants, schedule_variants_for_key, stored_image_key
+from .home import get_home_snapshot
+from .routers import request_read_database
+from .feeds import TAGS, HotFeedMixin, compact_queryset
+from .related import get_related
+from .trending import TRENDING_FEED_SIZE, VIEW_FLUSH_SECONDS, ViewCountMixin, trending_queryset
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
+from django.http import StreamingHttpResponse
 from django.conf import settings
 
+logger = logging.getLogger("app")
+
+UPLOAD_TOKEN_SALT = 'newsApp.upload'
+
 
 
 # CATEGORY VIEWS
-class CategoryListCreateView(generics.ListCreateAPIView):
+class CategoryListCreateView(CachedResponseMixin, SparseFieldsetMixin, ValuesListMixin, generics.ListCreateAPIView):
+    cache_models = (Category,)
     queryset = Category.objects.all().order_by('-updated_at')
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['updated_at', 'created_at', 'name']
     ordering = ['-updated_at']
+    always_loaded_fields = ('id', 'updated_at')
+
+    def get_queryset(self):
+        return self.project_queryset(super().get_queryset())
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
 
+class CategoryBySlugView(CachedResponseMixin, SlugRetrieveMixin, generics.RetrieveAPIView):
+    cache_models = (Category,)
+    queryset = Category.objects.all()
+    serializer_class = CategorySerializer
+    permission_classes = [AllowAny]
+    slug_url_name = 'category-by-slug'
+
 
 # ARTICLE VIEWS
-class ArticleListCreateView(generics.ListCreateAPIView):
+class ArticleListCreateView(CachedResponseMixin, SelectablePaginationMixin, SparseFieldsetMixin, HotFeedMixin, ValuesListMixin, generics.ListCreateAPIView):
+    cache_models = (Article, Category)
     queryset = Article.objects.all().order_by('-updated_at')
     serializer_class = ArticleSerializer
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, KeywordFilter, filters.SearchFilter, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category', 'is_published', 'tag' , 'slug']
     search_fields = ['title', 'summary', 'slug']
-    ordering_fields = ['updated_at', 'created_at', 'title']
+    ordering_fields = ['updated_at', 'created_at', 'title', 'trending']
     ordering = ['-updated_at']
     pagination_class = StandardResultsSetPagination
+    compact_fields = ARTICLE_COMPACT_FIELDS
+    always_loaded_fields = ('id', 'created_at', 'updated_at', 'published_at', 'is_published')
+    hot_feed_filters = ('tag', 'category', 'is_published')
+    hot_feed_requires_group = True
+
+    def get_hot_feed_group(self):
+        params = self.request.query_params
+        published = {None: None, 'true': True, 'false': False}.get(params.get('is_published'), 'invalid')
+        if published == 'invalid' or ('tag' in params) == ('category' in params):
+            return None
+        if 'tag' in params:
+            return ('tag', params['tag'], published) if params['tag'] in TAGS else None
+        category = params['category']
+        return ('category', int(category), published) if category.isdigit() else None
+
+    def get_loaded_fields(self):
+        fields = super().get_loaded_fields()
+        # Highlights for ?q= read every searchable column
+        if self.request.query_params.get('q'):
+            fields.update(FIELD_WEIGHTS)
+        return fields
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        related_kw = self.request.query_params.get('related_keywords')
-        if related_kw:
-            queryset = queryset.filter(related_keywords__icontains=related_kw)
-        return queryset
+        return self.project_queryset(super().get_queryset())
+
+    def get_row_converter(self):
+        # Search results annotate the model instances with scores and highlights
+        if self.request.query_params.get('q'):
+            return None
+        return super().get_row_converter()
 
     def list(self, request, *args, **kwargs):
+        # First pages of tag/category feeds come from the hot-feed store
+        response = self.hot_feed_response(with_counts=True)
+        if response is not None:
+            return response
+
         queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-        serializer = self.get_serializer(page, many=True)
+
+        # Keyset pages carry no totals, so skip the count query altogether
+        if self.uses_cursor_pagination():
+            page = self.paginate_queryset(self.values_queryset(queryset))
+            return self.get_paginated_response(add_search_metadata(self, page, self.serialize_rows(page)))
+
+        # One aggregate query feeds both the paginator total and the counts block
+        totals, approximate = get_counts(queryset, estimated=wants_estimated_counts(request))
+        page = self.paginator.paginate_queryset(
+            self.values_queryset(queryset), request, view=self, count=totals['total']
+        )
 
         counts = {
-            'published': queryset.filter(is_published=True).count(),
-            'draft': queryset.filter(is_published=False).count(),
+            'published': totals['published'],
+            'draft': totals['draft'],
         }
 
         # Pass counts to pagination response
-        return self.paginator.get_paginated_response(serializer.data, counts=counts)
+        data = add_search_metadata(self, page, self.serialize_rows(page))
+        return self.paginator.get_paginated_response(data, counts=counts, approximate=approximate)
+
+class ArticleDetailView(ViewCountMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_models = (Article, Category)
+    queryset = Article.objects.select_related('category')
+    serializer_class = ArticleSerializer
+    permission_classes = [IsAdminOrReadOnly]
+
+
+class ArticleBySlugView(ViewCountMixin, CachedResponseMixin, SlugRetrieveMixin, generics.RetrieveAPIView):
+    """
+    The article behind a public URL, without the list machinery (filters,
+    counts, pagination) that ``/news/articles/?slug=`` runs for one row.
+    """
+    cache_models = (Article, Category)
+    queryset = Article.objects.select_related('category')
+    serializer_class = ArticleSerializer
+    permission_classes = [AllowAny]
+    slug_url_name = 'article-by-slug'
+
 
-class ArticleDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ArticleTrendingView(CachedResponseMixin, SparseFieldsetMixin, ValuesListMixin, generics.ListAPIView):
+    """
+    The ``NEWS_TRENDING_FEED_SIZE`` most viewed published articles, views
+    decaying by half every ``NEWS_TRENDING_HALF_LIFE_HOURS``. Compact
+    unless ``?fields=`` asks otherwise; ``?category=`` and ``?tag=`` narrow
+    it. Articles include their ``view_count``, which no other endpoint
+    shows. Scores move with flushed views rather than writes, so responses
+    are cached for the flush interval only.
+    """
+    cache_models = (Article, Category)
+    cache_timeout = VIEW_FLUSH_SECONDS
+    serializer_class = TrendingArticleSerializer
+    permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['category', 'tag']
+    compact_fields = ARTICLE_TRENDING_FIELDS
+
+    def get_requested_fields(self):
+        return super().get_requested_fields() or list(self.compact_fields)
+
+    def get_queryset(self):
+        return self.project_queryset(trending_queryset())
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.values_queryset(self.filter_queryset(self.get_queryset()))
+        return Response({'results': self.serialize_rows(queryset[:TRENDING_FEED_SIZE])})
+
+
+class ArticleRelatedView(CachedResponseMixin, generics.GenericAPIView):
+    """
+    Published articles related to an article, best first, from the
+    precomputed index (see ``related.py``): two primary-key reads however
+    large the table. Unpublished and unindexed articles have none.
+    """
+    cache_models = (Article, Category)
+    serializer_class = ArticleSerializer
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk):
+        related = get_related(pk)
+        if related is None:
+            if not Article.objects.filter(pk=pk).exists():
+                raise NotFound("No Article matches the given query.")
+            related = []
+        articles = compact_queryset().filter(is_published=True).in_bulk([related_pk for related_pk, _ in related])
+        serializer = self.get_serializer(fields=ARTICLE_COMPACT_FIELDS)
+        results = [
+            {**serializer.to_representation(articles[related_pk]), 'score': score}
+            for related_pk, score in related if related_pk in articles
+        ]
+        return Response({'results': results})
+
+
+class ArticleExportView(generics.GenericAPIView):
+    """
+    Streams every article matching the list filters as NDJSON (default) or
+    CSV (``?export_format=csv``), optionally bounded by ``?updated_since=``.
+    Only staff export drafts; everyone else gets published articles, at
+    ``NEWS_EXPORT_THROTTLE_RATE``.
+    """
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     permission_classes = [IsAdminOrReadOnly]
+    throttle_classes = [ExportRateThrottle]
+    filter_backends = [DjangoFilterBackend, KeywordFilter, filters.SearchFilter, FullTextSearchFilter]
+    filterset_fields = ArticleListCreateView.filterset_fields
+    search_fields = ArticleListCreateView.search_fields
+    # An export of ?q= holds every match, not just the best ranked ones
+    search_max_results = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(is_published=True)
+        return queryset
+
+    def get(self, request):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORTERS:
+            raise ValidationError({'export_format': f"Choose one of: {', '.join(EXPORTERS)}"})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            since = parse_updated_since(updated_since)
+            if since is None:
+                raise ValidationError({'updated_since': "Expected an ISO 8601 date or datetime"})
+            queryset = queryset.filter(updated_at__gte=since)
+
+        # Rows are read while streaming, after the routing middleware is done
+        queryset = queryset.using(request_read_database())
+        response = StreamingHttpResponse(
+            EXPORTERS[export_format](queryset), content_type=CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="articles.{export_format}"'
+        return response
+
+
+class ArticleBulkIngestView(APIView):
+    """
+    POST creates (or with ``?upsert=true`` updates) many articles from a
+    JSON array or NDJSON body, in chunks of ``?chunk_size=``.
+
+    PATCH updates existing articles in one transaction, from a JSON object
+    with exactly one of:
+
+    - ``{"ids": [1, 2], "changes": {...}}``: the same changes for every id
+    - ``{"filter": {"tag": ..., "category": ...}, "changes": {...}}``: the
+      same changes for every article the list filters match
+    - ``{"items": [{"id": 1, "title": ...}, ...]}``: changes per article
+
+    Both report the outcome of every row.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({'non_field_errors': ["Expected a JSON array or NDJSON body"]})
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', INGEST_CHUNK_SIZE))
+        except ValueError:
+            raise ValidationError({'chunk_size': ["A valid integer is required."]})
+        if chunk_size < 1:
+            raise ValidationError({'chunk_size': ["Must be at least 1."]})
+
+        upsert = request.query_params.get('upsert') in ('1', 'true')
+        result = ingest_articles(rows, chunk_size=chunk_size, upsert=upsert)
+        response_status = status.HTTP_201_CREATED if not result.failed else status.HTTP_207_MULTI_STATUS
+        return Response(result.as_dict(), status=response_status)
+
+    def patch(self, request):
+        body = request.data
+        if not isinstance(body, dict):
+            raise ValidationError({'non_field_errors': ["Expected a JSON object"]})
+        modes = [mode for mode in ('ids', 'filter', 'items') if mode in body]
+        if len(modes) != 1:
+            raise ValidationError({'non_field_errors': ["Send exactly one of 'ids', 'filter' or 'items'."]})
+        mode = modes[0]
+
+        if mode == 'items':
+            items = body['items']
+            if not isinstance(items, list) or len(items) > BULK_UPDATE_MAX:
+                raise ValidationError({'items': [f"Expected a list of at most {BULK_UPDATE_MAX} objects."]})
+            result = update_article_items(items)
+        elif mode == 'ids':
+            ids = body['ids']
+            if not isinstance(ids, list) or not all(type(pk) is int for pk in ids) or len(ids) > BULK_UPDATE_MAX:
+                raise ValidationError({'ids': [f"Expected a list of at most {BULK_UPDATE_MAX} integers."]})
+            result = update_articles(Article.objects.filter(pk__in=ids), body.get('changes'), ids=ids)
+        else:
+            if not isinstance(body['filter'], dict) or not body['filter']:
+                raise ValidationError({'filter': ["Expected a non-empty JSON object."]})
+            result = update_articles(filtered_articles(body['filter']), body.get('changes'))
+
+        response_status = status.HTTP_200_OK if not result.failed else status.HTTP_207_MULTI_STATUS
+        return Response(result.as_dict(), status=response_status)
 
 
 # ARTICLES BY CATEGORY
-class ArticlesByCategoryView(generics.ListAPIView):
+class ArticlesByCategoryView(CachedResponseMixin, SelectablePaginationMixin, SparseFieldsetMixin, HotFeedMixin, ValuesListMixin, generics.ListAPIView):
+    cache_models = (Article, Category)
     serializer_class = ArticleSerializer
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
+    compact_fields = ARTICLE_COMPACT_FIELDS
+    always_loaded_fields = ('id', 'updated_at', 'published_at')
+
+    def get_hot_feed_group(self):
+        return ('category', self.kwargs['category_id'], None)
 
     def get_queryset(self):
         category_id = self.kwargs['category_id']
-        return Article.objects.filter(category_id=category_id).order_by('-updated_at')
+        queryset = Article.objects.filter(category_id=category_id).order_by('-updated_at')
+        return self.project_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        return self.hot_feed_response() or super().list(request, *args, **kwargs)
+
+
+# KEYWORDS
+class KeywordFrequencyView(CachedResponseMixin, generics.ListAPIView):
+    cache_models = (Article,)
+    serializer_class = KeywordFrequencySerializer
+    permission_classes = [AllowAny]
+    pagination_class = StandardResultsSetPagination
+
+    def get_queryset(self):
+        return keyword_frequencies(prefix=self.request.query_params.get('prefix'))
+
+
+# HOME VIEWS
+class HomeView(APIView):
+    """
+    Top published articles per tag and per category for the front page,
+    served from a snapshot that is rebuilt when the homepage can change.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(get_home_snapshot())
 
 
 class FileUploadView(APIView):
@@ -88,60 +370,114 @@ class FileUploadView(APIView):
             # Generate unique filename
             ext = os.path.splitext(file.name)[1]
             unique_filename = f"{uuid.uuid4().hex}{ext}"
-            
+            timer = PhaseTimer()
+
+            # Keep image bytes for the variant pipeline; the upload consumes the file
+            image_data = None
+            if (file.content_type or '').startswith('image/'):
+                image_data = file.read()
+                file.seek(0)
+
             try:
-                # METHOD 1: Use boto3 directly (recommended for debugging)
-                session = boto3.session.Session()
-                s3_client = session.client(
-                    's3',
-                    region_name=settings.AWS_S3_REGION_NAME,
-                    endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-                )
-                
-                # Upload file using boto3 directly
-                s3_client.upload_fileobj(
+                file_url = upload_file(
                     file.file,  # Use file.file for UploadedFile object
-                    settings.AWS_STORAGE_BUCKET_NAME,
                     unique_filename,
-                    ExtraArgs={
-                        'ACL': 'public-read',
-                        'ContentType': file.content_type or 'application/octet-stream'
-                    }
+                    file.content_type or 'application/octet-stream',
+                    timer=timer,
                 )
-                
-                # Construct URL
-                endpoint_url = settings.AWS_S3_ENDPOINT_URL.rstrip('/')
-                file_url = f"{endpoint_url}/{settings.AWS_STORAGE_BUCKET_NAME}/{unique_filename}"
-                
-                # Verify upload
-                try:
-                    s3_client.head_object(
-                        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-                        Key=unique_filename
-                    )
-                    print("File successfully verified in DigitalOcean Spaces")
-                except Exception as e:
-                    print(f"File verification failed: {e}")
-                    return Response(
-                        {"error": "File upload verification failed"},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
-                
-                return Response({
-                    "url": file_url,
-                }, status=status.HTTP_201_CREATED)
-                
             except Exception as e:
-                print(f"Upload error: {str(e)}")
+                logger.error(
+                    "File upload failed",
+                    extra={
+                        "view": self.__class__.__name__,
+                        "method": request.method,
+                        "path": request.path,
+                        "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        "error": str(e),
+                    },
+                )
                 return Response(
                     {"error": f"Upload failed: {str(e)}"},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
+
+            # Resized variants are rendered in a process pool after we respond;
+            # they are listed once stored (inline with NEWS_IMAGE_WORKERS = 0)
+            variants = None
+            if image_data and schedule_variants(unique_filename, image_data):
+                variants = banner_variants(rendered_variants([unique_filename]).get(unique_filename))
+
+            response = Response({
+                "url": file_url,
+                "variants": variants,
+            }, status=status.HTTP_201_CREATED)
+            response['Server-Timing'] = timer.server_timing()
+            return response
                 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class PresignedUploadView(APIView):
+    """
+    Issues a presigned POST (or PUT) so the client uploads straight to the
+    bucket; the returned token is then sent to ``UploadCompleteView``.
+    """
+
+    def post(self, request):
+        serializer = PresignedUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        ext = os.path.splitext(data['filename'])[1]
+        key = f"{uuid.uuid4().hex}{ext}"
+        upload = presign_upload(key, data['content_type'], data['size'], method=data['method'])
+        token = signing.dumps(
+            {'key': key, 'content_type': data['content_type'], 'size': data['size']},
+            salt=UPLOAD_TOKEN_SALT,
+        )
+        return Response({
+            "key": key,
+            "url": object_url(key),
+            "upload": upload,
+            "token": token,
+        }, status=status.HTTP_201_CREATED)
+
+
+class UploadCompleteView(APIView):
+    """
+    Registers a direct upload: checks the object exists with the size and
+    content type that were presigned, then queues image variants.
+    """
+
+    def post(self, request):
+        serializer = CompleteUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = signing.loads(
+                serializer.validated_data['token'],
+                salt=UPLOAD_TOKEN_SALT,
+                max_age=settings.NEWS_PRESIGNED_UPLOAD_EXPIRY * 2,
+            )
+        except signing.BadSignature:
+            raise ValidationError({'token': ["Invalid or expired upload token."]})
+
+        stored = stored_object(upload['key'])
+        if stored is None:
+            raise ValidationError({'token': ["The object has not been uploaded."]})
+        if stored['ContentLength'] != upload['size'] or stored.get('ContentType') != upload['content_type']:
+            raise ValidationError({'token': ["The uploaded object does not match the presigned size or content type."]})
+
+        file_url = object_url(upload['key'])
+        variants = None
+        if upload['content_type'].startswith('image/') and stored_image_key(file_url):
+            schedule_variants_for_key(upload['key'])
+            variants = banner_variants(rendered_variants([upload['key']]).get(upload['key']))
+
+        return Response({
+            "url": file_url,
+            "variants": variants,
+        }, status=status.HTTP_201_CREATED)
+
+
 class UserAPIView(APIView):
     def get_permissions(self):
         # POST is public, PATCH requires authentication
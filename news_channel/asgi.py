@@ -3,6 +3,16 @@ ASGI config for news_channel project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with uvicorn workers to get the async read endpoints under
+``/news/async/`` (article list and detail, articles by category, categories)
+without a thread per in-flight request, and the Server-Sent Events stream at
+``/news/events/``, which only the ASGI application serves:
+
+    DB_CONN_MAX_AGE=0 gunicorn news_channel.asgi:application -k uvicorn.workers.UvicornWorker
+
+Writes and the remaining endpoints are sync DRF views, which Django runs in
+a thread pool under ASGI; ``news_channel.wsgi`` keeps working unchanged.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
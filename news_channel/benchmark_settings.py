@@ -0,0 +1,25 @@
+"""
+Settings for the benchmark suite:
+
+    DJANGO_SETTINGS_MODULE=news_channel.benchmark_settings python manage.py migrate
+    DJANGO_SETTINGS_MODULE=news_channel.benchmark_settings python manage.py seed_benchmark --articles 1000000
+    DJANGO_SETTINGS_MODULE=news_channel.benchmark_settings python manage.py benchmark --output run.json
+
+Uses a local sqlite file unless BENCHMARK_DB=mysql, which keeps the MySQL
+database configured in ``settings``. DB_REPLICAS names sqlite files to read
+from (copies of the benchmark database) to exercise replica routing locally.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, Csv, config, replica_databases
+
+DEBUG = False
+
+if config('BENCHMARK_DB', default='sqlite') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('BENCHMARK_SQLITE_PATH', default=str(BASE_DIR / 'benchmark.sqlite3')),
+        }
+    }
+    DATABASES.update(replica_databases(DATABASES['default'], config('DB_REPLICAS', default='', cast=Csv())))
+    NEWS_DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
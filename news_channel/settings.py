@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import pymysql
 pymysql.install_as_MySQLdb()
 
@@ -59,6 +59,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so latency covers every other middleware; exposed on /metrics
+    'newsApp.metrics.MetricsMiddleware',
+    # Before anything that reads the database; see DATABASE_ROUTERS
+    'newsApp.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -72,11 +76,17 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication with a short-lived user cache
+        'newsApp.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        # JSONRenderer's output, encoded with orjson when it is installed
+        'newsApp.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     "EXCEPTION_HANDLER": "newsApp.exception_handler.custom_exception_handler"
 }
 
@@ -105,7 +115,8 @@ LOGGING = {
     "loggers": {
         "app": {
             "handlers": ["console"],
-            "level": "ERROR",
+            # WARNING includes the slow request log of newsApp.metrics
+            "level": config('APP_LOG_LEVEL', default='WARNING'),
             "propagate": False,
         },
     },
@@ -117,6 +128,11 @@ SIMPLE_JWT = {
 
     # Refresh token valid for 7 days (you can adjust as needed)
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+
+    # Access tokens carry the is_staff claim used by NEWS_JWT_STATELESS_STAFF,
+    # read from the user on login and on every refresh
+    'TOKEN_OBTAIN_SERIALIZER': 'newsApp.authentication.NewsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'newsApp.authentication.NewsTokenRefreshSerializer',
 }
 
 ROOT_URLCONF = 'news_channel.urls'
@@ -178,9 +194,115 @@ DATABASES = {
                 'ca': str(BASE_DIR / 'ca-certificate.crt'),  # Download from DO
             }
         },
+        # Keep each worker's connection (and its TLS session) for this many
+        # seconds instead of reconnecting per request. Run ASGI workers with
+        # DB_CONN_MAX_AGE=0: their requests use new threads, so persistent
+        # connections would pile up rather than be reused.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=300, cast=int),
+        # Ping a reused connection before the request uses it, so one the
+        # server dropped is replaced instead of failing the request.
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+def replica_databases(primary, replicas):
+    """
+    One alias per read replica, a copy of ``primary`` with another host, or
+    another file for sqlite (local testing). Tests use the primary instead.
+    """
+    field = 'NAME' if primary['ENGINE'].endswith('sqlite3') else 'HOST'
+    return {
+        f'replica{index}': {**primary, field: replica, 'TEST': {'MIRROR': 'default'}}
+        for index, replica in enumerate(replicas, 1)
+    }
+
+
+# Read replicas: comma-separated hosts (sqlite: files) that safe-method requests
+# read from. Clients that wrote read from the primary for NEWS_DB_PIN_SECONDS.
+DATABASES.update(replica_databases(DATABASES['default'], config('DB_REPLICAS', default='', cast=Csv())))
+NEWS_DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+NEWS_DB_PIN_SECONDS = config('NEWS_DB_PIN_SECONDS', default=5, cast=int)
+DATABASE_ROUTERS = ['newsApp.routers.ReplicaRouter']
+
+# Cache
+# Local memory by default; set CACHE_BACKEND/CACHE_LOCATION to a shared backend (Redis)
+# in production so every worker sees the same response cache and generation counters.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='news-default'),
     }
 }
 
+# Seconds a rendered public GET response is kept before it is rebuilt even
+# without a write.
+NEWS_RESPONSE_CACHE_TIMEOUT = config('NEWS_RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Serve cached/estimated article counts (flagged "approximate") instead of an
+# exact aggregate per request. Clients can also opt in with ?counts=estimated.
+NEWS_ESTIMATED_COUNTS = config('NEWS_ESTIMATED_COUNTS', default=False, cast=bool)
+NEWS_COUNT_CACHE_TIMEOUT = config('NEWS_COUNT_CACHE_TIMEOUT', default=60, cast=int)
+NEWS_ESTIMATED_COUNT_THRESHOLD = config('NEWS_ESTIMATED_COUNT_THRESHOLD', default=10000, cast=int)
+
+# Article search (?q=). Defaults to FULLTEXT on MySQL and an in-process
+# inverted index elsewhere; set a dotted path to force a backend. List
+# results stop at the best NEWS_SEARCH_MAX_RESULTS matches (exports do not).
+NEWS_SEARCH_BACKEND = config('NEWS_SEARCH_BACKEND', default=None)
+NEWS_SEARCH_MAX_RESULTS = config('NEWS_SEARCH_MAX_RESULTS', default=1000, cast=int)
+
+# Rows per bulk_create/bulk_update batch in the article bulk ingest API.
+NEWS_INGEST_CHUNK_SIZE = config('NEWS_INGEST_CHUNK_SIZE', default=500, cast=int)
+# Most articles one bulk PATCH (ids, filter matches or items) may update.
+NEWS_BULK_UPDATE_MAX = config('NEWS_BULK_UPDATE_MAX', default=1000, cast=int)
+# /news/articles/export/ streams per user (per IP when anonymous) for non-staff
+# clients, who only get published articles. Staff exports are not limited.
+NEWS_EXPORT_THROTTLE_RATE = config('NEWS_EXPORT_THROTTLE_RATE', default='10/hour')
+
+# /news/home/: articles per tag/category strip, number of category strips, and
+# how long a snapshot lives without a publish/unpublish rebuilding it.
+NEWS_HOME_ITEMS = config('NEWS_HOME_ITEMS', default=6, cast=int)
+NEWS_HOME_CATEGORIES = config('NEWS_HOME_CATEGORIES', default=12, cast=int)
+NEWS_HOME_SNAPSHOT_TIMEOUT = config('NEWS_HOME_SNAPSHOT_TIMEOUT', default=300, cast=int)
+
+# Hot feeds: newest articles kept per tag and per category for the first pages
+# of compact feed requests (0 disables), and how long an untouched feed lives.
+NEWS_HOT_FEED_SIZE = config('NEWS_HOT_FEED_SIZE', default=200, cast=int)
+NEWS_HOT_FEED_TIMEOUT = config('NEWS_HOT_FEED_TIMEOUT', default=300, cast=int)
+
+# Server-Sent Events stream (/news/events/, ASGI only): events kept for
+# Last-Event-ID replay, keep-alive interval in seconds, and an optional dotted
+# path to a broker shared between processes (default: in-process).
+NEWS_EVENT_BACKLOG = config('NEWS_EVENT_BACKLOG', default=1000, cast=int)
+NEWS_EVENT_HEARTBEAT = config('NEWS_EVENT_HEARTBEAT', default=15, cast=int)
+NEWS_EVENT_BROKER = config('NEWS_EVENT_BROKER', default=None)
+
+# Seconds an authenticated user stays cached between token checks (0 disables),
+# and whether staff checks trust the token's is_staff claim without a lookup.
+# A revoked staff flag then stays effective until the token expires.
+NEWS_AUTH_USER_CACHE_TTL = config('NEWS_AUTH_USER_CACHE_TTL', default=60, cast=int)
+NEWS_JWT_STATELESS_STAFF = config('NEWS_JWT_STATELESS_STAFF', default=False, cast=bool)
+
+# /news/articles/<id>/related/: articles kept per article, score boosts for a
+# shared category and for recency (halving every NEWS_RELATED_HALF_LIFE_DAYS).
+NEWS_RELATED_COUNT = config('NEWS_RELATED_COUNT', default=10, cast=int)
+NEWS_RELATED_CATEGORY_BOOST = config('NEWS_RELATED_CATEGORY_BOOST', default=0.25, cast=float)
+NEWS_RELATED_RECENCY_BOOST = config('NEWS_RELATED_RECENCY_BOOST', default=0.25, cast=float)
+NEWS_RELATED_HALF_LIFE_DAYS = config('NEWS_RELATED_HALF_LIFE_DAYS', default=7, cast=float)
+
+# Article page views are counted in process memory and written every
+# NEWS_VIEW_FLUSH_SECONDS (or once NEWS_VIEW_FLUSH_MAX articles are pending).
+# Trending scores halve every NEWS_TRENDING_HALF_LIFE_HOURS; changing it
+# rescales existing scores. /news/articles/trending/ lists this many articles.
+NEWS_VIEW_FLUSH_SECONDS = config('NEWS_VIEW_FLUSH_SECONDS', default=10, cast=int)
+NEWS_VIEW_FLUSH_MAX = config('NEWS_VIEW_FLUSH_MAX', default=1000, cast=int)
+NEWS_TRENDING_HALF_LIFE_HOURS = config('NEWS_TRENDING_HALF_LIFE_HOURS', default=6, cast=float)
+NEWS_TRENDING_FEED_SIZE = config('NEWS_TRENDING_FEED_SIZE', default=20, cast=int)
+
+# Requests slower than this are logged with their SQL breakdown.
+NEWS_SLOW_REQUEST_MS = config('NEWS_SLOW_REQUEST_MS', default=500, cast=int)
+
 # import logging
 
 # Log database connection config (do not log password)
@@ -241,3 +363,19 @@ DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 
 # Optional: make uploaded files public
 AWS_DEFAULT_ACL = 'public-read'
+
+# Shared S3 client used by FileUploadView (see newsApp/storage.py).
+# Size the pool to the number of threads a worker runs concurrently.
+AWS_S3_MAX_POOL_CONNECTIONS = config('AWS_S3_MAX_POOL_CONNECTIONS', default=20, cast=int)
+AWS_S3_MULTIPART_THRESHOLD = config('AWS_S3_MULTIPART_THRESHOLD', default=8 * 1024 * 1024, cast=int)
+AWS_S3_MULTIPART_CHUNKSIZE = config('AWS_S3_MULTIPART_CHUNKSIZE', default=8 * 1024 * 1024, cast=int)
+AWS_S3_MAX_CONCURRENCY = config('AWS_S3_MAX_CONCURRENCY', default=4, cast=int)
+# head_object check after upload: 'sync', 'async' (off the request path) or 'off'
+AWS_S3_VERIFY_UPLOADS = config('AWS_S3_VERIFY_UPLOADS', default='async')
+
+# Processes that render banner image variants after upload; 0 renders inline.
+NEWS_IMAGE_WORKERS = config('NEWS_IMAGE_WORKERS', default=2, cast=int)
+
+# Direct-to-bucket uploads (upload/presign/ + upload/complete/)
+NEWS_UPLOAD_MAX_BYTES = config('NEWS_UPLOAD_MAX_BYTES', default=200 * 1024 * 1024, cast=int)
+NEWS_PRESIGNED_UPLOAD_EXPIRY = config('NEWS_PRESIGNED_UPLOAD_EXPIRY', default=900, cast=int)